@@ -0,0 +1,33 @@
+"""
+Script for rewriting delta encoded split modulestore structure versions as full snapshots
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from pytz import UTC
+from xmodule.modulestore.django import modulestore
+
+
+#
+# To run from command line: django-admin.py compact_split_structures [days]
+#
+class Command(BaseCommand):
+    """Rewrite the delta encoded structure versions in the split modulestore as full snapshots"""
+    help = '''Rewrite delta encoded split structure versions as full snapshots. Can pass an optional
+number of days to only compact the versions edited more than that many days ago.'''
+
+    def handle(self, *args, **options):
+        "Execute the command"
+        if len(args) > 1:
+            raise CommandError("compact_split_structures requires one or no arguments: |<days>|")
+
+        edited_before = None
+        if len(args) == 1:
+            try:
+                days = int(args[0])
+            except ValueError:
+                raise CommandError("days must be an integer, not {0}".format(args[0]))
+            edited_before = datetime.datetime.now(UTC) - datetime.timedelta(days=days)
+
+        compacted = modulestore('split').compact_structures(edited_before)
+        print("Compacted {0} structure versions".format(compacted))
@@ -160,6 +160,11 @@ MIDDLEWARE_CLASSES = (
     'ratelimitbackend.middleware.RateLimitMiddleware',
 )
 
+# A local disk cache for c4x static content too large for memcached, e.g.
+# {'DIRECTORY': '/tmp/static_content', 'MAX_SIZE': 1024 * 1024 * 1024}
+# (see contentserver.middleware.get_disk_cache). Disabled if None.
+STATIC_CONTENT_DISK_CACHE = None
+
 ############################ SIGNAL HANDLERS ################################
 # This is imported to register the exception signal handling that logs exceptions
 import monitoring.exceptions  # noqa
@@ -0,0 +1,121 @@
+"""
+A local disk cache for static content too large to keep in memcached.
+
+Files are named after the asset's location and the md5 digest stored for it in
+the content store, so a re-uploaded asset never matches a stale copy; stale
+copies just age out. The least recently served files are removed once the
+cache grows past its maximum size.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+
+class DiskContentCache(object):
+    """
+    Caches StaticContent data in files under `directory`, using at most
+    `max_size` bytes. Content bigger than `max_item_size` isn't cached.
+    """
+    def __init__(self, directory, max_size, max_item_size=None):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_item_size = max_item_size if max_item_size is not None else max_size / 4
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, content):
+        """
+        The path of the file caching `content`, or None if it can't be cached
+        """
+        if content.content_digest is None:
+            return None
+        key = hashlib.sha1(u'{0}:{1}'.format(content.location.url(), content.content_digest).encode('utf-8'))
+        return os.path.join(self.directory, key.hexdigest())
+
+    def _open(self, content, path):
+        """
+        Returns a StaticContentStream like `content` that reads from the file at `path`
+        """
+        return StaticContentStream(
+            content.location, content.name, content.content_type, open(path, 'rb'),
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, content_digest=content.content_digest
+        )
+
+    def get(self, content):
+        """
+        Returns a StaticContentStream that reads `content` from disk, or None
+        if it isn't cached.
+
+        content: a StaticContent (usually a StaticContentStream that hasn't
+            been read yet) whose metadata identifies the data to look for
+        """
+        path = self._path(content)
+        if path is None:
+            return None
+        try:
+            # mark the file as recently used
+            os.utime(path, None)
+            return self._open(content, path)
+        except (IOError, OSError):
+            return None
+
+    def put(self, content):
+        """
+        Copies the data of the StaticContentStream `content` to disk and
+        returns a StaticContentStream that reads it from there, or None if
+        `content` isn't cacheable.
+        """
+        path = self._path(content)
+        if path is None or content.length is None or content.length > self.max_item_size:
+            return None
+
+        # write to a temporary file and rename it, so that other processes
+        # never see a partially written file
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            log.exception("Unable to cache %s on disk", content.location)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        self.evict()
+        return self.get(content)
+
+    def evict(self):
+        """
+        Removes the least recently used files until the cache is within its maximum size
+        """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # another process got to it first
+                pass
+            total_size -= size
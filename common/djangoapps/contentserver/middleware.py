@@ -1,4 +1,9 @@
+import calendar
+import re
+
+from django.conf import settings
 from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
 
 from xmodule.contentstore.django import contentstore
 from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
@@ -6,6 +11,66 @@ from xmodule.modulestore import InvalidLocationError
 from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.exceptions import NotFoundError
 
+from .disk_cache import DiskContentCache
+
+# content smaller than this is kept in memcached
+MAX_CACHED_CONTENT_SIZE = 1048576
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_disk_cache = None
+
+
+def get_disk_cache():
+    """
+    Returns the DiskContentCache configured by settings.STATIC_CONTENT_DISK_CACHE,
+    or None if there isn't one. Expected settings:
+
+        STATIC_CONTENT_DISK_CACHE = {
+            'DIRECTORY': '/tmp/static_content',
+            'MAX_SIZE': 1024 * 1024 * 1024,
+            'MAX_ITEM_SIZE': 256 * 1024 * 1024,  # optional
+        }
+    """
+    global _disk_cache
+    config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None)
+    if _disk_cache is None and config:
+        _disk_cache = DiskContentCache(config['DIRECTORY'], config['MAX_SIZE'], config.get('MAX_ITEM_SIZE'))
+    return _disk_cache
+
+
+def parse_range_header(header_value, content_length):
+    """
+    Parses an HTTP Range header for a single byte range.
+
+    Returns (first_byte, last_byte) inclusive, or None if the header should be
+    ignored and the whole content served: it isn't a single range of bytes.
+
+    Raises ValueError if the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header_value.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+
+    if first == '':
+        # a suffix range: the last N bytes
+        suffix_length = int(last)
+        if suffix_length == 0:
+            raise ValueError(header_value)
+        return max(content_length - suffix_length, 0), content_length - 1
+
+    first_byte = int(first)
+    last_byte = int(last) if last != '' else content_length - 1
+    if last_byte < first_byte:
+        # syntactically invalid, so it is ignored
+        return None
+    if first_byte >= content_length:
+        raise ValueError(header_value)
+    return first_byte, min(last_byte, content_length - 1)
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -22,7 +87,8 @@ class StaticContentServer(object):
             # first look in our cache so we don't have to round-trip to the DB
             content = get_cached_content(loc)
             if content is None:
-                # nope, not in cache, let's fetch from DB
+                # nope, not in cache, let's fetch from DB. As a stream, only the GridFS
+                # file document is read until we ask for the data
                 try:
                     content = contentstore().find(loc, as_stream=True)
                 except NotFoundError:
@@ -33,28 +99,118 @@ class StaticContentServer(object):
                 # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
                 # this is because I haven't been able to find a means to stream data out of memcached
                 if content.length is not None:
-                    if content.length < 1048576:
+                    if content.length < MAX_CACHED_CONTENT_SIZE:
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
+                    else:
+                        # larger content can be read from local disk instead of from GridFS
+                        content = self._from_disk_cache(content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
 
-            # see if the last-modified at hasn't changed, if not return a 302 (Not Modified)
+            # content cached before content digests were stored won't have one
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{0}"'.format(content_digest) if content_digest else None
+            last_modified_at_str = http_date(calendar.timegm(content.last_modified_at.utctimetuple()))
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # see if the client has cached this content, if so then return a 304 (Not Modified)
+            if self._is_not_modified(request, etag, content.last_modified_at, last_modified_at_str):
+                self._close(content)
+                response = HttpResponseNotModified()
+                if etag is not None:
+                    response['ETag'] = etag
+                return response
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            byte_range = None
+            if 'HTTP_RANGE' in request.META and content.length is not None and \
+                    self._if_range_matches(request, etag, last_modified_at_str):
+                try:
+                    byte_range = parse_range_header(request.META['HTTP_RANGE'], content.length)
+                except ValueError:
+                    self._close(content)
+                    response = HttpResponse(status=416)
+                    response['Content-Range'] = 'bytes */{0}'.format(content.length)
+                    return response
+
+            if byte_range is not None:
+                first_byte, last_byte = byte_range
+                response = HttpResponse(
+                    content.stream_data_in_range(first_byte, last_byte), content_type=content.content_type
+                )
+                response.status_code = 206
+                response['Content-Range'] = 'bytes {0}-{1}/{2}'.format(first_byte, last_byte, content.length)
+                response['Content-Length'] = str(last_byte - first_byte + 1)
+            else:
+                response = HttpResponse(content.stream_data(), content_type=content.content_type)
+                if content.length is not None:
+                    response['Content-Length'] = str(content.length)
 
-            response = HttpResponse(content.stream_data(), content_type=content.content_type)
             response['Last-Modified'] = last_modified_at_str
+            response['Accept-Ranges'] = 'bytes'
+            if etag is not None:
+                response['ETag'] = etag
 
             return response
+
+    @staticmethod
+    def _from_disk_cache(content):
+        """
+        Returns `content` read from the local disk cache, if there is one, or
+        else `content` itself.
+        """
+        disk_cache = get_disk_cache()
+        if disk_cache is None:
+            return content
+
+        cached = disk_cache.get(content) or disk_cache.put(content)
+        if cached is None:
+            return content
+        content.close()
+        return cached
+
+    @staticmethod
+    def _close(content):
+        """
+        Closes the stream behind `content`, if it has one, when its data won't be served
+        """
+        if hasattr(content, 'close'):
+            content.close()
+
+    @staticmethod
+    def _is_not_modified(request, etag, last_modified_at, last_modified_at_str):
+        """
+        Returns whether the client's conditional request headers show that
+        its copy of the content is current.
+
+        If-None-Match takes precedence over If-Modified-Since when both are sent.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            if etag is None:
+                return False
+            etags = [value.strip() for value in if_none_match.split(',')]
+            return '*' in etags or etag in etags
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since is None:
+            return False
+        if if_modified_since == last_modified_at_str:
+            return True
+        if_modified_since = parse_http_date_safe(if_modified_since)
+        return (
+            if_modified_since is not None and
+            calendar.timegm(last_modified_at.utctimetuple()) <= if_modified_since
+        )
+
+    @staticmethod
+    def _if_range_matches(request, etag, last_modified_at_str):
+        """
+        Returns whether a Range request should be honored given its If-Range
+        header: only if the client's copy is of the current content.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        return if_range.strip() in (etag, last_modified_at_str)
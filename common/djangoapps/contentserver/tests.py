@@ -0,0 +1,136 @@
+"""
+Tests for the c4x static content server
+"""
+from datetime import datetime
+import shutil
+import StringIO
+import tempfile
+
+from django.test import TestCase
+from django.test.client import RequestFactory
+from mock import patch
+
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+from contentserver.disk_cache import DiskContentCache
+from contentserver.middleware import StaticContentServer, parse_range_header
+
+DATA = '0123456789' * 10
+URL = '/c4x/edX/toy/asset/sample.pdf'
+
+
+def make_stream(data=DATA, digest='abc123'):
+    return StaticContentStream(
+        StaticContent.get_location_from_path(URL), 'sample.pdf', 'application/pdf', StringIO.StringIO(data),
+        last_modified_at=datetime(2013, 7, 1, 12, 0, 0), length=len(data), content_digest=digest
+    )
+
+
+class ParseRangeHeaderTest(TestCase):
+    """
+    Tests for parsing Range headers
+    """
+    def test_ranges(self):
+        self.assertEquals((0, 9), parse_range_header('bytes=0-9', 100))
+        self.assertEquals((90, 99), parse_range_header('bytes=90-', 100))
+        self.assertEquals((90, 99), parse_range_header('bytes=-10', 100))
+        self.assertEquals((0, 99), parse_range_header('bytes=-500', 100))
+        self.assertEquals((50, 99), parse_range_header('bytes=50-500', 100))
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range_header('bytes=0-9,20-29', 100))
+        self.assertIsNone(parse_range_header('items=0-9', 100))
+        self.assertIsNone(parse_range_header('bytes=9-0', 100))
+        self.assertIsNone(parse_range_header('bytes=-', 100))
+
+    def test_unsatisfiable(self):
+        self.assertRaises(ValueError, parse_range_header, 'bytes=100-', 100)
+        self.assertRaises(ValueError, parse_range_header, 'bytes=-0', 100)
+
+
+@patch('contentserver.middleware.get_cached_content', lambda loc: None)
+@patch('contentserver.middleware.set_cached_content', lambda content: None)
+class StaticContentServerTest(TestCase):
+    """
+    Tests for serving content with conditional and range requests
+    """
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.server = StaticContentServer()
+        patcher = patch('contentserver.middleware.contentstore')
+        self.contentstore = patcher.start()
+        self.contentstore.return_value.find.side_effect = lambda loc, as_stream: make_stream()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **headers):
+        return self.server.process_request(self.factory.get(URL, **headers))
+
+    def test_full_response(self):
+        response = self.get()
+        self.assertEquals(200, response.status_code)
+        self.assertEquals(DATA, response.content)
+        self.assertEquals('"abc123"', response['ETag'])
+        self.assertEquals('bytes', response['Accept-Ranges'])
+        self.assertEquals(str(len(DATA)), response['Content-Length'])
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEquals(206, response.status_code)
+        self.assertEquals(DATA[10:20], response.content)
+        self.assertEquals('bytes 10-19/100', response['Content-Range'])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=500-')
+        self.assertEquals(416, response.status_code)
+        self.assertEquals('bytes */100', response['Content-Range'])
+
+    def test_if_range_mismatch(self):
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEquals(200, response.status_code)
+        self.assertEquals(DATA, response.content)
+
+    def test_if_none_match(self):
+        self.assertEquals(304, self.get(HTTP_IF_NONE_MATCH='"abc123"').status_code)
+        self.assertEquals(200, self.get(HTTP_IF_NONE_MATCH='"other"').status_code)
+
+    def test_if_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+        self.assertEquals(304, self.get(HTTP_IF_MODIFIED_SINCE=last_modified).status_code)
+        self.assertEquals(
+            304, self.get(HTTP_IF_MODIFIED_SINCE='Wed, 03 Jul 2013 12:00:00 GMT').status_code
+        )
+        self.assertEquals(
+            200, self.get(HTTP_IF_MODIFIED_SINCE='Sat, 01 Jun 2013 12:00:00 GMT').status_code
+        )
+
+
+class DiskContentCacheTest(TestCase):
+    """
+    Tests for the local disk tier of the content cache
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_put_and_get(self):
+        disk_cache = DiskContentCache(self.directory, 1000)
+        self.assertIsNone(disk_cache.get(make_stream()))
+        self.assertEquals(DATA, ''.join(disk_cache.put(make_stream()).stream_data()))
+        cached = disk_cache.get(make_stream())
+        self.assertEquals(DATA[5:15], ''.join(cached.stream_data_in_range(5, 14)))
+
+    def test_new_digest_misses(self):
+        disk_cache = DiskContentCache(self.directory, 1000)
+        disk_cache.put(make_stream())
+        self.assertIsNone(disk_cache.get(make_stream(digest='def456')))
+
+    def test_too_large(self):
+        disk_cache = DiskContentCache(self.directory, 1000, max_item_size=10)
+        self.assertIsNone(disk_cache.put(make_stream()))
+
+    def test_eviction(self):
+        disk_cache = DiskContentCache(self.directory, 250, max_item_size=100)
+        for digest in ('one', 'two', 'three'):
+            disk_cache.put(make_stream(digest=digest))
+        remaining = [digest for digest in ('one', 'two', 'three') if disk_cache.get(make_stream(digest=digest))]
+        self.assertEquals(2, len(remaining))
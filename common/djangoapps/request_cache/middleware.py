@@ -2,19 +2,31 @@ import threading
 
 _request_cache_threadlocal = threading.local()
 _request_cache_threadlocal.data = {}
+_request_cache_threadlocal.request = None
 
 class RequestCache(object):
     @classmethod
     def get_request_cache(cls):
         return _request_cache_threadlocal
+
+    @classmethod
+    def get_current_request(cls):
+        """
+        Returns the request this thread is handling, or None outside of a
+        request (e.g. in celery tasks and management commands), where nothing
+        clears the request cache
+        """
+        return getattr(_request_cache_threadlocal, 'request', None)
             
     def clear_request_cache(self):
         _request_cache_threadlocal.data = {}
 
     def process_request(self, request):
         self.clear_request_cache()
+        _request_cache_threadlocal.request = request
         return None
 
     def process_response(self, request, response):
         self.clear_request_cache()
+        _request_cache_threadlocal.request = None
         return response
\ No newline at end of file
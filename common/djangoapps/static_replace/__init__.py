@@ -1,5 +1,7 @@
 import logging
 import re
+import threading
+from collections import OrderedDict
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -11,6 +13,9 @@ from xmodule.contentstore.content import StaticContent
 
 log = logging.getLogger(__name__)
 
+# how many resolved static urls STATIC_URL_CACHE holds
+STATIC_URL_CACHE_SIZE = 10000
+
 
 def _url_replace_regex(prefix):
     """
@@ -90,6 +95,57 @@ def replace_course_urls(text, course_id):
     return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
 
 
+def _resolve_static_url(rest, data_directory, course_id, static_asset_path, get_modulestore_type):
+    """
+    Returns the url that the static url /static/<rest> should be replaced with,
+    or None if it should be left as it is.
+
+    get_modulestore_type: a function returning the modulestore type of a course_id
+    """
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) and course_id and get_modulestore_type(course_id) != XML_MODULESTORE_TYPE:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the mitx repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            return staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            return StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                return staticfiles_storage.url(rest)
+            else:
+                return staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            return "/static/" + course_path
+
+
+def _get_modulestore_type(course_id):
+    """
+    Returns the type of the modulestore holding course_id
+    """
+    return modulestore().get_modulestore_type(course_id)
+
+
 def replace_static_urls(text, data_directory, course_id=None, static_asset_path=''):
     """
     Replace /static/$stuff urls either with their correct url as generated by collectstatic,
@@ -105,7 +161,6 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
 
     def replace_static_url(match):
         original = match.group(0)
-        prefix = match.group('prefix')
         quote = match.group('quote')
         rest = match.group('rest')
 
@@ -113,42 +168,9 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
         if rest.endswith('?raw'):
             return original
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
+        url = _resolve_static_url(rest, data_directory, course_id, static_asset_path, _get_modulestore_type)
+        if url is None:
             return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id and modulestore().get_modulestore_type(course_id) != XML_MODULESTORE_TYPE:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the mitx repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
-
         return "".join([quote, url, quote])
 
 
@@ -157,3 +179,126 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
         replace_static_url,
         text
     )
+
+
+class StaticUrlCache(object):
+    """
+    A thread-safe, least-recently-used cache of the results of resolving
+    static urls, holding at most max_size entries.
+
+    Which files are in staticfiles_storage and which modulestore holds a
+    course don't change while a process runs, so neither do the urls that
+    static urls resolve to.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, compute):
+        """
+        Returns the value cached for key, calling compute() to find and
+        cache it if there isn't one.
+        """
+        with self._lock:
+            if key in self._entries:
+                # Re-insert it to mark it as the most recently used
+                value = self._entries.pop(key)
+                self._entries[key] = value
+                return value
+
+        value = compute()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+STATIC_URL_CACHE = StaticUrlCache(STATIC_URL_CACHE_SIZE)
+
+
+def _cached_modulestore_type(course_id):
+    """
+    Returns the type of the modulestore holding course_id, from STATIC_URL_CACHE
+    """
+    return STATIC_URL_CACHE.get_or_set(
+        ('modulestore_type', course_id),
+        lambda: _get_modulestore_type(course_id)
+    )
+
+
+# (data directory, rewrite course urls, rewrite jump_to_id urls) -> compiled regex
+_URL_REWRITE_REGEXES = {}
+
+
+def _url_rewrite_regex(data_directory, rewrite_course_urls, rewrite_jump_to_id_urls):
+    """
+    Returns a compiled regex matching the quoted /static/ urls, and
+    optionally the /course/ and /jump_to_id/ urls, that replace_urls rewrites.
+    """
+    key = (data_directory, rewrite_course_urls, rewrite_jump_to_id_urls)
+    regex = _URL_REWRITE_REGEXES.get(key)
+    if regex is None:
+        prefixes = ['/static/(?!{data_dir})'.format(data_dir=data_directory)]
+        if rewrite_course_urls:
+            prefixes.append('/course/')
+        if rewrite_jump_to_id_urls:
+            prefixes.append('/jump_to_id/')
+        regex = _URL_REWRITE_REGEXES[key] = re.compile(_url_replace_regex('|'.join(prefixes)))
+    return regex
+
+
+def replace_urls(text, data_directory, course_id=None, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Rewrites the urls of text in a single pass, giving the same result as
+
+        text = replace_static_urls(text, data_directory, course_id, static_asset_path)
+        if course_id:
+            text = replace_course_urls(text, course_id)
+        if jump_to_id_base_url:
+            text = replace_jump_to_id_urls(text, course_id, jump_to_id_base_url)
+
+    but resolving each static url in STATIC_URL_CACHE, so that staticfiles_storage
+    and the modulestore are asked about any one path of a course only once.
+    """
+    static_data_directory = static_asset_path or data_directory
+    regex = _url_rewrite_regex(static_data_directory, bool(course_id), bool(jump_to_id_base_url))
+
+    def resolve(rest):
+        return _resolve_static_url(rest, data_directory, course_id, static_asset_path, _cached_modulestore_type)
+
+    def replace_url(match):
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if prefix == '/course/':
+            url = '/courses/' + course_id + '/' + rest
+        elif prefix == '/jump_to_id/':
+            url = jump_to_id_base_url + rest
+        # Don't mess with things that end in '?raw'
+        elif rest.endswith('?raw'):
+            return original
+        elif settings.DEBUG:
+            # the files that finders find can change while the server runs
+            url = resolve(rest)
+        else:
+            url = STATIC_URL_CACHE.get_or_set(
+                ('static_url', course_id, data_directory, static_asset_path, rest),
+                lambda: resolve(rest)
+            )
+
+        if url is None:
+            return original
+        return "".join([quote, url, quote])
+
+    return regex.sub(replace_url, text)
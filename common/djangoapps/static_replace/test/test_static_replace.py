@@ -1,10 +1,10 @@
 import re
 
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=E0611
-from static_replace import (replace_static_urls, replace_course_urls,
-                            _url_replace_regex)
+from static_replace import (replace_static_urls, replace_course_urls, replace_jump_to_id_urls,
+                            replace_urls, STATIC_URL_CACHE, _url_replace_regex)
 from mock import patch, Mock
-from xmodule.modulestore import Location
+from xmodule.modulestore import Location, XML_MODULESTORE_TYPE
 from xmodule.modulestore.mongo import MongoModuleStore
 from xmodule.modulestore.xml import XMLModuleStore
 
@@ -79,6 +79,34 @@ def test_data_dir_fallback(mock_storage, mock_modulestore, mock_settings):
     assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
 
 
+@patch('static_replace.modulestore')
+@patch('static_replace.staticfiles_storage')
+def test_replace_urls(mock_storage, mock_modulestore):
+    STATIC_URL_CACHE.clear()
+    mock_modulestore.return_value = Mock(XMLModuleStore)
+    mock_modulestore.return_value.get_modulestore_type.return_value = XML_MODULESTORE_TYPE
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+    text = (
+        '<img src="/static/file.png"/><a href=\'/course/info\'>info</a>'
+        '<a href="/jump_to_id/abc">abc</a><img src="/static/file.png"/><img src="/static/foo.png?raw"/>'
+    )
+    chained = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_ID), COURSE_ID),
+        COURSE_ID, jump_to_id_base_url
+    )
+    STATIC_URL_CACHE.clear()
+    mock_storage.exists.reset_mock()
+
+    assert_equals(chained, replace_urls(text, DATA_DIRECTORY, COURSE_ID, jump_to_id_base_url=jump_to_id_base_url))
+    assert_equals(chained, replace_urls(text, DATA_DIRECTORY, COURSE_ID, jump_to_id_base_url=jump_to_id_base_url))
+    # each path is only looked up once
+    mock_storage.exists.assert_called_once_with('file.png')
+    STATIC_URL_CACHE.clear()
+
+
 def test_raw_static_check():
     """
     Make sure replace_static_urls leaves alone things that end in '.raw'
@@ -0,0 +1,41 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from student.models import (
+    sync_comments_service_users, PendingCommentsServiceSync, COMMENTS_SERVICE_SYNC_BATCH_SIZE,
+    COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS
+)
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+                    action='store',
+                    dest='batch_size',
+                    type='int',
+                    default=COMMENTS_SERVICE_SYNC_BATCH_SIZE,
+                    help='How many pending syncs to read at a time'),
+        make_option('--retry-abandoned',
+                    action='store_true',
+                    dest='retry_abandoned',
+                    default=False,
+                    help='Also retry the syncs that have been given up on after failing too many times'),
+        )
+
+    help = """
+    Send the information of the users saved since they were last synced to
+    the discussion service.
+    """
+
+    def handle(self, *args, **options):
+        abandoned = PendingCommentsServiceSync.objects.filter(failed_attempts__gte=COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS)
+        if options['retry_abandoned']:
+            abandoned.update(failed_attempts=0)
+        synced, failed = sync_comments_service_users(batch_size=options['batch_size'])
+        print 'Synced {0} users, {1} failed'.format(synced, failed)
+        num_abandoned = abandoned.count()
+        if num_abandoned:
+            print '{0} users have failed {1} times and are no longer retried, see --retry-abandoned'.format(
+                num_abandoned, COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS
+            )
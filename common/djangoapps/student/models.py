@@ -21,7 +21,9 @@ import uuid
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.db import models
+from django.core.cache import cache
+from django.db import models, IntegrityError
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.forms import ModelForm, forms
@@ -974,18 +976,115 @@ def add_user_to_default_group(user, group):
     utg.save()
 
 
+# How many pending syncs sync_comments_service_users reads at a time
+COMMENTS_SERVICE_SYNC_BATCH_SIZE = 100
+# How many seconds after a user is saved the sync task runs
+COMMENTS_SERVICE_SYNC_DELAY = 10
+# While this cache key is set, a sync task has been scheduled
+COMMENTS_SERVICE_SYNC_SCHEDULED_KEY = 'student.comments_service_sync_scheduled'
+# How many times syncing a user is tried before giving up until the user is saved again
+COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS = 20
+# The most seconds the sync task waits before trying failed syncs again
+COMMENTS_SERVICE_SYNC_MAX_RETRY_DELAY = 60 * 60
+# While this cache key is set, a sync task to try failed syncs again has been scheduled
+COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY = 'student.comments_service_sync_retry_scheduled'
+
+
+class PendingCommentsServiceSync(models.Model):
+    """
+    A user whose information needs to be sent to the comments service.
+
+    Saving a user records it here instead of calling the comments service, and
+    sync_comments_service_users later sends the user's current information:
+    however many times the user is saved in between, it is sent once.
+    `version` counts the saves, so that a save made while the user is being
+    synced isn't lost. A sync that has failed COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS
+    times is given up on until the user is saved again.
+    """
+    user = models.OneToOneField(User, unique=True, db_index=True)
+    version = models.IntegerField(default=0)
+    failed_attempts = models.IntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+
+def enqueue_comments_service_sync(user):
+    """
+    Record that `user` needs to be synced to the comments service, and make
+    sure a task to do so is scheduled.
+    """
+    pending = PendingCommentsServiceSync.objects.filter(user=user)
+    if not pending.update(version=F('version') + 1, failed_attempts=0):
+        try:
+            PendingCommentsServiceSync.objects.create(user=user)
+        except IntegrityError:
+            # another process created it first
+            pending.update(version=F('version') + 1, failed_attempts=0)
+
+    # only schedule one task for the saves made within the delay
+    if cache.add(COMMENTS_SERVICE_SYNC_SCHEDULED_KEY, True, COMMENTS_SERVICE_SYNC_DELAY):
+        from student.tasks import sync_comments_service_users_task
+        try:
+            sync_comments_service_users_task.apply_async(countdown=COMMENTS_SERVICE_SYNC_DELAY)
+        except Exception:  # pylint: disable=broad-except
+            # the pending syncs are sent by the next task, or by the
+            # sync_comments_service_users management command
+            log = logging.getLogger("mitx.discussion")
+            log.exception("Unable to schedule syncing users to the comments service")
+            cache.delete(COMMENTS_SERVICE_SYNC_SCHEDULED_KEY)
+
+
+def sync_comments_service_users(batch_size=COMMENTS_SERVICE_SYNC_BATCH_SIZE):
+    """
+    Send the information of every user with a pending sync to the comments
+    service, reading the pending syncs `batch_size` at a time. Syncs that fail
+    are kept to be tried again, unless they have failed
+    COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS times.
+
+    Returns (number of users synced, number of users that failed).
+    """
+    log = logging.getLogger("mitx.discussion")
+    synced = failed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            PendingCommentsServiceSync.objects.filter(
+                id__gt=last_id, failed_attempts__lt=COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS
+            ).select_related('user').order_by('id')[:batch_size]
+        )
+        if not batch:
+            break
+        for pending in batch:
+            last_id = pending.id
+            try:
+                cc.User.from_django_user(pending.user).save()
+            except Exception as e:
+                log.error(unicode(e))
+                log.error("update user info to discussion failed for user with id: " + str(pending.user_id))
+                PendingCommentsServiceSync.objects.filter(id=pending.id).update(
+                    failed_attempts=F('failed_attempts') + 1
+                )
+                if pending.failed_attempts + 1 >= COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS:
+                    log.error("giving up updating user info to discussion for user with id: %s after %d attempts",
+                              pending.user_id, COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS)
+                failed += 1
+                continue
+            # if the user was saved again since we read it, leave it for the next sync
+            PendingCommentsServiceSync.objects.filter(id=pending.id, version=pending.version).delete()
+            synced += 1
+    return synced, failed
+
+
 @receiver(post_save, sender=User)
 def update_user_information(sender, instance, created, **kwargs):
     if not settings.MITX_FEATURES['ENABLE_DISCUSSION_SERVICE']:
         # Don't try--it won't work, and it will fill the logs with lots of errors
         return
     try:
-        cc_user = cc.User.from_django_user(instance)
-        cc_user.save()
+        enqueue_comments_service_sync(instance)
     except Exception as e:
         log = logging.getLogger("mitx.discussion")
         log.error(unicode(e))
-        log.error("update user info to discussion failed for user with id: " + str(instance.id))
+        log.error("queueing update user info to discussion failed for user with id: " + str(instance.id))
 
 # Define login and logout handlers here in the models file, instead of the views file,
 # so that they are more likely to be loaded when a Studio user brings up the Studio admin
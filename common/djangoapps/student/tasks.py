@@ -0,0 +1,43 @@
+"""
+Celery tasks for the student app.
+"""
+from celery import task
+from celery.utils.log import get_task_logger
+from django.core.cache import cache
+
+from student.models import (
+    sync_comments_service_users, COMMENTS_SERVICE_SYNC_DELAY, COMMENTS_SERVICE_SYNC_MAX_RETRY_DELAY,
+    COMMENTS_SERVICE_SYNC_SCHEDULED_KEY, COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY,
+)
+
+log = get_task_logger(__name__)
+
+
+@task  # pylint: disable=E1102
+def sync_comments_service_users_task(attempt=0):
+    """
+    Send the users saved since the last sync to the comments service.
+
+    If any syncs fail, e.g. while the comments service is down, the task is
+    scheduled again with an exponential backoff, so that they are retried even
+    if no more users are saved. `attempt` counts these retries.
+    """
+    if attempt:
+        # this retry may schedule the next one
+        cache.delete(COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY)
+    else:
+        # users saved from now on need another task
+        cache.delete(COMMENTS_SERVICE_SYNC_SCHEDULED_KEY)
+    synced, failed = sync_comments_service_users()
+    log.info("Synced %d users to the comments service, %d failed", synced, failed)
+
+    if not failed:
+        return
+    countdown = min(COMMENTS_SERVICE_SYNC_DELAY * 2 ** (attempt + 1), COMMENTS_SERVICE_SYNC_MAX_RETRY_DELAY)
+    # only one retry is scheduled at a time, however many tasks had failures
+    if cache.add(COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY, True, countdown + COMMENTS_SERVICE_SYNC_MAX_RETRY_DELAY):
+        try:
+            sync_comments_service_users_task.apply_async(kwargs={'attempt': attempt + 1}, countdown=countdown)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to schedule retrying failed syncs to the comments service")
+            cache.delete(COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY)
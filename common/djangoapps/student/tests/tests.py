@@ -10,6 +10,7 @@ import re
 import unittest
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.contrib.auth.models import User
@@ -21,7 +22,11 @@ from django.utils.http import int_to_base36
 from mock import Mock, patch
 from textwrap import dedent
 
-from student.models import unique_id_for_user, CourseEnrollment
+from student.models import (
+    unique_id_for_user, CourseEnrollment, PendingCommentsServiceSync, sync_comments_service_users,
+    COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS, COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY
+)
+from student.tasks import sync_comments_service_users_task
 from student.views import process_survey_link, _cert_info, password_reset, password_reset_confirm_wrapper
 from student.tests.factories import UserFactory
 from student.tests.test_email import mock_render_to_string
@@ -332,3 +337,68 @@ class EnrollInCourseTest(TestCase):
         # for that user/course_id combination
         CourseEnrollment.enroll(user, course_id)
         self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+
+
+@patch.dict(settings.MITX_FEATURES, {'ENABLE_DISCUSSION_SERVICE': True})
+@patch('student.tasks.sync_comments_service_users_task.apply_async', Mock())
+class CommentsServiceSyncTest(TestCase):
+    """
+    Tests that saving users records them to be synced to the comments service
+    """
+    def setUp(self):
+        self.user = UserFactory.create()
+
+    @patch('student.models.cc.User.save')
+    def test_saves_are_batched(self, mock_save):
+        self.user.save()
+        self.user.save()
+        self.assertEqual(1, PendingCommentsServiceSync.objects.filter(user=self.user).count())
+        self.assertFalse(mock_save.called)
+
+        self.assertEqual((1, 0), sync_comments_service_users())
+        self.assertEqual(1, mock_save.call_count)
+        self.assertFalse(PendingCommentsServiceSync.objects.exists())
+
+    @patch('student.models.cc.User.save')
+    def test_save_during_sync(self, mock_save):
+        self.user.save()
+        mock_save.side_effect = lambda: self.user.save()
+        self.assertEqual((1, 0), sync_comments_service_users())
+        # the user was saved again while it was synced
+        self.assertTrue(PendingCommentsServiceSync.objects.filter(user=self.user).exists())
+
+    @patch('student.models.cc.User.save', Mock(side_effect=Exception('unavailable')))
+    def test_failed_sync_is_kept(self):
+        self.user.save()
+        self.assertEqual((0, 1), sync_comments_service_users())
+        self.assertEqual(1, PendingCommentsServiceSync.objects.get(user=self.user).failed_attempts)
+
+    @patch('student.models.cc.User.save', Mock(side_effect=Exception('unavailable')))
+    def test_failed_sync_is_given_up(self):
+        self.user.save()
+        PendingCommentsServiceSync.objects.filter(user=self.user).update(
+            failed_attempts=COMMENTS_SERVICE_SYNC_MAX_ATTEMPTS - 1
+        )
+        self.assertEqual((0, 1), sync_comments_service_users())
+        self.assertEqual((0, 0), sync_comments_service_users())
+
+        # until the user is saved again
+        self.user.save()
+        self.assertEqual(0, PendingCommentsServiceSync.objects.get(user=self.user).failed_attempts)
+        self.assertEqual((0, 1), sync_comments_service_users())
+
+    @patch('student.tasks.sync_comments_service_users', Mock(return_value=(0, 1)))
+    def test_failed_syncs_are_retried(self):
+        cache.delete(COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY)
+        self.addCleanup(cache.delete, COMMENTS_SERVICE_SYNC_RETRY_SCHEDULED_KEY)
+        with patch('student.tasks.sync_comments_service_users_task.apply_async') as mock_apply_async:
+            sync_comments_service_users_task()
+            mock_apply_async.assert_called_once_with(kwargs={'attempt': 1}, countdown=20)
+
+            # another failing task doesn't schedule a second retry
+            sync_comments_service_users_task()
+            self.assertEqual(1, mock_apply_async.call_count)
+
+            # but the retry schedules the next one, waiting longer
+            sync_comments_service_users_task(attempt=1)
+            mock_apply_async.assert_called_with(kwargs={'attempt': 2}, countdown=40)
@@ -89,6 +89,20 @@ def replace_static_urls(get_html, data_dir, course_id=None, static_asset_path=''
     return _get_html
 
 
+def replace_urls(get_html, data_dir, course_id, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Updates the supplied module with a new get_html function that wraps the
+    old get_html function and rewrites its /static/, /course/ and /jump_to_id/
+    urls in a single pass (see static_replace.replace_urls).
+    """
+    @wraps(get_html)
+    def _get_html():
+        return static_replace.replace_urls(
+            get_html(), data_dir, course_id, static_asset_path=static_asset_path, jump_to_id_base_url=jump_to_id_base_url
+        )
+    return _get_html
+
+
 def grade_histogram(module_id):
     ''' Print out a histogram of grades on a given problem.
         Part of staff member debug info.
@@ -7,10 +7,13 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import calcfunctions
 
+from collections import OrderedDict
+
 from pyparsing import (
     Word, Literal, CaselessLiteral, ZeroOrMore, MatchFirst, Optional, Forward,
     Group, ParseResults, stringEnd, Suppress, Combine, alphas, nums, alphanums
@@ -50,6 +53,9 @@ DEFAULT_FUNCTIONS = {
     'arccsch': calcfunctions.arccsch,
     'arccoth': calcfunctions.arccoth
 }
+# The default functions that give the same results applied to an array of
+# samples as applied to each sample in turn. (Used by `evaluate_samples`.)
+VECTORIZABLE_FUNCTIONS = set(DEFAULT_FUNCTIONS.values()) - {math.factorial, calcfunctions.arccot}
 DEFAULT_VARIABLES = {
     'i': numpy.complex(0, 1),
     'j': numpy.complex(0, 1),
@@ -72,6 +78,9 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# How many parsed expressions to keep in `PARSE_CACHE`
+PARSE_CACHE_SIZE = 1024
+
 
 class UndefinedVariable(Exception):
     """
@@ -216,6 +225,167 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+def build_grammar():
+    """
+    Build the pyparsing grammar for an algebraic expression.
+
+    The parse tree has proper groupings to reflect parenthesis and order of
+    operations, with results names for each kind of node. Building it is
+    expensive, so `ALGEBRA_GRAMMAR` is built once when the module is loaded.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=W0104
+    return expr + stringEnd
+
+ALGEBRA_GRAMMAR = build_grammar()
+
+
+class ParsedExpression(object):
+    """
+    The result of parsing a math expression with `ALGEBRA_GRAMMAR`.
+
+    Holds the parse tree and the names of the variables and functions used in
+    it, and lazily builds a reduced tree for `evaluate_samples`. Instances are
+    shared through `PARSE_CACHE`, so none of these should be modified.
+    """
+    def __init__(self, math_expr):
+        self.tree = ALGEBRA_GRAMMAR.parseString(math_expr)[0]
+        self.variables_used = set()
+        self.functions_used = set()
+        self._reduced_tree = None
+
+        nodes = [self.tree]
+        while nodes:
+            node = nodes.pop()
+            if not isinstance(node, ParseResults):
+                continue
+            if node.getName() == 'variable':
+                self.variables_used.add(node[0])
+            elif node.getName() == 'function':
+                self.functions_used.add(node[0])
+            nodes.extend(node)
+
+    @property
+    def reduced_tree(self):
+        """
+        The parse tree with numbers converted to floats, parentheses removed,
+        and each node represented by a tuple `(node_name, children)`, e.g.
+
+          '2*x^2' -> ('sum', [('product', [('parallel', [('power', [
+              ('number', 2.0)])]), '*', ('parallel', [('power', [
+              ('variable', 'x'), ('number', 2.0)])])])])
+        """
+        if self._reduced_tree is None:
+            def first_node(parse_result):
+                """Return the child node of an atom, dropping any parentheses."""
+                return next(k for k in parse_result if isinstance(k, tuple))
+
+            reduce_actions = {
+                'number': lambda x: ('number', eval_number(x)),
+                'variable': lambda x: ('variable', x[0]),
+                'function': lambda x: ('function', (x[0], x[1])),
+                'atom': first_node,
+                'power': lambda x: ('power', [k for k in x if isinstance(k, tuple)]),
+                'parallel': lambda x: ('parallel', [k for k in x if isinstance(k, tuple)]),
+                'product': lambda x: ('product', list(x)),
+                'sum': lambda x: ('sum', list(x)),
+            }
+            augmenter = ParseAugmenter(None)
+            augmenter.tree = self.tree
+            self._reduced_tree = augmenter.reduce_tree(reduce_actions)
+        return self._reduced_tree
+
+
+class ParseCache(object):
+    """
+    A thread-safe, least-recently-used cache of `ParsedExpression`s keyed by
+    the expression string.
+
+    Case sensitivity is not part of the key: it only changes how the names in
+    the tree are looked up, not the tree itself.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, math_expr):
+        """
+        Return the cached `ParsedExpression` for `math_expr`, or None.
+        """
+        with self._lock:
+            parsed = self._entries.pop(math_expr, None)
+            if parsed is not None:
+                # Re-insert it to mark it as the most recently used
+                self._entries[math_expr] = parsed
+            return parsed
+
+    def set(self, math_expr, parsed):
+        """
+        Cache `parsed` as the `ParsedExpression` for `math_expr`.
+        """
+        with self._lock:
+            self._entries.pop(math_expr, None)
+            self._entries[math_expr] = parsed
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+PARSE_CACHE = ParseCache(PARSE_CACHE_SIZE)
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -258,6 +428,106 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+class _NotVectorizable(Exception):
+    """
+    Raised when an expression can't be evaluated over arrays of samples.
+    """
+    pass
+
+
+def _evaluate_reduced_tree(node, variables, functions, casify):
+    """
+    Evaluate a `ParsedExpression.reduced_tree` node, where variables may be
+    numpy arrays of samples.
+
+    Mirrors the `eval_*` actions used by `evaluator`, without the checks that
+    don't work elementwise (those raise an error that makes
+    `evaluate_samples` fall back to `evaluator`).
+    """
+    node_name, children = node
+    if node_name == 'number':
+        return children
+    elif node_name == 'variable':
+        return variables[casify(children)]
+    elif node_name == 'function':
+        name, argument = children
+        function = functions[casify(name)]
+        if function not in VECTORIZABLE_FUNCTIONS:
+            raise _NotVectorizable(name)
+        return function(_evaluate_reduced_tree(argument, variables, functions, casify))
+
+    if node_name in ('power', 'parallel'):
+        values = [_evaluate_reduced_tree(k, variables, functions, casify) for k in children]
+        if node_name == 'power':
+            return reduce(lambda a, b: b ** a, reversed(values))
+        if len(values) == 1:
+            return values[0]
+        # A zero in the inputs raises a divide error rather than giving NaN,
+        # which sends us back to `evaluator` for exact behavior.
+        return 1. / sum(1. / value for value in values)
+
+    # node_name is 'sum' or 'product'
+    if node_name == 'sum':
+        result, operators = 0.0, {'+': operator.add, '-': operator.sub}
+        current_op = operator.add
+    else:
+        result, operators = 1.0, {'*': operator.mul, '/': operator.truediv}
+        current_op = operator.mul
+    for child in children:
+        if isinstance(child, basestring):
+            current_op = operators[child]
+        else:
+            result = current_op(result, _evaluate_reduced_tree(child, variables, functions, casify))
+    return result
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression once for each dictionary of variables in
+    `variables_list`.
+
+    Returns the same list as
+      [evaluator(variables, functions, math_expr, case_sensitive)
+       for variables in variables_list]
+    and raises the same errors, but parses the expression only once and, where
+    possible, evaluates all of the samples in a single pass over numpy arrays.
+    """
+    if math_expr.strip() == "" or not variables_list:
+        return [evaluator(variables, functions, math_expr, case_sensitive) for variables in variables_list]
+
+    sample_names = set(variables_list[0])
+    if any(set(variables) != sample_names for variables in variables_list):
+        return [evaluator(variables, functions, math_expr, case_sensitive) for variables in variables_list]
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    # Every sample defines the same names, so one check covers all of them
+    all_variables, all_functions = add_defaults(variables_list[0], functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    for name in sample_names:
+        all_variables[casify(name)] = numpy.array([variables[name] for variables in variables_list])
+
+    try:
+        # Anything that would silently give inf or NaN elementwise, but might
+        # raise for a single sample, is evaluated by `evaluator` instead.
+        with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+            result = _evaluate_reduced_tree(
+                math_interpreter.parsed.reduced_tree, all_variables, all_functions, casify
+            )
+            result = numpy.asarray(result) * numpy.ones(len(variables_list))
+    except Exception:  # pylint: disable=broad-except
+        return [evaluator(variables, functions, math_expr, case_sensitive) for variables in variables_list]
+
+    return result.tolist()
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -275,26 +545,10 @@ class ParseAugmenter(object):
         self.case_sensitive = case_sensitive
         self.math_expr = math_expr
         self.tree = None
+        self.parsed = None
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -306,58 +560,19 @@ class ParseAugmenter(object):
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
+
+        Parses are shared through `PARSE_CACHE`, so the tree must not be
+        modified.
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=W0104
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        parsed = PARSE_CACHE.get(self.math_expr)
+        if parsed is None:
+            parsed = ParsedExpression(self.math_expr)
+            PARSE_CACHE.set(self.math_expr, parsed)
+
+        self.tree = parsed.tree
+        self.variables_used = set(parsed.variables_used)
+        self.functions_used = set(parsed.functions_used)
+        self.parsed = parsed
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -558,3 +558,82 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Run tests for the shared cache of parsed expressions
+    """
+    def setUp(self):
+        calc.PARSE_CACHE.clear()
+
+    def test_parse_is_cached(self):
+        """
+        A second parse of the same expression reuses the first tree
+        """
+        first = calc.ParseAugmenter('x^2 + sin(y)')
+        first.parse_algebra()
+        second = calc.ParseAugmenter('x^2 + sin(y)', case_sensitive=True)
+        second.parse_algebra()
+        self.assertIs(first.tree, second.tree)
+        self.assertEqual(set(['x', 'y']), second.variables_used)
+        self.assertEqual(set(['sin']), second.functions_used)
+
+    def test_eviction(self):
+        """
+        The least recently used expression is evicted first
+        """
+        cache = calc.ParseCache(2)
+        cache.set('a', 'parsed a')
+        cache.set('b', 'parsed b')
+        cache.get('a')
+        cache.set('c', 'parsed c')
+        self.assertEqual('parsed a', cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual('parsed c', cache.get('c'))
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which should always agree with
+    calling calc.evaluator once per sample
+    """
+    def assert_matches_evaluator(self, math_expr, samples, functions=None, case_sensitive=False):
+        """
+        Check that evaluate_samples gives the same results as evaluator
+        """
+        functions = functions or {}
+        expected = [calc.evaluator(variables, functions, math_expr, case_sensitive) for variables in samples]
+        actual = calc.evaluate_samples(samples, functions, math_expr, case_sensitive)
+        self.assertEqual(len(expected), len(actual))
+        for expected_value, actual_value in zip(expected, actual):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(expected_value, actual_value)
+
+    def test_vectorized(self):
+        samples = [{'x': 1.5, 'Y': 2.0}, {'x': -0.5, 'Y': 3.0}, {'x': 4.0, 'Y': 0.25}]
+        self.assert_matches_evaluator('x^2 + 3*y - sin(x)/Y', samples)
+        self.assert_matches_evaluator('2^x^2 + pi', samples)
+        self.assert_matches_evaluator('-x + 2k - (x*y)', samples)
+        self.assert_matches_evaluator('x || Y', samples)
+
+    def test_constant(self):
+        self.assert_matches_evaluator('4', [{'x': 1.0}, {'x': 2.0}])
+
+    def test_fallback(self):
+        samples = [{'x': 0.0}, {'x': 4.0}]
+        # 1/0 raises for a single sample
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(samples, {}, '1/x')
+        # parallel resistors give NaN on a zero input
+        self.assert_matches_evaluator('x || 2', samples)
+        # factorial doesn't work on arrays
+        self.assert_matches_evaluator('fact(x)', samples)
+        # neither might user-defined functions
+        self.assert_matches_evaluator('f(x)', samples, functions={'f': lambda x: x if x > 1 else 0})
+
+    def test_undefined_vars(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples([{'x': 1.0}, {'x': 2.0}], {}, 'x + z')
@@ -14,13 +14,18 @@ This is used by capa_module.
 '''
 
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
+import time
+from collections import OrderedDict
 
 from lxml import etree
 from xml.sax.saxutils import unescape
 from copy import deepcopy
+from functools import partial
 
 from capa.correctmap import CorrectMap
 import capa.inputtypes as inputtypes
@@ -63,6 +68,109 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# the most parsed problems PROBLEM_CACHE holds. capa_module never uses more
+# than MAX_RANDOMIZATION_BINS (1000) seeds for a problem.
+PROBLEM_CACHE_SIZE = 1000
+
+# the least number of seconds between checks that the files a cached parse was
+# built from haven't changed
+FILE_VERSIONS_CHECK_INTERVAL = 10
+
+
+class ProblemCache(object):
+    """
+    A thread-safe, least-recently-used cache of parsed problems: the problem
+    tree with its includes processed, and the context its scripts produced,
+    before the tree is preprocessed for a particular problem id.
+
+    Both only depend on the problem text, the seed and the course's files, so
+    problems built from the same text and seed can start from copies of the
+    same parse instead of parsing and executing the problem again. A parse is
+    dropped once the files it was built from (see file_versions) change, which
+    is checked at most every FILE_VERSIONS_CHECK_INTERVAL seconds.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return a new copy of the (tree, context) cached for key, or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            # Re-insert it to mark it as the most recently used
+            self._entries[key] = entry
+            now = time.time()
+            check_versions = entry['get_versions'] is not None and \
+                now - entry['checked'] >= FILE_VERSIONS_CHECK_INTERVAL
+            if check_versions:
+                # Other threads reuse the parse meanwhile rather than also checking
+                entry['checked'] = now
+        if check_versions and entry['get_versions']() != entry['versions']:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        return deepcopy(entry['tree']), deepcopy(entry['context'])
+
+    def set(self, key, tree, context, get_versions=None):
+        """
+        Cache copies of the parsed tree and context for key.
+
+        get_versions: a function returning the versions of the files the parse
+            was built from, which is called again to check that they haven't
+            changed when the parse is reused
+        """
+        entry = {
+            'tree': deepcopy(tree),
+            'context': deepcopy(context),
+            'get_versions': get_versions,
+            'versions': get_versions() if get_versions is not None else None,
+            'checked': time.time(),
+        }
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+PROBLEM_CACHE = ProblemCache(PROBLEM_CACHE_SIZE)
+
+
+def file_versions(filestore, filenames, directories):
+    """
+    Returns the modification times of the files `filenames` in filestore and
+    of every file under the `directories`, so that a parsed problem can be
+    dropped from PROBLEM_CACHE when its includes or script code are changed,
+    e.g. when an XML course is reloaded in place.
+    """
+    versions = []
+    for filename in filenames:
+        try:
+            versions.append(filestore.getinfo(filename).get('modified_time'))
+        except Exception:
+            versions.append(None)
+    for directory in directories:
+        for dirpath, dirnames, files in os.walk(directory):
+            dirnames.sort()
+            for path in [dirpath] + [os.path.join(dirpath, name) for name in sorted(files)]:
+                try:
+                    versions.append((path, os.path.getmtime(path)))
+                except OSError:
+                    versions.append((path, None))
+    return versions
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -118,14 +226,26 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        cache_key = self._problem_cache_key()
+        cached = PROBLEM_CACHE.get(cache_key)
+        if cached is not None:
+            self.tree, self.context = cached
+        else:
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            # handle any <include file="foo"> tags
+            includes_complete = self._process_includes()
 
-        # construct script processor context (eg for customresponse problems)
-        self.context = self._extract_context(self.tree)
+            # construct script processor context (eg for customresponse problems)
+            self.context = self._extract_context(self.tree)
+
+            # a problem missing an include (only allowed when debugging) isn't
+            # cached, so that fixing the include takes effect
+            if includes_complete:
+                PROBLEM_CACHE.set(cache_key, self.tree, self.context, partial(
+                    file_versions, self.system.filestore, self._included_files, self._script_directories
+                ))
 
         # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
         # transformations.  This also creates the dict (self.responders) of Response
@@ -406,11 +526,32 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _problem_cache_key(self):
+        """
+        The key of this problem's parse in PROBLEM_CACHE: the problem text, the
+        seed, and the files and kind of sandbox that its includes and scripts
+        are read and run with.
+        """
+        problem_text = self.problem_text
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return (
+            hashlib.sha1(problem_text).hexdigest(),
+            self.seed,
+            getattr(self.system.filestore, 'root_path', None),
+            bool(self.system.can_execute_unsafe_code()),
+        )
+
     def _process_includes(self):
         '''
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
         into our XML tree.  Fail gracefully if debugging.
+
+        Returns whether every include was processed. The names of the included
+        files are kept in self._included_files.
         '''
+        complete = True
+        self._included_files = []
         includes = self.tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file')
@@ -434,6 +575,7 @@ class LoncapaProblem(object):
                     if not self.system.get('DEBUG'):
                         raise
                     else:
+                        complete = False
                         continue
                 try:
                     # read in and convert to XML
@@ -450,13 +592,16 @@ class LoncapaProblem(object):
                     if not self.system.get('DEBUG'):
                         raise
                     else:
+                        complete = False
                         continue
 
                 # insert new XML into tree in place of include
                 parent = inc.getparent()
                 parent.insert(parent.index(inc), incxml)
                 parent.remove(inc)
+                self._included_files.append(filename)
                 log.debug('Included %s into %s' % (filename, self.problem_id))
+        return complete
 
     def _extract_system_path(self, script):
         """
@@ -499,12 +644,16 @@ class LoncapaProblem(object):
         variables for problem answer checking.
 
         Problem XML goes to Python execution context. Runs everything in script tags.
+
+        The directories the scripts may import from, whether or not they exist
+        yet, are kept in self._script_directories.
         '''
         context = {}
         context['seed'] = self.seed
         all_code = ''
 
         python_path = []
+        self._script_directories = []
 
         for script in tree.findall('.//script'):
 
@@ -517,6 +666,8 @@ class LoncapaProblem(object):
             # TODO: evaluate only python
 
             for d in self._extract_system_path(script):
+                if d not in self._script_directories:
+                    self._script_directories.append(d)
                 if d not in python_path and os.path.exists(d):
                     python_path.append(d)
 
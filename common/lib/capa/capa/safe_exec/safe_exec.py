@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import create_worker_pool
 from statsd import statsd
 
 import hashlib
@@ -46,6 +47,23 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The SandboxWorkerPool that safe_exec runs code in, if one is configured.
+WORKER_POOL = None
+
+
+def configure_worker_pool(size=0, max_executions=100):
+    """
+    Run sandboxed code in a pool of `size` warm workers, each replaced after
+    running `max_executions` pieces of code. A size of zero, or codejail not
+    being configured for python, means each execution starts a new sandbox.
+    """
+    global WORKER_POOL
+    if WORKER_POOL is not None:
+        WORKER_POOL.close()
+    WORKER_POOL = create_worker_pool(
+        size, [modname for _, modname in ASSUMED_IMPORTS], max_executions=max_executions
+    )
+
 
 def update_hash(hasher, obj):
     """
@@ -116,6 +134,8 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif WORKER_POOL is not None:
+        exec_fn = WORKER_POOL.execute
     else:
         exec_fn = codejail_safe_exec
 
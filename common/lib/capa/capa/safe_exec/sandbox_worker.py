@@ -0,0 +1,161 @@
+"""
+The program run by each sandboxed python worker in a worker_pool.
+
+It isn't imported by capa: worker_pool copies it into each worker's jail
+directory and runs it with the sandboxed python, like codejail runs jailed
+code.
+
+The worker imports the modules named on its command line (the ones problem
+code is assumed to use), then reads requests from stdin, one JSON object per line:
+
+    {"id": ..., "code": ..., "globals": ..., "python_path": [...], "dir": ..., "limits": {...}}
+
+Each request is executed in a forked child process, so code only ever sees
+the state left by the worker's imports, never that of earlier requests. The
+child runs `code` in `globals` with its current directory set to `dir` and the
+`python_path` directories on its path, limited by `limits` (CPU and VMEM are
+resource limits, REALTIME is enforced by the worker). Its stdin, stdout and
+stderr are /dev/null, so the code can't write to the worker's stdout. One JSON
+object is written to stdout per request, carrying the request's id:
+{"id": ..., "globals": ...} with the JSON-safe globals the code left, or
+{"id": ..., "error": ...} describing why it failed.
+"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+
+def jsonable(value):
+    """
+    Whether `value` can be sent back to the calling process.
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+def set_child_limits(limits):
+    """
+    Limit the process running the code: no subprocesses or files, and the
+    configured CPU time and memory.
+    """
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    cpu = limits.get("CPU")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    vmem = limits.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+
+def detach_std_fds():
+    """
+    Point the child's stdin, stdout and stderr at /dev/null: anything the code
+    writes to the worker's stdout would corrupt the responses to later requests.
+    """
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    if devnull > 2:
+        os.close(devnull)
+
+
+def run_child(request, write_fd):
+    """
+    Run the request's code and write the result to write_fd. Never returns.
+    """
+    try:
+        detach_std_fds()
+        os.chdir(request["dir"])
+        sys.path.extend(request["python_path"])
+        set_child_limits(request["limits"])
+        g_dict = request["globals"]
+        exec request["code"] in g_dict
+        result = {"globals": dict(
+            (key, value) for key, value in g_dict.iteritems() if jsonable(value) and key not in BAD_KEYS
+        )}
+    except BaseException:
+        result = {"error": traceback.format_exc()}
+    try:
+        with os.fdopen(write_fd, "w") as result_file:
+            json.dump(result, result_file)
+    finally:
+        os._exit(0)
+
+
+def execute(request):
+    """
+    Run the request in a forked child, and return the result.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(request, write_fd)
+    os.close(write_fd)
+
+    realtime = request["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    timed_out = False
+    while True:
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        readable, _, _ = select.select([read_fd], [], [], timeout)
+        if not readable:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {"error": "Code ran longer than %s seconds" % realtime}
+    if not chunks:
+        return {"error": "Code exited with status %s" % status}
+    try:
+        return json.loads("".join(chunks))
+    except ValueError:
+        return {"error": "Code exited with status %s" % status}
+
+
+def main():
+    # Anything the modules print on import would corrupt the responses on stdout.
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    for modname in sys.argv[1:]:
+        try:
+            __import__(modname)
+        except ImportError:
+            pass
+    sys.stdout = stdout
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        request = json.loads(line)
+        response = execute(request)
+        response["id"] = request.get("id")
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
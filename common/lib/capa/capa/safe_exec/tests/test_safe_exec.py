@@ -1,15 +1,21 @@
 """Test safe_exec.py"""
 
 import hashlib
+import json
 import os
 import os.path
 import random
+import subprocess
+import sys
 import textwrap
+import threading
 import unittest
 
+from mock import Mock, patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, configure_worker_pool
+from capa.safe_exec.worker_pool import WORKER_PY, SandboxWorkerPool
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -90,6 +96,106 @@ class TestSafeOrNot(unittest.TestCase):
         self.assertEqual(g['files'], os.listdir('/'))
 
 
+class TestSandboxWorker(unittest.TestCase):
+    """Test the program run by pooled workers, outside of a sandbox."""
+
+    def setUp(self):
+        self.worker = subprocess.Popen(
+            [sys.executable, WORKER_PY, "math"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self.addCleanup(self.worker.wait)
+        self.addCleanup(self.worker.stdin.close)
+
+    def execute(self, code, globals_dict, limits=None, request_id="1"):
+        request = {
+            "id": request_id, "code": code, "globals": globals_dict, "python_path": [],
+            "dir": os.path.dirname(__file__), "limits": limits or {},
+        }
+        self.worker.stdin.write(json.dumps(request) + "\n")
+        self.worker.stdin.flush()
+        response = json.loads(self.worker.stdout.readline())
+        self.assertEqual(response.pop("id"), request_id)
+        return response
+
+    def test_executions_are_isolated(self):
+        response = self.execute("import math; math.pi = 3; b = a + 1", {"a": 1})
+        self.assertEqual(response["globals"], {"a": 1, "b": 2})
+        response = self.execute("pi = math.pi", {"math": None})
+        self.assertIn("error", response)
+        response = self.execute("import math; pi = math.pi", {})
+        self.assertEqual(response["globals"]["pi"], 3.141592653589793)
+
+    def test_code_cant_write_responses(self):
+        code = (
+            "import os, sys\n"
+            "print 'printed'\n"
+            "sys.__stdout__.write('{\"globals\": {\"correct\": true}}\\n')\n"
+            "sys.__stdout__.flush()\n"
+            "os.write(1, '{\"globals\": {\"correct\": true}}\\n')\n"
+            "x = 1\n"
+        )
+        self.assertEqual(self.execute(code, {}, request_id="1")["globals"], {"x": 1})
+        response = self.execute("correct = submission == 42", {"submission": 41}, request_id="2")
+        self.assertEqual(response["globals"], {"submission": 41, "correct": False})
+
+    def test_errors(self):
+        self.assertIn("ZeroDivisionError", self.execute("1/0", {})["error"])
+        self.assertIn("error", self.execute("while True: pass", {}, limits={"REALTIME": 1}))
+        # The worker survives both
+        self.assertEqual(self.execute("a = 1", {})["globals"], {"a": 1})
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Test running code in a pool of sandbox workers."""
+
+    def setUp(self):
+        # Can't start sandboxed workers if CodeJail isn't configured for python.
+        if not is_configured("python"):
+            raise SkipTest
+        configure_worker_pool(size=1, max_executions=2)
+        self.addCleanup(configure_worker_pool)
+
+    def test_set_values(self):
+        for _ in xrange(3):
+            g = {}
+            safe_exec("a = int(math.pi)", g)
+            self.assertEqual(g['a'], 3)
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+
+class TestWorkerPoolStartFailures(unittest.TestCase):
+    """Test that threads waiting for a worker aren't stranded when workers can't start."""
+
+    @patch('capa.safe_exec.worker_pool.ACQUIRE_POLL_INTERVAL', 0.01)
+    @patch('capa.safe_exec.worker_pool.SandboxWorker')
+    def test_waiting_thread_sees_failed_replacement(self, mock_worker_class):
+        pool = SandboxWorkerPool(size=1, preimported_modules=[])
+        worker = pool._acquire()
+
+        # Another thread waits for the only worker, which is retired and can't be replaced
+        errors = []
+
+        def wait_for_worker():
+            try:
+                pool._acquire()
+            except SafeExecException as err:
+                errors.append(err)
+
+        waiting = threading.Thread(target=wait_for_worker)
+        waiting.start()
+        mock_worker_class.side_effect = OSError("Can't start a sandboxed python")
+        pool._retire(worker)
+        waiting.join(5)
+
+        self.assertFalse(waiting.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(pool._started, 0)
+
+
 class DictCache(object):
     """A cache implementation over a simple dict, for testing."""
 
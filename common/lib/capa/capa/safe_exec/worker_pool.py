@@ -0,0 +1,268 @@
+"""
+A pool of warm sandboxed python workers for safe_exec.
+
+Running code with codejail starts a new sandboxed python for every execution,
+which then imports the modules problem code is assumed to use. A worker is a
+sandboxed python, started the way codejail starts one, running
+sandbox_worker.py: it imports those modules once, then runs each piece of code
+it is sent in a forked child with codejail's resource limits. A worker is
+replaced after `max_executions` executions, or as soon as anything goes wrong
+with one.
+"""
+import json
+import logging
+import os
+import os.path
+import Queue
+import resource
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+from uuid import uuid4
+
+from codejail.jail_code import COMMANDS, LIMITS, is_configured
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# How many seconds to wait for a worker beyond the code's own time limit
+WORKER_TIMEOUT_MARGIN = 5
+
+# How often, in seconds, a thread waiting for an idle worker checks whether it
+# can start one itself, in case a retired worker's replacement failed to start
+ACQUIRE_POLL_INTERVAL = 1
+
+WORKER_PY = os.path.join(os.path.dirname(__file__), "sandbox_worker.py")
+
+
+class SandboxWorkerError(Exception):
+    """
+    Raised when a worker can't run code for reasons that have nothing to do
+    with the code.
+    """
+    pass
+
+
+def set_worker_limits():
+    """
+    The limits every worker runs with: no files. Each execution is further
+    limited by the worker.
+    """
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+
+
+class SandboxWorker(object):
+    """
+    One sandboxed python running sandbox_worker.py in its own jail directory.
+    """
+    def __init__(self, preimported_modules):
+        self.executions = 0
+        self.home = tempfile.mkdtemp(prefix="codejail-worker-")
+        # The sandbox user needs to read the files in the jail directory
+        os.chmod(self.home, 0775)
+        shutil.copy(WORKER_PY, os.path.join(self.home, "jailed_worker"))
+
+        cmd = COMMANDS["python"]["cmdline_start"] + ["jailed_worker"] + list(preimported_modules)
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmd, preexec_fn=set_worker_limits, cwd=self.home, env={},
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+            )
+
+    def execute(self, code, globals_dict, python_path=None, slug=None):
+        """
+        Run `code` in the JSON-safe `globals_dict`, like
+        codejail.safe_exec.safe_exec.
+
+        Returns (error message or None, the resulting globals). Raises
+        SandboxWorkerError if the worker failed.
+        """
+        self.executions += 1
+        exec_dir = tempfile.mkdtemp(dir=self.home)
+        try:
+            os.chmod(exec_dir, 0775)
+            # Like codejail, copy the python path into the directory the code runs in
+            path = []
+            for pydir in python_path or ():
+                pybase = os.path.basename(pydir)
+                shutil.copytree(pydir, os.path.join(exec_dir, pybase))
+                path.append(pybase)
+
+            request = {
+                "id": uuid4().hex,
+                "code": code,
+                "globals": globals_dict,
+                "python_path": path,
+                "dir": exec_dir,
+                "limits": dict(LIMITS),
+            }
+            response = self._send(request)
+        finally:
+            shutil.rmtree(exec_dir, ignore_errors=True)
+
+        if "error" in response:
+            log.debug("Sandboxed code %s failed: %s", slug, response["error"])
+            return "Couldn't execute jailed code: %s" % response["error"], {}
+        return None, response["globals"]
+
+    def _send(self, request):
+        """
+        Send a request to the worker and return its decoded response, which
+        must carry the request's id.
+        """
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+
+            timeout = (LIMITS.get("REALTIME") or LIMITS.get("CPU") or 0) + WORKER_TIMEOUT_MARGIN
+            readable, _, _ = select.select([self.process.stdout], [], [], timeout)
+            if not readable:
+                raise SandboxWorkerError("No response in {0} seconds".format(timeout))
+            response = self.process.stdout.readline()
+            if not response:
+                raise SandboxWorkerError("The worker exited with status {0}".format(self.process.poll()))
+            response = json.loads(response)
+        except (IOError, OSError, ValueError) as err:
+            raise SandboxWorkerError(str(err))
+        if not isinstance(response, dict) or response.get("id") != request["id"]:
+            # Out of step with the worker: the response is to some other request
+            raise SandboxWorkerError("Response to the wrong request")
+        return response
+
+    def close(self):
+        """
+        Stop the worker and remove its jail directory.
+        """
+        try:
+            self.process.stdin.close()
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+        except (IOError, OSError):
+            log.exception("Unable to stop sandbox worker %s", self.process.pid)
+        shutil.rmtree(self.home, ignore_errors=True)
+
+
+class SandboxWorkerPool(object):
+    """
+    At most `size` SandboxWorkers, shared by the threads of a process.
+
+    Workers are started when they are first needed, so that processes forked
+    after the pool is configured don't share them, and are replaced in the
+    background when they are retired.
+    """
+    def __init__(self, size, preimported_modules, max_executions=100):
+        self.size = size
+        self.preimported_modules = preimported_modules
+        self.max_executions = max_executions
+        self._idle = Queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        """
+        Returns an idle worker, starting one if fewer than `size` are running,
+        or waiting for one otherwise.  Raises SafeExecException if a worker
+        can't be started.
+        """
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except Queue.Empty:
+                pass
+            with self._lock:
+                start = self._started < self.size
+                if start:
+                    self._started += 1
+            if start:
+                return self._start()
+            try:
+                return self._idle.get(timeout=ACQUIRE_POLL_INTERVAL)
+            except Queue.Empty:
+                pass
+
+    def _start(self):
+        """
+        Start a worker that has already been counted in `_started`.
+        """
+        try:
+            return SandboxWorker(self.preimported_modules)
+        except Exception as err:
+            log.exception("Unable to start a sandbox worker")
+            with self._lock:
+                self._started -= 1
+            raise SafeExecException("Couldn't start a sandbox worker: {0}".format(err))
+
+    def _retire(self, worker):
+        """
+        Stop `worker` and start its replacement in the background.
+        """
+        worker.close()
+        with self._lock:
+            self._started -= 1
+        threading.Thread(target=self._replace).start()
+
+    def _replace(self):
+        """
+        Start a worker to take the place of a retired one, if it's still needed.
+        """
+        with self._lock:
+            if self._started >= self.size:
+                return
+            self._started += 1
+        try:
+            self._idle.put(self._start())
+        except SafeExecException:
+            # Threads waiting for a worker will try to start one themselves
+            pass
+
+    def execute(self, code, globals_dict, python_path=None, slug=None):
+        """
+        Run `code` in a worker, like codejail.safe_exec.safe_exec: the
+        JSON-safe results are put into `globals_dict`, and SafeExecException
+        is raised if the code failed.
+        """
+        worker = self._acquire()
+        try:
+            emsg, results = worker.execute(code, json_safe(globals_dict), python_path=python_path, slug=slug)
+        except SandboxWorkerError as err:
+            log.warning("Sandbox worker failed running %s: %s", slug, err)
+            self._retire(worker)
+            raise SafeExecException("Couldn't execute jailed code: {0}".format(err))
+        except Exception:
+            self._retire(worker)
+            raise
+
+        if emsg is not None or worker.executions >= self.max_executions:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        globals_dict.update(results)
+        if emsg is not None:
+            raise SafeExecException(emsg)
+
+    def close(self):
+        """
+        Stop the idle workers.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except Queue.Empty:
+                break
+            worker.close()
+            with self._lock:
+                self._started -= 1
+
+
+def create_worker_pool(size, preimported_modules, max_executions=100):
+    """
+    Returns a SandboxWorkerPool with `size` workers, or None if no workers
+    are wanted or codejail has no sandboxed python to run them with.
+    """
+    if not size or not is_configured("python"):
+        return None
+    return SandboxWorkerPool(size, preimported_modules, max_executions)
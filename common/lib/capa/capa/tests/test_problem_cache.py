@@ -0,0 +1,104 @@
+"""
+Tests for reusing parsed problems through capa_problem.PROBLEM_CACHE
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import fs.osfs
+from mock import Mock, patch
+
+from capa.capa_problem import LoncapaProblem, ProblemCache, PROBLEM_CACHE
+from capa.safe_exec import safe_exec
+from . import test_system
+
+PROBLEM_XML = """
+<problem>
+    <script type="loncapa/python">
+answer = 'blue'
+    </script>
+    <p>What color is the sky?</p>
+    <stringresponse answer="$answer">
+        <textline size="20"/>
+    </stringresponse>
+</problem>
+"""
+
+
+INCLUDE_XML = """
+<problem>
+    <include file="question.xml"/>
+</problem>
+"""
+
+
+class ProblemCacheTest(unittest.TestCase):
+    """
+    Tests that problems with the same text and seed share one parse
+    """
+    def setUp(self):
+        PROBLEM_CACHE.clear()
+        self.addCleanup(PROBLEM_CACHE.clear)
+        self.system = test_system()
+
+    def new_problem(self, problem_id='1', seed=723):
+        return LoncapaProblem(PROBLEM_XML, id=problem_id, seed=seed, system=self.system)
+
+    @patch('capa.capa_problem.safe_exec', side_effect=safe_exec)
+    def test_scripts_run_once(self, mock_safe_exec):
+        first = self.new_problem()
+        second = self.new_problem(problem_id='2')
+        self.assertEqual(1, mock_safe_exec.call_count)
+        self.assertEqual(first.context['answer'], second.context['answer'])
+        self.assertEqual(['2_2_1'], second.responders.values()[0].answer_ids)
+
+        self.new_problem(seed=724)
+        self.assertEqual(2, mock_safe_exec.call_count)
+
+    def test_problems_are_isolated(self):
+        first = self.new_problem()
+        first.context['answer'] = 'green'
+        first.tree.find('p').text = 'changed'
+
+        second = self.new_problem()
+        self.assertEqual('blue', second.context['answer'])
+        self.assertEqual('What color is the sky?', second.tree.find('p').text)
+
+    @patch('capa.capa_problem.FILE_VERSIONS_CHECK_INTERVAL', 0)
+    def test_changed_include_is_reparsed(self):
+        course_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, course_dir)
+        question = os.path.join(course_dir, 'question.xml')
+        self.system.filestore = fs.osfs.OSFS(course_dir)
+
+        with open(question, 'w') as question_file:
+            question_file.write('<p>Before</p>')
+        problem = LoncapaProblem(INCLUDE_XML, id='1', seed=723, system=self.system)
+        self.assertEqual('Before', problem.tree.find('p').text)
+
+        # as when an XML course is reloaded in place
+        with open(question, 'w') as question_file:
+            question_file.write('<p>After</p>')
+        mtime = os.path.getmtime(question) + 10
+        os.utime(question, (mtime, mtime))
+        problem = LoncapaProblem(INCLUDE_XML, id='1', seed=723, system=self.system)
+        self.assertEqual('After', problem.tree.find('p').text)
+
+    @patch('capa.capa_problem.time')
+    def test_file_versions_checked_at_most_every_interval(self, mock_time):
+        cache = ProblemCache(10)
+        get_versions = Mock(return_value=[1])
+        mock_time.time.return_value = 1000
+        cache.set('key', None, {}, get_versions)
+        self.assertIsNotNone(cache.get('key'))
+        self.assertIsNotNone(cache.get('key'))
+        self.assertEqual(1, get_versions.call_count)
+
+        # the files aren't looked at again until the interval has passed
+        get_versions.return_value = [2]
+        mock_time.time.return_value = 1005
+        self.assertIsNotNone(cache.get('key'))
+        mock_time.time.return_value = 1010
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(2, get_versions.call_count)
@@ -55,13 +55,13 @@ class MongoContentStore(ContentStore):
                 return StaticContentStream(location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
                                            thumbnail_location=fp.thumbnail_location if hasattr(fp, 'thumbnail_location') else None,
                                            import_path=fp.import_path if hasattr(fp, 'import_path') else None,
-                                           length=fp.length)
+                                           length=fp.length, content_digest=fp.md5)
             else:
                 with self.fs.get(id) as fp:
                     return StaticContent(location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
                                          thumbnail_location=fp.thumbnail_location if hasattr(fp, 'thumbnail_location') else None,
                                          import_path=fp.import_path if hasattr(fp, 'import_path') else None,
-                                         length=fp.length)
+                                         length=fp.length, content_digest=fp.md5)
         except NoFile:
             if throw_on_not_found:
                 raise NotFoundError()
@@ -4,6 +4,7 @@ Adds crowdsourced hinting functionality to lon-capa numerical response problems.
 Currently experimental - not for instructor use, yet.
 """
 
+import hashlib
 import logging
 import json
 import random
@@ -24,6 +25,28 @@ from django.utils.html import escape
 log = logging.getLogger(__name__)
 
 
+def hint_vote_key(answer, hint_pk):
+    """
+    The key of the content counter of the votes for a hint.  Answers can be
+    arbitrarily long, so they are hashed to keep the key within the length of
+    XModuleContentCounter.key.
+    """
+    if isinstance(answer, unicode):
+        answer = answer.encode('utf-8')
+    return u'{0}:{1}'.format(hashlib.md5(answer).hexdigest(), hint_pk)
+
+
+def add_hint_votes(hints, vote_counts):
+    """
+    Add the votes counted by the content counters to `hints`, a dict like
+    CrowdsourceHinterFields.hints.  `vote_counts` maps the hint_vote_key's of
+    hints to their counts.
+    """
+    for answer, answer_hints in hints.iteritems():
+        for hint_pk, hint in answer_hints.iteritems():
+            hint[1] += vote_counts.get(hint_vote_key(answer, hint_pk), 0)
+
+
 class CrowdsourceHinterFields(object):
     """Defines fields for the crowdsource hinter module."""
     has_children = True
@@ -143,6 +166,20 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         """
         return str(answer.values()[0])
 
+    def get_hints(self, fresh=False):
+        """
+        Returns self.hints, with the votes kept by the content counters of the
+        ModuleSystem, if it has them, added in.  Votes are counted there so that
+        concurrent votes don't overwrite each other.
+        - `fresh` is whether the votes must include the latest ones.
+        """
+        counters = self.system.get('content_counters')
+        if counters is None:
+            return self.hints
+        hints = copy.deepcopy(self.hints)
+        add_hint_votes(hints, counters.get_counts(self.location.url(), 'hints', fresh=fresh))
+        return hints
+
     def get_matching_answers(self, answer):
         """
         Look in self.hints, and find all answer keys that are "equal with tolerance"
@@ -205,8 +242,9 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         # Also track the original answer of each hint.
         matching_answers = self.get_matching_answers(answer)
         matching_hints = {}
+        all_hints = self.get_hints()
         for matching_answer in matching_answers:
-            temp_dict = copy.deepcopy(self.hints[matching_answer])
+            temp_dict = copy.deepcopy(all_hints[matching_answer])
             for key, value in temp_dict.items():
                 # Each value now has hint, votes, matching_answer.
                 temp_dict[key] = value + [matching_answer]
@@ -304,15 +342,20 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
             log.exception('Failure in hinter tally_vote: Unable to parse answer: {ans}'.format(ans=ans))
             return {'error': 'Failure in voting!'}
         hint_pk = str(data['hint'])
-        # We use temp_dict because we need to do a direct write for the database to update.
-        temp_dict = self.hints
-        try:
-            temp_dict[ans][hint_pk][1] += 1
-        except KeyError:
-            log.exception('''Failure in hinter tally_vote: User voted for non-existant hint:
-                             Answer={ans} pk={hint_pk}'''.format(ans=ans, hint_pk=hint_pk))
-            return {'error': 'Failure in voting!'}
-        self.hints = temp_dict
+        counters = self.system.get('content_counters')
+        if counters is not None and hint_pk in self.hints.get(ans, {}):
+            counters.increment(self.location.url(), 'hints', hint_vote_key(ans, hint_pk))
+            temp_dict = self.get_hints(fresh=True)
+        else:
+            # We use temp_dict because we need to do a direct write for the database to update.
+            temp_dict = self.hints
+            try:
+                temp_dict[ans][hint_pk][1] += 1
+            except KeyError:
+                log.exception('''Failure in hinter tally_vote: User voted for non-existant hint:
+                                 Answer={ans} pk={hint_pk}'''.format(ans=ans, hint_pk=hint_pk))
+                return {'error': 'Failure in voting!'}
+            self.hints = temp_dict
         # Don't let the user vote again!
         self.user_voted = True
 
@@ -16,12 +16,12 @@ import pymongo
 import sys
 import logging
 import copy
+import threading
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from fs.osfs import OSFS
 from itertools import repeat
 from path import path
-from operator import attrgetter
 from uuid import uuid4
 
 from importlib import import_module
@@ -38,6 +38,9 @@ from xmodule.modulestore.inheritance import own_metadata, INHERITABLE_METADATA,
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, one process may hold the lock for updating a cached metadata inheritance tree
+METADATA_INHERITANCE_LOCK_TIMEOUT = 30
+
 # TODO (cpennington): This code currently operates under the assumption that
 # there is only one revision for each item. Once we start versioning inside the CMS,
 # that assumption will have to change
@@ -145,6 +148,83 @@ class MongoKeyValueStore(KeyValueStore):
 MongoUsage = namedtuple('MongoUsage', 'id, def_id')
 
 
+class CopyOnReadModuleData(dict):
+    """
+    A dict of Location -> module json for a CachingDescriptorSystem, backed
+    by a mapping shared between requests. Each entry is deep copied out of
+    the shared mapping the first time it is read, since loading a module
+    modifies its json.
+    """
+    def __init__(self, shared):
+        super(CopyOnReadModuleData, self).__init__()
+        self._shared = shared
+
+    def _copy_from_shared(self, key):
+        """
+        Copies the entry for key from the shared mapping, if it hasn't been already
+        """
+        if not dict.__contains__(self, key) and key in self._shared:
+            self[key] = copy.deepcopy(self._shared[key])
+
+    def get(self, key, default=None):
+        self._copy_from_shared(key)
+        return dict.get(self, key, default)
+
+    def __getitem__(self, key):
+        self._copy_from_shared(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._shared
+
+
+class CourseDataCache(object):
+    """
+    A thread-safe, least-recently-used cache of the module json of whole
+    courses, shared by all the requests a process serves.
+
+    Each entry is stamped with the version of the course's content it was
+    read at, and is only returned for that version. The cache holds at most
+    max_size module documents in total.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # course key -> (version, module data)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, course_key, version):
+        """
+        Returns the module data cached for course_key at version, or None
+        """
+        with self._lock:
+            entry = self._entries.pop(course_key, None)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                self._size -= len(entry[1])
+                return None
+            # Re-insert it to mark it as the most recently used
+            self._entries[course_key] = entry
+            return entry[1]
+
+    def set(self, course_key, version, module_data):
+        """
+        Caches module_data as the data for course_key at version
+        """
+        if len(module_data) > self.max_size:
+            return
+        with self._lock:
+            entry = self._entries.pop(course_key, None)
+            if entry is not None:
+                self._size -= len(entry[1])
+            self._entries[course_key] = (version, module_data)
+            self._size += len(module_data)
+            while self._size > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem):
     """
     A system that has a cache of module json that it will use to load modules
@@ -258,7 +338,115 @@ def location_to_query(location, wildcard=True):
     return query
 
 
-metadata_cache_key = attrgetter('org', 'course')
+def metadata_cache_key(location):
+    """
+    Returns the key under which the metadata inheritance tree for the
+    course containing location is cached
+    """
+    # The version suffix distinguishes trees with the current structure from
+    # older cached trees
+    return u"{0}/{1}/v3".format(location.org, location.course)
+
+
+def course_version_cache_key(location):
+    """
+    Returns the key under which the version of the content of the course
+    containing location is stored. The version changes on every write to the
+    course, and stamps the course data kept for prefetching.
+    """
+    return u"{0}/{1}/content_version".format(location.org, location.course)
+
+
+def metadata_version_cache_key(location):
+    """
+    Returns the key under which the version of the cached metadata
+    inheritance tree for the course containing location is stored. A process
+    holding a copy of the tree can compare versions to check that it is
+    current without fetching the whole tree.
+    """
+    return metadata_cache_key(location) + u"/version"
+
+
+def metadata_invalidations_cache_key(location):
+    """
+    Returns the key of a counter that is bumped whenever a process recomputes
+    the cached metadata inheritance tree for the course containing location
+    while another process holds the lock to update it in place. The updating
+    process discards its tree if the counter changed while it held the lock.
+    """
+    return metadata_cache_key(location) + u"/invalidations"
+
+
+# The categories of modules that can have children, and so pass metadata down
+# to them. Note this is a bit ugly as when we add new categories of containers,
+# we have to add it here
+METADATA_CONTAINER_CATEGORIES = (
+    'course', 'chapter', 'sequential', 'vertical', 'videosequence',
+    'wrapper', 'problemset', 'conditional', 'randomize'
+)
+
+
+def _collate_inheritance_node(node, revision, result):
+    """
+    Merges the container record `result`, at `revision`, into `node`, the
+    inheritance tree entry for its revision-less url, and returns the node.
+
+    Draft and non-draft records share a node: the draft's metadata and
+    children are the ones passed down, while all_children holds the children
+    of every revision, for the parent index.
+    """
+    children = result.get('definition', {}).get('children', [])
+    if node is None:
+        node = {'is_draft': False, 'metadata': {}, 'children': [], 'all_children': []}
+    # the only revision other than None is the draft
+    if revision is not None or not node['is_draft']:
+        node['is_draft'] = revision is not None
+        # check for presence of metadata key. Note that a given module may not yet be fully formed.
+        # example: update_item -> update_children -> update_metadata sequence on new item create
+        # if we get called here without update_metadata called first then 'metadata' hasn't been set
+        # as we're not fully transactional at the DB layer. Same comment applies to children
+        node['metadata'] = result.get('metadata', {})
+        node['children'] = children
+    for child in children:
+        if child not in node['all_children']:
+            node['all_children'].append(child)
+    return node
+
+
+def _propagate_inherited_metadata(tree, url, inherited):
+    """
+    Recomputes the metadata inherited by the container at `url` and all of
+    its descendents, given the metadata it inherits from its parent
+    (None for the course itself).
+    """
+    node = tree['nodes'][url]
+    if inherited is None:
+        effective = node['metadata']
+    else:
+        effective = copy.deepcopy(inherited)
+        effective.update(node['metadata'])
+        tree['metadata'][url] = effective
+
+    # go through all the children and recurse, but only for containers.
+    # Leaf nodes just inherit our metadata
+    for child in node['children']:
+        if child in tree['nodes']:
+            _propagate_inherited_metadata(tree, child, effective)
+        else:
+            tree['metadata'][child] = effective
+
+
+def _inherited_from_parent(tree, url):
+    """
+    Returns the metadata that the module at `url` inherits from its parent,
+    or None if it isn't reachable from the course.
+    """
+    for parent in tree['parents'].get(url, []):
+        if parent == tree['root']:
+            return tree['nodes'][parent]['metadata']
+        if parent in tree['nodes'] and parent in tree['metadata']:
+            return tree['metadata'][parent]
+    return None
 
 
 class MongoModuleStore(ModuleStoreBase):
@@ -267,10 +455,23 @@ class MongoModuleStore(ModuleStoreBase):
     """
 
     # TODO (cpennington): Enable non-filesystem filestores
+    # Whether whole courses can be prefetched with a single query. See _prefetch_course
+    supports_course_prefetch = True
+
     def __init__(self, host, db, collection, fs_root, render_template,
                  port=27017, default_class=None,
                  error_tracker=null_error_tracker,
-                 user=None, password=None, mongo_options=None, **kwargs):
+                 user=None, password=None, mongo_options=None,
+                 prefetch_courses=False, prefetch_cache_size=50000, **kwargs):
+        """
+        prefetch_courses: if True, loading items with all their descendents
+            (depth=None) reads every module in their course with a single query,
+            rather than one query per level of the tree
+        prefetch_cache_size: the number of module documents from prefetched
+            courses to keep in memory between requests. Kept data is only
+            reused if the metadata_inheritance_cache_subsystem shows that the
+            course hasn't changed since it was read.
+        """
 
         super(MongoModuleStore, self).__init__(**kwargs)
 
@@ -306,81 +507,195 @@ class MongoModuleStore(ModuleStoreBase):
         self.render_template = render_template
         self.ignore_write_events_on_courses = []
 
+        self.prefetch_courses = prefetch_courses and self.supports_course_prefetch
+        self.course_data_cache = None
+        if self.prefetch_courses and prefetch_cache_size:
+            self.course_data_cache = CourseDataCache(prefetch_cache_size)
+
+    @staticmethod
+    def _inheritance_record_filter():
+        """
+        The fields of container records needed to compute the metadata
+        inheritance tree: the Location, children, and inheritable metadata
+        """
+        record_filter = {'_id': 1, 'definition.children': 1}
+
+        # just get the inheritable metadata since that is all we need for the computation
+        # this minimizes both data pushed over the wire
+        for attr in INHERITABLE_METADATA:
+            record_filter['metadata.{0}'.format(attr)] = 1
+        return record_filter
+
     def compute_metadata_inheritance_tree(self, location):
         '''
+        Returns a dict with these keys:
+
+            metadata: a dict mapping location urls to the metadata they inherit
+            parents: a dict mapping location urls to a list of the urls of their parents.
+                Every container in the course is included, even if it has no parents.
+            nodes: a dict mapping the urls of containers to their own inheritable
+                metadata and children, from which the tree can be updated incrementally
+            root: the url of the course, or None
+
+        Draft and non-draft containers are collated, so all urls have no revision.
+
         TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
         '''
 
         # get all collections in the course, this query should not return any leaf nodes
-        # note this is a bit ugly as when we add new categories of containers, we have to add it here
         query = {'_id.org': location.org,
                  '_id.course': location.course,
-                 '_id.category': {'$in': ['course', 'chapter', 'sequential', 'vertical', 'videosequence',
-                                          'wrapper', 'problemset', 'conditional', 'randomize']}
+                 '_id.category': {'$in': list(METADATA_CONTAINER_CATEGORIES)}
                  }
-        # we just want the Location, children, and inheritable metadata
-        record_filter = {'_id': 1, 'definition.children': 1}
-
-        # just get the inheritable metadata since that is all we need for the computation
-        # this minimizes both data pushed over the wire
-        for attr in INHERITABLE_METADATA:
-            record_filter['metadata.{0}'.format(attr)] = 1
 
         # call out to the DB
-        resultset = self.collection.find(query, record_filter)
+        resultset = self.collection.find(query, self._inheritance_record_filter())
 
-        results_by_url = {}
-        root = None
+        tree = {'metadata': {}, 'parents': {}, 'nodes': {}, 'root': None}
 
-        # now go through the results and order them by the location url
+        # now go through the results and collate them by the location url
         for result in resultset:
             location = Location(result['_id'])
             # We need to collate between draft and non-draft
             # i.e. draft verticals can have children which are not in non-draft versions
-            location = location.replace(revision=None)
-            location_url = location.url()
-            if location_url in results_by_url:
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                if 'definition' not in results_by_url[location_url]:
-                    results_by_url[location_url]['definition'] = {}
-                results_by_url[location_url]['definition']['children'] = total_children
-            results_by_url[location.url()] = result
+            location_url = location.replace(revision=None).url()
+            tree['nodes'][location_url] = _collate_inheritance_node(
+                tree['nodes'].get(location_url), location.revision, result
+            )
             if location.category == 'course':
-                root = location.url()
+                tree['root'] = location_url
+
+        # index the parent pointers
+        for location_url, node in tree['nodes'].iteritems():
+            tree['parents'].setdefault(location_url, [])
+            for child in node['all_children']:
+                child_parents = tree['parents'].setdefault(child, [])
+                if location_url not in child_parents:
+                    child_parents.append(location_url)
 
         # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            # check for presence of metadata key. Note that a given module may not yet be fully formed.
-            # example: update_item -> update_children -> update_metadata sequence on new item create
-            # if we get called here without update_metadata called first then 'metadata' hasn't been set
-            # as we're not fully transactional at the DB layer. Same comment applies to below key name
-            # check
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
-
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+        if tree['root'] is not None:
+            _propagate_inherited_metadata(tree, tree['root'], None)
+
+        return tree
+
+    def _update_metadata_inheritance_tree(self, tree, location):
+        '''
+        Updates `tree` for a write to the container at `location`: re-reads
+        just that container's records, re-links its children in the parent
+        index, and recomputes the inherited metadata of its subtree.
+        '''
+        location = Location(location).replace(revision=None)
+        location_url = location.url()
+
+        query = {'_id.org': location.org,
+                 '_id.course': location.course,
+                 '_id.category': location.category,
+                 '_id.name': location.name,
+                 }
+        node = None
+        for result in self.collection.find(query, self._inheritance_record_filter()):
+            node = _collate_inheritance_node(node, Location(result['_id']).revision, result)
+
+        old_node = tree['nodes'].pop(location_url, None)
+        if old_node is not None:
+            for child in old_node['all_children']:
+                child_parents = tree['parents'].get(child, [])
+                if location_url in child_parents:
+                    child_parents.remove(location_url)
+
+        if node is not None:
+            tree['nodes'][location_url] = node
+            tree['parents'].setdefault(location_url, [])
+            for child in node['all_children']:
+                child_parents = tree['parents'].setdefault(child, [])
+                if location_url not in child_parents:
+                    child_parents.append(location_url)
+            if location.category == 'course':
+                tree['root'] = location_url
+        elif tree['root'] == location_url:
+            tree['root'] = None
+
+        if location_url == tree['root']:
+            _propagate_inherited_metadata(tree, location_url, None)
+            return
+
+        inherited = _inherited_from_parent(tree, location_url)
+        if inherited is None:
+            # not reachable from the course, so nothing inherits through it
+            return
+        if node is None:
+            # a deleted container is still listed as a child by its parents,
+            # so it inherits like a leaf
+            tree['metadata'][location_url] = inherited
+        else:
+            _propagate_inherited_metadata(tree, location_url, inherited)
+
+    def _set_cached_metadata_inheritance_tree(self, location, tree):
+        '''
+        Stamps `tree` with a new version, and stores it and its version in
+        the caching subsystem (if any) and the request cache (if any)
+        '''
+        key = metadata_cache_key(location)
+        tree['version'] = uuid4().hex
+
+        # now write out computed tree to caching subsystem (e.g. memcached), if available
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set_many({
+                key: tree,
+                metadata_version_cache_key(location): tree['version'],
+            })
+
+        self._set_request_cached_metadata_inheritance_tree(key, tree)
+
+    def _set_request_cached_metadata_inheritance_tree(self, key, tree):
+        '''
+        Populates the request_cache, if available, with tree
+        '''
+        if self.request_cache is not None:
+            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
+            # defined
+            if 'metadata_inheritance' not in self.request_cache.data:
+                self.request_cache.data['metadata_inheritance'] = {}
+            self.request_cache.data['metadata_inheritance'][key] = tree
+
+    def get_metadata_inheritance_tree_version(self, location):
+        '''
+        Returns the version of the cached metadata inheritance tree for the
+        course containing location, or None if none is cached. The version
+        changes every time the tree does.
+        '''
+        if self.metadata_inheritance_cache_subsystem is None:
+            return None
+        return self.metadata_inheritance_cache_subsystem.get(metadata_version_cache_key(location))
+
+    def _get_shared_cached_metadata_inheritance_tree(self, location):
+        '''
+        Returns the current tree from the caching subsystem (e.g. memcached),
+        bypassing the request cache, or {} if none is cached
+        '''
+        key = metadata_cache_key(location)
+        version_key = metadata_version_cache_key(location)
+        cached = self.metadata_inheritance_cache_subsystem.get_many([key, version_key])
+        tree = cached.get(key, {})
+        # a tree whose version isn't current is stale, e.g. from an interrupted update
+        if tree and tree.get('version') != cached.get(version_key):
+            return {}
+        return tree
+
+    def _invalidate_metadata_inheritance_tree_update(self, location):
+        '''
+        Makes the process holding the lock to update the cached tree in place
+        discard its update, which may not include a write it hasn't seen
+        '''
+        cache = self.metadata_inheritance_cache_subsystem
+        invalidations_key = metadata_invalidations_cache_key(location)
+        cache.add(invalidations_key, 0)
+        try:
+            cache.incr(invalidations_key)
+        except ValueError:
+            # evicted since it was added
+            cache.set(invalidations_key, 1)
 
     def get_cached_metadata_inheritance_tree(self, location, force_refresh=False):
         '''
@@ -396,28 +711,18 @@ class MongoModuleStore(ModuleStoreBase):
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(key, {})
+                tree = self._get_shared_cached_metadata_inheritance_tree(location)
             else:
                 logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
 
-        if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self.compute_metadata_inheritance_tree(location)
-
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(key, tree)
-
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
-        if self.request_cache is not None:
-            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
-            # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][key] = tree
+            if tree:
+                # NOTE: after a memcache hit, the tree still gets put into the request_cache
+                self._set_request_cached_metadata_inheritance_tree(key, tree)
+                return tree
 
+        # if not in subsystem, or we are on force refresh, then we have to compute
+        tree = self.compute_metadata_inheritance_tree(location)
+        self._set_cached_metadata_inheritance_tree(location, tree)
         return tree
 
     def refresh_cached_metadata_inheritance_tree(self, location):
@@ -429,6 +734,60 @@ class MongoModuleStore(ModuleStoreBase):
         if pseudo_course_id not in self.ignore_write_events_on_courses:
             self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
 
+    def update_cached_metadata_inheritance_tree(self, location):
+        """
+        Update the cached metadata inheritance tree for the org/course
+        combination of location after a write to location.
+
+        Only writes to containers affect the tree, and then only the subtree
+        under the container is recomputed. If the cached tree is missing,
+        stale, or being updated by another process, the whole tree is refreshed.
+        """
+        location = Location(location)
+        pseudo_course_id = '/'.join([location.org, location.course])
+        if pseudo_course_id in self.ignore_write_events_on_courses:
+            return
+        if location.category not in METADATA_CONTAINER_CATEGORIES:
+            # leaf metadata isn't passed down, and leaves have no children
+            return
+
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            self.refresh_cached_metadata_inheritance_tree(location)
+            return
+
+        # only one process at a time may update the cached tree in place
+        lock_key = metadata_cache_key(location) + u"/lock"
+        if not cache.add(lock_key, True, METADATA_INHERITANCE_LOCK_TIMEOUT):
+            # the process holding the lock may be updating a tree that doesn't
+            # include this write, so its update mustn't replace this refresh
+            self._invalidate_metadata_inheritance_tree_update(location)
+            self.refresh_cached_metadata_inheritance_tree(location)
+            return
+
+        try:
+            invalidations_key = metadata_invalidations_cache_key(location)
+            invalidations = cache.get(invalidations_key)
+            # the request cache may hold a copy that is out of date, so only
+            # the shared tree is updated
+            tree = self._get_shared_cached_metadata_inheritance_tree(location)
+            if not tree:
+                self.refresh_cached_metadata_inheritance_tree(location)
+                return
+
+            self._update_metadata_inheritance_tree(tree, location)
+            self._set_cached_metadata_inheritance_tree(location, tree)
+
+            if cache.get(invalidations_key) != invalidations:
+                # another process refreshed the tree meanwhile, and its tree may
+                # have just been replaced: make this one stale, so that it is
+                # recomputed when it is next read
+                cache.delete(metadata_version_cache_key(location))
+                if self.request_cache is not None:
+                    self.request_cache.data.get('metadata_inheritance', {}).pop(metadata_cache_key(location), None)
+        finally:
+            cache.delete(lock_key)
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -449,10 +808,20 @@ class MongoModuleStore(ModuleStoreBase):
         for all descendents of items up to the specified depth.
         (0 = no descendents, 1 = children, 2 = grandchildren, etc)
         If depth is None, will load all the children.
-        This will make a number of queries that is linear in the depth.
+        This will make a number of queries that is linear in the depth, unless
+        the whole course can be prefetched.
         """
 
         data = {}
+        if depth is None and self.prefetch_courses:
+            course_data = self._prefetch_course(items)
+            if course_data is not None:
+                data = CopyOnReadModuleData(course_data)
+                for item in items:
+                    self._clean_item_data(item)
+                    data[Location(item['location'])] = item
+                return data
+
         to_process = list(items)
         while to_process and depth is None or depth >= 0:
             children = []
@@ -477,6 +846,57 @@ class MongoModuleStore(ModuleStoreBase):
 
         return data
 
+    def _prefetch_course(self, items):
+        """
+        Returns a dict mapping Location -> item data for every module in the
+        course that contains items, read with a single query or reused from
+        course_data_cache. The data must not be modified. Returns None if the
+        items aren't all from one course.
+        """
+        course_locations = set(
+            (item['_id']['org'], item['_id']['course']) if '_id' in item else
+            (item['location']['org'], item['location']['course'])
+            for item in items
+        )
+        if len(course_locations) != 1:
+            return None
+        org, course = course_locations.pop()
+        course_location = Location('i4x', org, course, None, None)
+
+        version = None
+        if self.course_data_cache is not None and self.metadata_inheritance_cache_subsystem is not None:
+            cache_key = course_version_cache_key(course_location)
+            version = self.metadata_inheritance_cache_subsystem.get(cache_key)
+            if version is None:
+                # start a version, so that the data we read can be stamped with it
+                version = uuid4().hex
+                if not self.metadata_inheritance_cache_subsystem.add(cache_key, version):
+                    version = self.metadata_inheritance_cache_subsystem.get(cache_key)
+            if version is not None:
+                course_data = self.course_data_cache.get(course_location.url(), version)
+                if course_data is not None:
+                    return course_data
+
+        course_data = {}
+        query = {'_id.org': org, '_id.course': course, '_id.revision': None}
+        for item in self.collection.find(query):
+            self._clean_item_data(item)
+            course_data[Location(item['location'])] = item
+
+        if version is not None:
+            self.course_data_cache.set(course_location.url(), version, course_data)
+        return course_data
+
+    def _course_changed(self, location):
+        """
+        Records that the content of the course containing location has
+        changed, so that prefetched data for it isn't reused
+        """
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(
+                course_version_cache_key(Location(location)), uuid4().hex
+            )
+
     def _load_item(self, item, data_cache, apply_cached_metadata=True):
         """
         Load an XModuleDescriptor from item, using the children stored in data_cache
@@ -491,7 +911,7 @@ class MongoModuleStore(ModuleStoreBase):
 
         cached_metadata = {}
         if apply_cached_metadata:
-            cached_metadata = self.get_cached_metadata_inheritance_tree(Location(item['location']))
+            cached_metadata = self.get_cached_metadata_inheritance_tree(Location(item['location']))['metadata']
 
         # TODO (cdodge): When the 'split module store' work has been completed, we should remove
         # the 'metadata_inheritance_tree' parameter
@@ -654,8 +1074,9 @@ class MongoModuleStore(ModuleStoreBase):
                     'children': xmodule.children if xmodule.has_children else []
                 }
             })
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(xmodule.location)
+        self._course_changed(xmodule.location)
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(xmodule.location)
         self.fire_updated_modulestore_signal(get_course_id_no_run(xmodule.location), xmodule.location)
 
     def create_and_save_xmodule(self, location, definition_data=None, metadata=None, system=None):
@@ -745,6 +1166,7 @@ class MongoModuleStore(ModuleStoreBase):
             # from overriding our default value set in the init method.
             safe=self.collection.safe
         )
+        self._course_changed(location)
         if result['n'] == 0:
             raise ItemNotFoundError(location)
 
@@ -772,8 +1194,8 @@ class MongoModuleStore(ModuleStoreBase):
         """
 
         self._update_single_item(location, {'definition.children': children})
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(Location(location))
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(Location(location))
         # fire signal that we've written to DB
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
@@ -802,8 +1224,8 @@ class MongoModuleStore(ModuleStoreBase):
             self.update_metadata(course.location, own_metadata(course))
 
         self._update_single_item(location, {'metadata': metadata})
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(loc)
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(loc)
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
     def delete_item(self, location, delete_all_versions=False):
@@ -828,18 +1250,34 @@ class MongoModuleStore(ModuleStoreBase):
         # Must include this to avoid the django debug toolbar (which defines the deprecated "safe=False")
         # from overriding our default value set in the init method.
         self.collection.remove({'_id': Location(location).dict()}, safe=self.collection.safe)
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(Location(location))
+        self._course_changed(location)
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(Location(location))
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
     def get_parent_locations(self, location, course_id):
         '''Find all locations that are the parents of this location in this
         course.  Needed for path_to_location().
+
+        Parents are looked up in the index that is cached along with the metadata
+        inheritance tree, so this normally doesn't need to go to the DB.
         '''
         location = Location.ensure_fully_specified(location)
+        tree = self.get_cached_metadata_inheritance_tree(location)
+        parents = tree['parents'].get(location.replace(revision=None).url())
+        if parents is not None:
+            return [Location(parent) for parent in parents]
+
+        # The index only covers the children of containers, so fall back to
+        # a query for anything else, collating drafts the way the index does
         items = self.collection.find({'definition.children': location.url()},
                                      {'_id': True})
-        return [i['_id'] for i in items]
+        parents = []
+        for item in items:
+            parent = Location(item['_id']).replace(revision=None)
+            if parent not in parents:
+                parents.append(parent)
+        return parents
 
     def get_modulestore_type(self, course_id):
         """
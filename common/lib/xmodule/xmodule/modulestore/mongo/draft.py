@@ -56,6 +56,8 @@ class DraftModuleStore(MongoModuleStore):
     This module also includes functionality to promote DRAFT modules (and optionally
     their children) to published modules.
     """
+    # Prefetched courses only hold the baseline revisions, not the drafts
+    supports_course_prefetch = False
 
     def get_item(self, location, depth=0):
         """
@@ -151,7 +153,7 @@ class DraftModuleStore(MongoModuleStore):
         except pymongo.errors.DuplicateKeyError:
             raise DuplicateItemError(original['_id'])
 
-        self.refresh_cached_metadata_inheritance_tree(draft_location)
+        self.update_cached_metadata_inheritance_tree(draft_location)
         self.fire_updated_modulestore_signal(get_course_id_no_run(draft_location), draft_location)
 
         return self._load_items([original])[0]
@@ -108,7 +108,8 @@ def path_to_location(modulestore, course_id, location):
             category = path[path_index].category
             if category == 'sequential' or category == 'videosequence':
                 section_desc = modulestore.get_instance(course_id, path[path_index])
-                child_locs = [c.location for c in section_desc.get_children()]
+                # only the child locations are needed, so don't load the children themselves
+                child_locs = [Location(c) for c in section_desc.children]
                 # positions are 1-indexed, and should be strings to be consistent with
                 # url parsing.
                 position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
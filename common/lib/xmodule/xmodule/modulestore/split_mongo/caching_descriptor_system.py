@@ -1,3 +1,4 @@
+import copy
 import sys
 import logging
 from xmodule.mako_module import MakoDescriptorSystem
@@ -47,6 +48,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem):
         self.lazy = lazy
         self.module_data = module_data
         self.default_class = default_class
+        # ids of the definitions of lazily loaded blocks which haven't been fetched yet
+        self.lazy_definitions = set()
+        # definition id -> definition as fetched from the db
+        self.definitions = {}
         # TODO see if self.course_id is needed: is already in course_entry but could be > 1 value
         # Compute inheritance
         modulestore.inherit_settings(
@@ -54,6 +59,20 @@ class CachingDescriptorSystem(MakoDescriptorSystem):
             course_entry.get('blocks', {}).get(course_entry.get('root'))
         )
 
+    def fetch_definition(self, definition_id):
+        """
+        Get a copy of the definition w/ the given id or None if there isn't one. The first fetch
+        of a definition which isn't cached gets every pending lazy definition in the same query.
+        """
+        if definition_id not in self.definitions:
+            pending = self.lazy_definitions
+            pending.add(definition_id)
+            self.lazy_definitions = set()
+            for definition in self.modulestore.definitions.find({'_id': {'$in': list(pending)}}):
+                self.definitions[definition['_id']] = definition
+        # each block gets its own copy as the kvs doesn't copy the values of its fields
+        return copy.deepcopy(self.definitions.get(definition_id))
+
     def _load_item(self, usage_id, course_entry_override=None):
         # TODO ensure all callers of system.load_item pass just the id
         json_data = self.module_data.get(usage_id)
@@ -8,19 +8,26 @@ class DefinitionLazyLoader(object):
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, definition_id):
+    def __init__(self, modulestore, definition_id, system=None):
         """
         Simple placeholder for yet-to-be-fetched data
         :param modulestore: the pymongo db connection with the definitions
         :param definition_locator: the id of the record in the above to fetch
+        :param system: the CachingDescriptorSystem, if any, which batches the fetches of
+        its lazy definitions
         """
         self.modulestore = modulestore
         self.definition_locator = DescriptionLocator(definition_id)
+        self.system = system
+        if system is not None:
+            system.lazy_definitions.add(definition_id)
 
     def fetch(self):
         """
         Fetch the definition. Note, the caller should replace this lazy
         loader pointer with the result so as not to fetch more than once
         """
+        if self.system is not None:
+            return self.system.fetch_definition(self.definition_locator.definition_id)
         return self.modulestore.definitions.find_one(
             {'_id': self.definition_locator.definition_id})
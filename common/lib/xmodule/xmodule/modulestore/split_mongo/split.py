@@ -15,11 +15,15 @@ from xmodule.modulestore import inheritance, ModuleStoreBase
 from ..exceptions import ItemNotFoundError
 from .definition_lazy_loader import DefinitionLazyLoader
 from .caching_descriptor_system import CachingDescriptorSystem
+from .structure_cache import STRUCTURE_CACHE
 from xblock.core import Scope
 from pytz import UTC
 import collections
 
 log = logging.getLogger(__name__)
+
+# the most delta encoded versions to write between full snapshots of a structure
+STRUCTURE_SNAPSHOT_INTERVAL = 20
 #==============================================================================
 # Documentation is at
 # https://edx-wiki.atlassian.net/wiki/display/ENG/Mongostore+Data+Structure
@@ -51,6 +55,8 @@ class SplitMongoModuleStore(ModuleStoreBase):
                  error_tracker=null_error_tracker,
                  user=None, password=None,
                  mongo_options=None,
+                 delta_structures=False,
+                 structure_snapshot_interval=STRUCTURE_SNAPSHOT_INTERVAL,
                  **kwargs):
 
         ModuleStoreBase.__init__(self)
@@ -68,6 +74,13 @@ class SplitMongoModuleStore(ModuleStoreBase):
         self.structures = self.db[collection + '.structures']
         self.definitions = self.db[collection + '.definitions']
 
+        # structures are immutable; so, they're cached for the whole process
+        self.structure_cache = STRUCTURE_CACHE
+        # whether to save new structure versions as the blocks changed from the previous version
+        # w/ a full snapshot every structure_snapshot_interval versions
+        self.delta_structures = delta_structures
+        self.structure_snapshot_interval = structure_snapshot_interval
+
         # Code review question: How should I expire entries?
         # _add_cache could use a lru mechanism to control the cache size?
         self.thread_cache = threading.local()
@@ -118,7 +131,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
 
         if lazy:
             for block in new_module_data.itervalues():
-                block['definition'] = DefinitionLazyLoader(self, block['definition'])
+                block['definition'] = DefinitionLazyLoader(self, block['definition'], system)
         else:
             # Load all descendants by id
             descendent_definitions = self.definitions.find({
@@ -196,8 +209,6 @@ class SplitMongoModuleStore(ModuleStoreBase):
 
         :param course_locator: any subclass of CourseLocator
         '''
-        # NOTE: if and when this uses cache, the update if changed logic will break if the cache
-        # holds the same objects as the descriptors!
         if not course_locator.is_fully_specified():
             raise InsufficientSpecificationError('Not fully specified: %s' % course_locator)
 
@@ -218,7 +229,9 @@ class SplitMongoModuleStore(ModuleStoreBase):
 
         # cast string to ObjectId if necessary
         version_guid = course_locator.as_object_id(version_guid)
-        entry = self.structures.find_one({'_id': version_guid})
+        entry = self._get_structure(version_guid)
+        if entry is None:
+            raise ItemNotFoundError(course_locator)
 
         # b/c more than one course can use same structure, the 'course_id' is not intrinsic to structure
         # and the one assoc'd w/ it by another fetch may not be the one relevant to this fetch; so,
@@ -229,6 +242,157 @@ class SplitMongoModuleStore(ModuleStoreBase):
             entry['branch'] = course_locator.branch
         return entry
 
+    def _get_structure(self, version_guid):
+        '''
+        Get a copy of the structure w/ the given version_guid from the process' structure cache or,
+        failing that, from the db. Returns None if there's no such structure.
+        :param version_guid: an ObjectId
+        '''
+        entry = self.structure_cache.get(self.structures, version_guid)
+        if entry is None:
+            entry = self.structures.find_one({'_id': version_guid})
+            if entry is not None:
+                entry = self._materialize_structure(entry)
+                self.structure_cache.set(self.structures, entry)
+        return entry
+
+    def _get_structures(self, version_guids):
+        '''
+        Like _get_structure but for a list of version_guids. Fetches all the uncached ones
+        in one query.
+        '''
+        entries = []
+        missing = []
+        for version_guid in version_guids:
+            entry = self.structure_cache.get(self.structures, version_guid)
+            if entry is None:
+                missing.append(version_guid)
+            else:
+                entries.append(entry)
+        if missing:
+            for entry in self.structures.find({'_id': {'$in': missing}}):
+                entry = self._materialize_structure(entry)
+                self.structure_cache.set(self.structures, entry)
+                entries.append(entry)
+        return entries
+
+    def _materialize_structure(self, document):
+        '''
+        Reconstruct the full structure from a structures document which may only hold the
+        blocks changed from the previous version (see _insert_structure) by applying the chain
+        of changes since the last full snapshot.
+        '''
+        if 'delta' not in document:
+            return document
+
+        deltas = [document]
+        base = None
+        while base is None:
+            previous_version = deltas[-1]['previous_version']
+            base = self.structure_cache.get(self.structures, previous_version)
+            if base is None:
+                previous = self.structures.find_one({'_id': previous_version})
+                if previous is None:
+                    raise ItemNotFoundError(previous_version)
+                if 'delta' in previous:
+                    deltas.append(previous)
+                else:
+                    base = previous
+
+        blocks = base['blocks']
+        for delta in reversed(deltas):
+            for usage_id in delta['delta']['deleted']:
+                blocks.pop(usage_id, None)
+            blocks.update(delta['blocks'])
+        structure = {key: value for key, value in document.iteritems() if key != 'delta'}
+        structure['blocks'] = blocks
+        return structure
+
+    def _insert_structure(self, new_structure, original_structure, changed_usage_ids):
+        '''
+        Save the new version of the structure (made by _version_structure) and return its id.
+
+        If delta_structures is set, this only saves the blocks which changed from the original
+        structure and the ids of the blocks which were removed, unless the version is due for a
+        full snapshot. Reads reconstruct the full structure (see _materialize_structure).
+
+        :param new_structure: the new version. Gets the new '_id'.
+        :param original_structure: the unmodified version from which new_structure was made
+        :param changed_usage_ids: the usage_ids of the blocks added or changed in new_structure
+        '''
+        if self.delta_structures:
+            previous = self.structures.find_one(
+                {'_id': original_structure['_id']}, fields=['delta.depth']
+            )
+            if previous is not None:
+                depth = previous.get('delta', {}).get('depth', 0) + 1
+                if depth < self.structure_snapshot_interval:
+                    new_blocks = new_structure['blocks']
+                    document = {key: value for key, value in new_structure.iteritems() if key != 'blocks'}
+                    document['blocks'] = {usage_id: new_blocks[usage_id]
+                                          for usage_id in changed_usage_ids if usage_id in new_blocks}
+                    document['delta'] = {
+                        'depth': depth,
+                        'deleted': [usage_id for usage_id in original_structure['blocks']
+                                    if usage_id not in new_blocks],
+                    }
+                    new_structure['_id'] = self.structures.insert(document)
+                    return new_structure['_id']
+        return self.structures.insert(new_structure)
+
+    def compact_structures(self, edited_before=None):
+        '''
+        Rewrite the structure versions saved as changes from their previous versions as full
+        snapshots. Returns the number of versions rewritten.
+
+        :param edited_before: if given, only compact versions edited before this datetime
+        '''
+        query = {'delta': {'$exists': True}}
+        if edited_before is not None:
+            query['edited_on'] = {'$lt': edited_before}
+        compacted = 0
+        # oldest first so that each reconstruction can stop at the previously compacted version
+        for document in self.structures.find(query, fields=['_id']).sort('edited_on', pymongo.ASCENDING):
+            structure = self._get_structure(document['_id'])
+            self.structures.save(structure)
+            compacted += 1
+        return compacted
+
+    def _get_indexes(self, structure):
+        '''
+        Get the StructureIndexes for the blocks of the structure, which must be unmodified
+        since _lookup_course returned it.
+        '''
+        return self.structure_cache.get_indexes(self.structures, structure)
+
+    def _candidate_usage_ids(self, structure, qualifiers):
+        '''
+        Narrow the usage_ids which could match the qualifiers (as per get_items) using the
+        structure's indexes on category, definition, and fields.children. The candidates still
+        have to be checked w/ _block_matches.
+        '''
+        field_qualifiers = qualifiers.get('fields')
+        if not isinstance(field_qualifiers, dict):
+            field_qualifiers = {}
+        candidates = None
+        indexes = None
+        for criteria, index_name in ((qualifiers.get('category'), 'categories'),
+                                     (qualifiers.get('definition'), 'definitions'),
+                                     (field_qualifiers.get('children'), 'parents')):
+            if criteria is None or isinstance(criteria, (dict, list)):
+                # only exact matches on a single value are indexed
+                continue
+            if indexes is None:
+                indexes = self._get_indexes(structure)
+            usage_ids = getattr(indexes, index_name).get(criteria, ())
+            if candidates is None:
+                candidates = set(usage_ids)
+            else:
+                candidates.intersection_update(usage_ids)
+        if candidates is None:
+            return structure['blocks'].keys()
+        return candidates
+
     def get_courses(self, branch='published', qualifiers=None):
         '''
         Returns a list of course descriptors matching any given qualifiers.
@@ -255,7 +419,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
             version_guids.append(version_guid)
             id_version_map[version_guid] = course_entry['_id']
 
-        course_entries = self.structures.find({'_id': {'$in': version_guids}})
+        course_entries = self._get_structures(version_guids)
 
         # get the block for the course element (s/b the root)
         result = []
@@ -346,8 +510,8 @@ class SplitMongoModuleStore(ModuleStoreBase):
             qualifiers = {}
         course = self._lookup_course(locator)
         items = []
-        for usage_id, value in course['blocks'].iteritems():
-            if self._block_matches(value, qualifiers):
+        for usage_id in self._candidate_usage_ids(course, qualifiers):
+            if self._block_matches(course['blocks'][usage_id], qualifiers):
                 items.append(usage_id)
 
         if len(items) > 0:
@@ -379,12 +543,9 @@ class SplitMongoModuleStore(ModuleStoreBase):
         '''
 
         course = self._lookup_course(locator)
-        items = []
-        for parent_id, value in course['blocks'].iteritems():
-            for child_id in value['fields'].get('children', []):
-                if locator.usage_id == child_id:
-                    items.append(BlockUsageLocator(url=locator.as_course_locator(), usage_id=parent_id))
-        return items
+        parent_ids = self._get_indexes(course).parents.get(locator.usage_id, ())
+        return [BlockUsageLocator(url=locator.as_course_locator(), usage_id=parent_id)
+                for parent_id in parent_ids]
 
     def get_course_index_info(self, course_locator):
         """
@@ -667,6 +828,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
         new_structure = self._version_structure(structure, user_id)
         # generate an id
         new_usage_id = self._generate_usage_id(new_structure['blocks'], category)
+        changed_usage_ids = [new_usage_id]
         update_version_keys = ['blocks.{}.edit_info.update_version'.format(new_usage_id)]
         if isinstance(course_or_parent_locator, BlockUsageLocator) and course_or_parent_locator.usage_id is not None:
             parent = new_structure['blocks'][course_or_parent_locator.usage_id]
@@ -674,6 +836,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
             parent['edit_info']['edited_on'] = datetime.datetime.now(UTC)
             parent['edit_info']['edited_by'] = user_id
             parent['edit_info']['previous_version'] = parent['edit_info']['update_version']
+            changed_usage_ids.append(course_or_parent_locator.usage_id)
             update_version_keys.append('blocks.{}.edit_info.update_version'.format(course_or_parent_locator.usage_id))
         block_fields = partitioned_fields.get(Scope.settings, {})
         if Scope.children in partitioned_fields:
@@ -688,7 +851,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
                 'previous_version': None
             }
         }
-        new_id = self.structures.insert(new_structure)
+        new_id = self._insert_structure(new_structure, structure, changed_usage_ids)
         update_version_payload = {key: new_id for key in update_version_keys}
         self.structures.update({'_id': new_id},
             {'$set': update_version_payload})
@@ -793,9 +956,10 @@ class SplitMongoModuleStore(ModuleStoreBase):
         else:
             # just get the draft_version structure
             draft_version = CourseLocator(version_guid=versions_dict[master_branch])
-            draft_structure = self._lookup_course(draft_version)
+            original_structure = self._lookup_course(draft_version)
+            draft_structure = original_structure
             if definition_fields or block_fields:
-                draft_structure = self._version_structure(draft_structure, user_id)
+                draft_structure = self._version_structure(original_structure, user_id)
                 root_block = draft_structure['blocks'][draft_structure['root']]
                 if block_fields is not None:
                     root_block['fields'].update(block_fields)
@@ -811,7 +975,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
                     root_block['edit_info']['edited_by'] = user_id
                     root_block['edit_info']['previous_version'] = root_block['edit_info'].get('update_version')
                 # insert updates the '_id' in draft_structure
-                new_id = self.structures.insert(draft_structure)
+                new_id = self._insert_structure(draft_structure, original_structure, [draft_structure['root']])
                 versions_dict[master_branch] = new_id
                 self.structures.update({'_id': new_id},
                     {'$set': {'blocks.{}.edit_info.update_version'.format(draft_structure['root']): new_id}})
@@ -877,7 +1041,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
                 'edited_by': user_id,
                 'previous_version': block_data['edit_info']['update_version'],
             }
-            new_id = self.structures.insert(new_structure)
+            new_id = self._insert_structure(new_structure, original_structure, [descriptor.location.usage_id])
             self.structures.update(
                 {'_id': new_id},
                 {'$set': {'blocks.{}.edit_info.update_version'.format(descriptor.location.usage_id): new_id}})
@@ -917,7 +1081,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
         changed_blocks = self._persist_subdag(xblock, user_id, new_structure['blocks'])
 
         if changed_blocks:
-            new_id = self.structures.insert(new_structure)
+            new_id = self._insert_structure(new_structure, structure, changed_blocks)
             update_command = {}
             for usage_id in changed_blocks:
                 update_command['blocks.{}.edit_info.update_version'.format(usage_id)] = new_id
@@ -1063,8 +1227,10 @@ class SplitMongoModuleStore(ModuleStoreBase):
         new_structure = self._version_structure(original_structure, user_id)
         new_blocks = new_structure['blocks']
         parents = self.get_parent_locations(usage_locator)
+        changed_usage_ids = []
         update_version_keys = []
         for parent in parents:
+            changed_usage_ids.append(parent.usage_id)
             parent_block = new_blocks[parent.usage_id]
             parent_block['fields']['children'].remove(usage_locator.usage_id)
             parent_block['edit_info']['edited_on'] = datetime.datetime.now(UTC)
@@ -1080,7 +1246,7 @@ class SplitMongoModuleStore(ModuleStoreBase):
             remove_subtree(usage_locator.usage_id)
 
         # update index if appropriate and structures
-        new_id = self.structures.insert(new_structure)
+        new_id = self._insert_structure(new_structure, original_structure, changed_usage_ids)
         if update_version_keys:
             update_version_payload = {key: new_id for key in update_version_keys}
             self.structures.update({'_id': new_id}, {'$set': update_version_payload})
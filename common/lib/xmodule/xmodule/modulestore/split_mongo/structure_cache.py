@@ -0,0 +1,130 @@
+"""
+A process-wide cache of course structures.
+
+A structure document never changes once it has been written under its
+version guid (every edit inserts a new version), so it can be shared by all
+of the threads and modulestores in a process. Structures are kept BSON
+encoded: the cached entries can't be changed by the descriptors built from
+them, and each lookup decodes a fresh copy exactly as a query would have
+returned it. The secondary indexes over a structure's blocks are cached with
+it.
+"""
+import threading
+from collections import OrderedDict
+
+from bson import BSON
+
+# the most BSON encoded bytes STRUCTURE_CACHE holds
+STRUCTURE_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class StructureIndexes(object):
+    """
+    Secondary indexes over the blocks of a structure:
+
+    categories: category -> usage_ids of the blocks of that category
+    parents: usage_id -> usage_ids of the blocks listing it as a child
+    definitions: definition id -> usage_ids of the blocks using it
+
+    These are shared between threads; so, don't modify them.
+    """
+    def __init__(self, blocks):
+        categories = {}
+        parents = {}
+        definitions = {}
+        for usage_id, block in blocks.iteritems():
+            categories.setdefault(block.get('category'), []).append(usage_id)
+            definitions.setdefault(block.get('definition'), []).append(usage_id)
+            for child_id in block.get('fields', {}).get('children', []):
+                parents.setdefault(child_id, []).append(usage_id)
+        self.categories = self._freeze(categories)
+        self.parents = self._freeze(parents)
+        self.definitions = self._freeze(definitions)
+
+    @staticmethod
+    def _freeze(index):
+        """
+        Turn the lists of usage_ids into tuples
+        """
+        return {key: tuple(usage_ids) for key, usage_ids in index.iteritems()}
+
+
+class StructureCache(object):
+    """
+    A thread-safe, least-recently-used cache of structure documents keyed by
+    the structures collection and version guid, holding at most max_size
+    bytes of BSON.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # (collection name, version guid) -> [BSON, StructureIndexes or None]
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, collection, version_guid):
+        """
+        Returns a new copy of the structure cached for version_guid in the
+        collection, or None.
+
+        :param collection: the pymongo structures collection
+        :param version_guid: the structure's ObjectId
+        """
+        key = (collection.full_name, version_guid)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            # Re-insert it to mark it as the most recently used
+            self._entries[key] = entry
+        return entry[0].decode(tz_aware=True)
+
+    def get_indexes(self, collection, structure):
+        """
+        Returns the StructureIndexes for the structure, building them if they
+        aren't cached yet.
+
+        :param collection: the pymongo structures collection
+        :param structure: an unmodified structure document from the collection
+        """
+        key = (collection.full_name, structure['_id'])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None:
+                return entry[1]
+
+        indexes = StructureIndexes(structure['blocks'])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = indexes
+        return indexes
+
+    def set(self, collection, structure):
+        """
+        Caches the structure document, as read from the collection.
+        Structures bigger than the whole cache aren't kept.
+        """
+        key = (collection.full_name, structure['_id'])
+        encoded = BSON.encode(structure)
+        if len(encoded) > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = [encoded, None if previous is None else previous[1]]
+            self._size += len(encoded)
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[0])
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+STRUCTURE_CACHE = StructureCache(STRUCTURE_CACHE_SIZE)
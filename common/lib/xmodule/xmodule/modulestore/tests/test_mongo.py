@@ -4,6 +4,7 @@ from nose.tools import assert_equals, assert_raises, \
     assert_not_equals, assert_false
 # pylint: enable=E0611
 import pymongo
+from mock import Mock, patch
 from uuid import uuid4
 
 from xblock.core import Scope
@@ -12,6 +13,8 @@ from xblock.runtime import KeyValueStore, InvalidScopeError
 from xmodule.tests import DATA_DIR
 from xmodule.modulestore import Location
 from xmodule.modulestore.mongo import MongoModuleStore, MongoKeyValueStore
+from xmodule.modulestore.mongo.base import CopyOnReadModuleData, CourseDataCache, \
+    metadata_cache_key, metadata_invalidations_cache_key
 from xmodule.modulestore.draft import DraftModuleStore
 from xmodule.modulestore.xml_importer import import_from_xml, perform_xlint
 from xmodule.contentstore.mongo import MongoContentStore
@@ -136,6 +139,109 @@ class TestMongoModuleStore(object):
         '''Make sure that path_to_location works'''
         check_path_to_location(self.store)
 
+    def test_get_parent_locations(self):
+        '''Make sure the parent index agrees with querying for parents'''
+        tree = self.store.compute_metadata_inheritance_tree(Location('i4x://edX/toy/course/2012_Fall'))
+        assert_equals(tree['parents']['i4x://edX/toy/course/2012_Fall'], [])
+        assert_equals(tree['parents']['i4x://edX/toy/chapter/Overview'], ['i4x://edX/toy/course/2012_Fall'])
+
+        for child_url in tree['parents']:
+            queried = self.connection[DB][COLLECTION].find({'definition.children': child_url}, {'_id': True})
+            assert_equals(
+                set(Location(item['_id']).replace(revision=None) for item in queried),
+                set(self.store.get_parent_locations(Location(child_url), 'edX/toy/2012_Fall'))
+            )
+
+    def test_get_parent_locations_without_index(self):
+        '''Make sure querying for parents missing from the index gives what the index does'''
+        tree = self.store.compute_metadata_inheritance_tree(Location('i4x://edX/toy/course/2012_Fall'))
+        empty_tree = {'metadata': tree['metadata'], 'parents': {}}
+        for child_url in ['i4x://edX/toy/chapter/Overview', 'i4x://edX/toy/sequential/vertical_sequential']:
+            indexed = self.store.get_parent_locations(Location(child_url), 'edX/toy/2012_Fall')
+            with patch.object(self.store, 'get_cached_metadata_inheritance_tree', return_value=empty_tree):
+                queried = self.store.get_parent_locations(Location(child_url), 'edX/toy/2012_Fall')
+            assert_equals([Location] * len(queried), [type(parent) for parent in queried])
+            assert_equals(indexed, queried)
+
+    def test_incremental_inheritance_tree_update(self):
+        '''Make sure updating the tree for one container gives the same tree as recomputing it'''
+        course_location = Location('i4x://edX/toy/course/2012_Fall')
+        chapter_url = 'i4x://edX/toy/chapter/Overview'
+        expected = self.store.compute_metadata_inheritance_tree(course_location)
+
+        def assert_same_tree(tree):
+            assert_equals(expected['metadata'], tree['metadata'])
+            assert_equals(expected['nodes'], tree['nodes'])
+            assert_equals(expected['root'], tree['root'])
+            assert_equals(
+                dict((url, set(parents)) for url, parents in expected['parents'].iteritems()),
+                dict((url, set(parents)) for url, parents in tree['parents'].iteritems())
+            )
+
+        # an out of date subtree is recomputed
+        tree = self.store.compute_metadata_inheritance_tree(course_location)
+        for child in tree['nodes'][chapter_url]['children']:
+            tree['metadata'][child] = {}
+        self.store._update_metadata_inheritance_tree(tree, Location(chapter_url))
+        assert_same_tree(tree)
+
+        # a missing container is re-linked
+        tree = self.store.compute_metadata_inheritance_tree(course_location)
+        for child in tree['nodes'].pop(chapter_url)['all_children']:
+            tree['parents'][child].remove(chapter_url)
+        self.store._update_metadata_inheritance_tree(tree, Location(chapter_url))
+        assert_same_tree(tree)
+
+        # the whole tree is recomputed from the course
+        tree = self.store.compute_metadata_inheritance_tree(course_location)
+        tree['metadata'] = {}
+        self.store._update_metadata_inheritance_tree(tree, course_location)
+        assert_same_tree(tree)
+
+    def test_prefetch_course(self):
+        '''Make sure loading a whole course with one query gives the same tree as loading it level by level'''
+        prefetch_store = MongoModuleStore(
+            HOST, DB, COLLECTION, FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS, prefetch_courses=True
+        )
+        course_location = Location('i4x://edX/toy/course/2012_Fall')
+
+        def descendents(descriptor):
+            return [
+                (child.location, child._model_data.get('display_name'), descendents(child))
+                for child in descriptor.get_children()
+            ]
+
+        assert_equals(
+            descendents(self.store.get_item(course_location, depth=None)),
+            descendents(prefetch_store.get_item(course_location, depth=None))
+        )
+
+    def test_inheritance_tree_update_races(self):
+        '''Make sure concurrent updates of the cached tree can't leave it out of date'''
+        course_location = Location('i4x://edX/toy/course/2012_Fall')
+        chapter_location = Location('i4x://edX/toy/chapter/Overview')
+        expected = self.store.compute_metadata_inheritance_tree(course_location)
+        cache = DictCache()
+        self.store.metadata_inheritance_cache_subsystem = cache
+        self.store.request_cache = Mock(data={})
+        try:
+            self.store.get_cached_metadata_inheritance_tree(course_location)
+
+            # the update starts from the shared tree, not the request's copy
+            key = metadata_cache_key(course_location)
+            self.store.request_cache.data['metadata_inheritance'][key] = {'stale': True}
+            self.store.update_cached_metadata_inheritance_tree(chapter_location)
+            assert_equals(expected['metadata'], cache.get(key)['metadata'])
+
+            # a process that can't take the lock makes the lock holder discard its update
+            cache.add(key + u"/lock", True)
+            self.store.update_cached_metadata_inheritance_tree(chapter_location)
+            assert_equals(1, cache.get(metadata_invalidations_cache_key(course_location)))
+            assert_equals(expected['metadata'], cache.get(key)['metadata'])
+        finally:
+            self.store.metadata_inheritance_cache_subsystem = None
+            self.store.request_cache = None
+
     def test_xlinter(self):
         '''
         Run through the xlinter, we know the 'toy' course has violations, but the
@@ -248,3 +354,60 @@ class TestMongoKeyValueStore(object):
         for scope in (Scope.preferences, Scope.user_info, Scope.user_state, Scope.parent):
             with assert_raises(InvalidScopeError):
                 self.kvs.delete(KeyValueStore.Key(scope, None, None, 'foo'))
+
+
+class TestCourseDataCache(object):
+    '''Tests for the process-level cache of prefetched courses'''
+    def test_version_mismatch(self):
+        cache = CourseDataCache(10)
+        cache.set('course', 'v1', {'a': 1})
+        assert_equals({'a': 1}, cache.get('course', 'v1'))
+        assert_equals(None, cache.get('course', 'v2'))
+        assert_equals(None, cache.get('course', 'v1'))
+
+    def test_size_bound(self):
+        cache = CourseDataCache(3)
+        cache.set('first', 'v1', {'a': 1, 'b': 2})
+        cache.set('second', 'v1', {'c': 3})
+        cache.get('first', 'v1')
+        cache.set('third', 'v1', {'d': 4})
+        assert_equals(None, cache.get('second', 'v1'))
+        assert_equals({'d': 4}, cache.get('third', 'v1'))
+        cache.set('huge', 'v1', dict((key, key) for key in range(4)))
+        assert_equals(None, cache.get('huge', 'v1'))
+
+    def test_copy_on_read(self):
+        shared = {'a': {'metadata': {}}}
+        data = CopyOnReadModuleData(shared)
+        assert 'a' in data
+        data.get('a')['metadata']['changed'] = True
+        assert_equals({'metadata': {}}, shared['a'])
+        assert_equals(True, data['a']['metadata']['changed'])
+        assert_equals(None, data.get('missing'))
+
+
+class DictCache(dict):
+    '''The parts of the django cache API used for the metadata inheritance tree'''
+    def add(self, key, value, timeout=None):
+        if key in self:
+            return False
+        self[key] = value
+        return True
+
+    def set(self, key, value, timeout=None):
+        self[key] = value
+
+    def set_many(self, data, timeout=None):
+        self.update(data)
+
+    def get_many(self, keys):
+        return dict((key, self[key]) for key in keys if key in self)
+
+    def incr(self, key, delta=1):
+        if key not in self:
+            raise ValueError("Key '%s' not found" % key)
+        self[key] += delta
+        return self[key]
+
+    def delete(self, key):
+        self.pop(key, None)
@@ -13,6 +13,7 @@ from xblock.core import Scope
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.exceptions import InsufficientSpecificationError, ItemNotFoundError, VersionConflictError
 from xmodule.modulestore.locator import CourseLocator, BlockUsageLocator, VersionTree, DescriptionLocator
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache
 from pytz import UTC
 from path import path
 import re
@@ -988,6 +989,114 @@ class TestInheritance(SplitModuleTest):
     # TODO test inheritance after set and delete of attrs
 
 
+class TestStructureCache(SplitModuleTest):
+    """
+    Test the process-wide cache of structures
+    """
+    def test_lookup_is_isolated(self):
+        """
+        Changes to a looked up structure must not show up in later lookups
+        """
+        locator = CourseLocator(version_guid=self.GUID_D1)
+        # pylint: disable=W0212
+        structure = modulestore()._lookup_course(locator)
+        structure['blocks']['head12345']['fields']['display_name'] = 'changed'
+        structure['blocks'].clear()
+        cached = modulestore()._lookup_course(locator)
+        self.assertNotEqual(cached['blocks']['head12345']['fields'].get('display_name'), 'changed')
+        self.assertEqual(cached, modulestore().structures.find_one({'_id': cached['_id']}))
+
+    def test_indexes(self):
+        """
+        The secondary indexes agree w/ a scan of the blocks
+        """
+        # pylint: disable=W0212
+        structure = modulestore()._lookup_course(CourseLocator(version_guid=self.GUID_D1))
+        indexes = modulestore()._get_indexes(structure)
+        self.assertIs(indexes, modulestore()._get_indexes(structure))
+        for usage_id, block in structure['blocks'].iteritems():
+            self.assertIn(usage_id, indexes.categories[block['category']])
+            self.assertIn(usage_id, indexes.definitions[block['definition']])
+            for child_id in block['fields'].get('children', []):
+                self.assertIn(usage_id, indexes.parents[child_id])
+        self.assertEqual(
+            sum(len(usage_ids) for usage_ids in indexes.categories.itervalues()),
+            len(structure['blocks'])
+        )
+
+    def test_batched_definitions(self):
+        """
+        Touching one lazy definition fetches all of the pending ones
+        """
+        # pylint: disable=W0212
+        modulestore()._clear_cache()
+        locator = BlockUsageLocator(course_id='GreekHero', usage_id='head12345', branch='draft')
+        course = modulestore().get_item(locator, depth=None)
+        system = course.system
+        self.assertNotIn('chapter12345_2', system.definitions)
+
+        chapter = system.load_item('chapter1')
+        self.assertIsNotNone(chapter.system.fetch_definition('chapter12345_1'))
+        self.assertEqual(system.lazy_definitions, set())
+        self.assertIn('chapter12345_2', system.definitions)
+        self.assertIn('head12345_12', system.definitions)
+
+    def test_delta_structures(self):
+        """
+        Versions saved as deltas read back as full structures and compact to snapshots
+        """
+        # pylint: disable=W0212
+        store = modulestore()
+        store.delta_structures = True
+        try:
+            course = store.create_course('testx', 'delta course', 'test_delta')
+            locator = BlockUsageLocator(
+                course_id=course.location.course_id, usage_id=course.location.usage_id, branch='draft'
+            )
+            for index in range(3):
+                chapter = store.create_item(
+                    locator, 'chapter', 'test_delta', fields={'display_name': 'chapter {}'.format(index)}
+                )
+            version_guid = chapter.location.as_object_id(chapter.location.version_guid)
+            document = store.structures.find_one({'_id': version_guid})
+            self.assertEqual(document['delta']['depth'], 3)
+            self.assertEqual(set(document['blocks']), set([chapter.location.usage_id, course.location.usage_id]))
+
+            store.structure_cache.clear()
+            structure = store._lookup_course(chapter.location)
+            self.assertEqual(len(structure['blocks']), 4)
+            course = store.get_course(locator.as_course_locator())
+            self.assertEqual(len(course.children), 3)
+
+            self.assertEqual(store.compact_structures(), 3)
+            document = store.structures.find_one({'_id': version_guid})
+            self.assertNotIn('delta', document)
+            self.assertEqual(document['blocks'], structure['blocks'])
+        finally:
+            store.delta_structures = False
+
+    def test_eviction(self):
+        """
+        The cache holds at most max_size bytes
+        """
+        structures = modulestore().structures
+        cache = StructureCache(1)
+        entry = structures.find_one()
+        cache.set(structures, entry)
+        self.assertIsNone(cache.get(structures, entry['_id']))
+
+        cache.max_size = 1024 * 1024
+        entries = list(structures.find())
+        for entry in entries:
+            cache.set(structures, entry)
+        for entry in entries:
+            self.assertEqual(cache.get(structures, entry['_id']), entry)
+        cache.max_size = cache._size - 1  # pylint: disable=W0212
+        cache.set(structures, entries[-1])
+        self.assertIsNone(cache.get(structures, entries[0]['_id']))
+        self.assertEqual(cache.get(structures, entries[-1]['_id']), entries[-1])
+
+
 #===========================================
 # This mocks the django.modulestore() function and is intended purely to disentangle
 # the tests from django
@@ -1,4 +1,6 @@
 import os.path
+import shutil
+import tempfile
 
 from nose.tools import assert_raises, assert_equals  # pylint: disable=E0611
 
@@ -42,3 +44,30 @@ class TestXMLModuleStore(object):
         location = CourseDescriptor.id_to_location("edX/toy/2012_Fall")
         errors = modulestore.get_item_errors(location)
         assert errors == []
+
+    def test_snapshot_roundtrip(self):
+        snapshot_dir = tempfile.mkdtemp()
+        try:
+            loaded = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], snapshot_dir=snapshot_dir)
+            assert_equals(2, len(os.listdir(snapshot_dir)))
+
+            restored = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], snapshot_dir=snapshot_dir)
+            assert_equals(
+                sorted(course.id for course in loaded.get_courses()),
+                sorted(course.id for course in restored.get_courses())
+            )
+            for course_id, modules in loaded.modules.iteritems():
+                assert_equals(set(modules), set(restored.modules[course_id]))
+                for location, descriptor in modules.iteritems():
+                    assert_equals(descriptor._model_data, restored.modules[course_id][location]._model_data)
+
+            check_path_to_location(restored)
+        finally:
+            shutil.rmtree(snapshot_dir)
+
+    def test_parallel_load(self):
+        serial = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'])
+        parallel = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], processes=2)
+        for course_id, modules in serial.modules.iteritems():
+            assert_equals(set(modules), set(parallel.modules[course_id]))
+        check_path_to_location(parallel)
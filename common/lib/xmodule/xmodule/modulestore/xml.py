@@ -1,6 +1,8 @@
+import cPickle
 import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import re
 import sys
@@ -32,6 +34,13 @@ etree.set_default_parser(edx_xml_parser)
 
 log = logging.getLogger(__name__)
 
+# Bump this when a change to course loading would make existing course snapshots stale
+COURSE_SNAPSHOT_VERSION = 1
+
+# Course directories that don't affect the loaded descriptors, and so aren't
+# part of a course's content hash
+SNAPSHOT_IGNORED_DIRS = ('static', '.git')
+
 
 # VS[compat]
 # TODO (cpennington): Remove this once all fall 2012 courses have been imported
@@ -253,11 +262,31 @@ class ParentTracker(object):
         return list(self._parents[child])
 
 
+def _snapshot_course(args):
+    """
+    Loads one course into a new XMLModuleStore and returns its snapshot, or
+    None if it can't be snapshotted. Run in the worker processes of
+    XMLModuleStore's process pool.
+
+    args: a tuple (data_dir, course_dir, default_class, load_error_modules)
+    """
+    data_dir, course_dir, default_class, load_error_modules = args
+    try:
+        store = XMLModuleStore(
+            data_dir, default_class=default_class, course_dirs=[course_dir], load_error_modules=load_error_modules
+        )
+        return store.course_snapshot(course_dir)
+    except Exception:
+        log.exception("Unable to load course '%s' in a worker process", course_dir)
+        return None
+
+
 class XMLModuleStore(ModuleStoreBase):
     """
     An XML backed ModuleStore
     """
-    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True, **kwargs):
+    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True,
+                 processes=None, snapshot_dir=None, **kwargs):
         """
         Initialize an XMLModuleStore from data_dir
 
@@ -268,6 +297,15 @@ class XMLModuleStore(ModuleStoreBase):
 
         course_dirs: If specified, the list of course_dirs to load. Otherwise,
             load all course dirs
+
+        processes: If more than 1, courses are parsed in a pool of this many
+            processes, one course per process, and the loaded descriptors are
+            sent back as snapshots (see course_snapshot)
+
+        snapshot_dir: If specified, a directory to keep course snapshots in.
+            Each snapshot is keyed by a hash of the course's files, so
+            unchanged courses are loaded from their snapshot rather than by
+            parsing their xml
         """
         super(XMLModuleStore, self).__init__(**kwargs)
 
@@ -275,8 +313,11 @@ class XMLModuleStore(ModuleStoreBase):
         self.modules = defaultdict(dict)  # course_id -> dict(location -> XModuleDescriptor)
         self.courses = {}  # course_dir -> XModuleDescriptor for the course
         self.errored_courses = {}  # course_dir -> errorlog, for dirs that failed to load
+        self._content_hashes = {}  # course_dir -> hash of the course's files, when snapshots are used
 
         self.load_error_modules = load_error_modules
+        self.snapshot_dir = path(snapshot_dir) if snapshot_dir is not None else None
+        self._default_class_name = default_class
 
         if default_class is None:
             self.default_class = None
@@ -295,12 +336,50 @@ class XMLModuleStore(ModuleStoreBase):
         if course_dirs is None:
             course_dirs = sorted([d for d in os.listdir(self.data_dir) if
                                   os.path.exists(self.data_dir / d / "course.xml")])
+
+        snapshots = {}
+        if self.snapshot_dir is not None:
+            for course_dir in course_dirs:
+                snapshots[course_dir] = self._read_snapshot(course_dir)
+
+        if processes is not None and processes > 1:
+            unloaded = [course_dir for course_dir in course_dirs if snapshots.get(course_dir) is None]
+            if len(unloaded) > 1:
+                snapshots.update(self._snapshot_courses_in_parallel(unloaded, processes))
+
         for course_dir in course_dirs:
-            self.try_load_course(course_dir)
+            self.try_load_course(course_dir, snapshots.get(course_dir))
 
-    def try_load_course(self, course_dir):
+    def _snapshot_courses_in_parallel(self, course_dirs, processes):
+        """
+        Loads each of course_dirs in a pool of worker processes, and returns a
+        dict of course_dir -> snapshot for the courses that loaded.
+        """
+        pool = multiprocessing.Pool(min(processes, len(course_dirs)))
+        try:
+            results = pool.map(
+                _snapshot_course,
+                [(self.data_dir, course_dir, self._default_class_name, self.load_error_modules)
+                 for course_dir in course_dirs],
+                chunksize=1
+            )
+        finally:
+            pool.close()
+            pool.join()
+
+        snapshots = {}
+        for course_dir, snapshot in zip(course_dirs, results):
+            if snapshot is not None:
+                snapshots[course_dir] = snapshot
+                self._write_snapshot(course_dir, snapshot)
+        return snapshots
+
+    def try_load_course(self, course_dir, snapshot=None):
         '''
         Load a course, keeping track of errors as we go along.
+
+        snapshot: if specified, the course_snapshot to load the course from.
+            If that fails, the course is loaded from its xml.
         '''
         # Special-case code here, since we don't have a location for the
         # course before it loads.
@@ -308,21 +387,176 @@ class XMLModuleStore(ModuleStoreBase):
         # place after the course loads and we have its location
         errorlog = make_error_tracker()
         course_descriptor = None
-        try:
-            course_descriptor = self.load_course(course_dir, errorlog.tracker)
-        except Exception as e:
-            msg = "ERROR: Failed to load course '{0}': {1}".format(course_dir, str(e))
-            log.exception(msg)
-            errorlog.tracker(msg)
+        if snapshot is not None:
+            try:
+                course_descriptor = self.load_course_snapshot(course_dir, snapshot, errorlog)
+            except Exception:
+                log.exception("Unable to load course '%s' from its snapshot", course_dir)
+                errorlog = make_error_tracker()
+
+        loaded_from_xml = course_descriptor is None
+        if loaded_from_xml:
+            try:
+                course_descriptor = self.load_course(course_dir, errorlog.tracker)
+            except Exception as e:
+                msg = "ERROR: Failed to load course '{0}': {1}".format(course_dir, str(e))
+                log.exception(msg)
+                errorlog.tracker(msg)
 
         if course_descriptor is not None and not isinstance(course_descriptor, ErrorDescriptor):
             self.courses[course_dir] = course_descriptor
             self._location_errors[course_descriptor.location] = errorlog
             self.parent_trackers[course_descriptor.id].make_known(course_descriptor.location)
+            if loaded_from_xml and self.snapshot_dir is not None:
+                self._write_snapshot(course_dir, self.course_snapshot(course_dir))
         else:
             # Didn't load course.  Instead, save the errors elsewhere.
             self.errored_courses[course_dir] = errorlog
 
+    def course_snapshot(self, course_dir):
+        """
+        Returns a pickled snapshot of the descriptors loaded for course_dir,
+        from which load_course_snapshot can recreate them without parsing the
+        course's xml. Returns None if the course didn't load or can't be pickled.
+        """
+        course_descriptor = self.courses.get(course_dir)
+        if course_descriptor is None:
+            return None
+
+        course_id = course_descriptor.id
+        modules = []
+        for descriptor in self.modules[course_id].itervalues():
+            if not isinstance(descriptor._model_data, dict):
+                return None
+            modules.append({
+                'class': (descriptor.__class__.__module__, descriptor.__class__.__name__),
+                'model_data': descriptor._model_data,
+                'inherited_metadata': getattr(descriptor, '_inherited_metadata', None),
+                'inheritable_metadata': getattr(descriptor, '_inheritable_metadata', None),
+                'data_dir': getattr(descriptor, 'data_dir', None),
+            })
+
+        snapshot = {
+            'version': COURSE_SNAPSHOT_VERSION,
+            'course_id': course_id,
+            'course_location': course_descriptor.location,
+            'policy': course_descriptor.system.policy,
+            'modules': modules,
+            'parents': self.parent_trackers[course_id]._parents,
+            'errors': self._location_errors[course_descriptor.location].errors,
+        }
+        try:
+            return cPickle.dumps(snapshot, cPickle.HIGHEST_PROTOCOL)
+        except (cPickle.PicklingError, TypeError) as err:
+            log.warning("Unable to snapshot course '%s': %s", course_dir, err)
+            return None
+
+    def load_course_snapshot(self, course_dir, snapshot, errorlog):
+        """
+        Loads the descriptors for course_dir from a course_snapshot into this
+        module store, and returns the course descriptor.
+
+        errorlog: the ErrorLog to restore the course's load-time errors into
+        """
+        snapshot = cPickle.loads(snapshot)
+        if snapshot['version'] != COURSE_SNAPSHOT_VERSION:
+            raise ValueError("Course snapshot version {0} is out of date".format(snapshot['version']))
+
+        course_id = snapshot['course_id']
+        errorlog.errors.extend(snapshot['errors'])
+        system = ImportSystem(
+            self,
+            course_id,
+            course_dir,
+            snapshot['policy'],
+            errorlog.tracker,
+            self.parent_trackers[course_id],
+            self.load_error_modules,
+        )
+
+        # only add the descriptors to the store once they've all been created
+        modules = {}
+        for module in snapshot['modules']:
+            module_path, class_name = module['class']
+            class_ = getattr(import_module(module_path), class_name)
+            descriptor = class_(system, module['model_data'])
+            if module['inherited_metadata'] is not None:
+                descriptor._inherited_metadata = module['inherited_metadata']
+            if module['inheritable_metadata'] is not None:
+                descriptor._inheritable_metadata = module['inheritable_metadata']
+            if module['data_dir'] is not None:
+                descriptor.data_dir = module['data_dir']
+            modules[descriptor.location] = descriptor
+
+        course_descriptor = modules[snapshot['course_location']]
+        self.modules[course_id].update(modules)
+        self.parent_trackers[course_id]._parents.update(snapshot['parents'])
+        return course_descriptor
+
+    def _content_hash(self, course_dir):
+        """
+        Returns a hash of the names and contents of the files in course_dir
+        that course loading reads
+        """
+        if course_dir not in self._content_hashes:
+            content_hash = hashlib.sha1()
+            content_hash.update(str(COURSE_SNAPSHOT_VERSION))
+            content_hash.update(repr((self._default_class_name, self.load_error_modules)))
+            course_path = self.data_dir / course_dir
+            for dirpath, dirnames, filenames in os.walk(course_path):
+                if dirpath == course_path:
+                    dirnames[:] = [name for name in dirnames if name not in SNAPSHOT_IGNORED_DIRS]
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    filepath = os.path.join(dirpath, filename)
+                    content_hash.update(os.path.relpath(filepath, course_path))
+                    with open(filepath, 'rb') as content_file:
+                        for chunk in iter(lambda: content_file.read(65536), ''):
+                            content_hash.update(chunk)
+            self._content_hashes[course_dir] = content_hash.hexdigest()
+        return self._content_hashes[course_dir]
+
+    def _snapshot_path(self, course_dir):
+        """
+        The path of the snapshot of the current contents of course_dir
+        """
+        return self.snapshot_dir / '{0}.{1}.pickle'.format(course_dir, self._content_hash(course_dir))
+
+    def _read_snapshot(self, course_dir):
+        """
+        Returns the stored snapshot of the current contents of course_dir, or
+        None if there isn't one
+        """
+        try:
+            with open(self._snapshot_path(course_dir), 'rb') as snapshot_file:
+                return snapshot_file.read()
+        except (IOError, OSError):
+            return None
+
+    def _write_snapshot(self, course_dir, snapshot):
+        """
+        Stores snapshot as the snapshot of the current contents of
+        course_dir, replacing any older snapshots of it
+        """
+        if snapshot is None or self.snapshot_dir is None:
+            return
+
+        try:
+            if not os.path.isdir(self.snapshot_dir):
+                os.makedirs(self.snapshot_dir)
+            snapshot_path = self._snapshot_path(course_dir)
+            old_snapshot = re.compile(r'^{0}\.[0-9a-f]{{40}}\.pickle$'.format(re.escape(course_dir)))
+            for filename in os.listdir(self.snapshot_dir):
+                if old_snapshot.match(filename):
+                    os.remove(self.snapshot_dir / filename)
+            # write and rename, so other processes never read a partial snapshot
+            temp_path = '{0}.{1}.tmp'.format(snapshot_path, os.getpid())
+            with open(temp_path, 'wb') as snapshot_file:
+                snapshot_file.write(snapshot)
+            os.rename(temp_path, snapshot_path)
+        except (IOError, OSError):
+            log.exception("Unable to write the snapshot of course '%s'", course_dir)
+
     def __unicode__(self):
         '''
         String representation - for debugging
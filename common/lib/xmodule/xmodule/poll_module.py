@@ -57,39 +57,66 @@ class PollModule(PollFields, XModule):
         Returns:
             json string
         """
-        if dispatch in self.poll_answers and not self.voted:
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[dispatch] += 1
-            self.poll_answers = temp_poll_answers
+        if dispatch in self.get_poll_answers() and not self.voted:
+            self.add_vote(dispatch, 1)
 
             self.voted = True
             self.poll_answer = dispatch
-            return json.dumps({'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values()),
+            poll_answers = self.get_poll_answers(fresh=True)
+            return json.dumps({'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values()),
                                'callback': {'objectName': 'Conditional'}
                                })
         elif dispatch == 'get_state':
+            poll_answers = self.get_poll_answers()
             return json.dumps({'poll_answer': self.poll_answer,
-                               'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values())
+                               'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values())
                                })
         elif dispatch == 'reset_poll' and self.voted and \
                 self.descriptor.xml_attributes.get('reset', 'True').lower() != 'false':
             self.voted = False
-
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[self.poll_answer] -= 1
-            self.poll_answers = temp_poll_answers
-
+            self.add_vote(self.poll_answer, -1)
             self.poll_answer = ''
             return json.dumps({'status': 'success'})
         else:  # return error message
             return json.dumps({'error': 'Unknown Command!'})
 
+    def get_poll_answers(self, fresh=False):
+        """Count the votes for each answer.
+
+        Votes are added to the content_counters of the ModuleSystem when it
+        has them, so that concurrent votes don't overwrite each other, and
+        to the poll_answers field otherwise.
+
+        Args:
+            fresh: whether the counts must include the latest votes.
+
+        Returns:
+            dict - the number of votes for each answer id.
+        """
+        poll_answers = dict((answer['id'], 0) for answer in self.answers)
+        poll_answers.update(self.poll_answers or {})
+        counters = self.system.get('content_counters')
+        if counters is not None:
+            counts = counters.get_counts(self.location.url(), 'poll_answers', fresh=fresh)
+            for answer_id, count in counts.iteritems():
+                if answer_id in poll_answers:
+                    poll_answers[answer_id] += count
+        return poll_answers
+
+    def add_vote(self, answer_id, amount):
+        """Add `amount` votes to the answer `answer_id`."""
+        counters = self.system.get('content_counters')
+        if counters is not None:
+            counters.increment(self.location.url(), 'poll_answers', answer_id, amount)
+        else:
+            # FIXME: fix this, when xblock will support mutable types.
+            # Now we use this hack.
+            temp_poll_answers = self.poll_answers or {}
+            temp_poll_answers[answer_id] = temp_poll_answers.get(answer_id, 0) + amount
+            self.poll_answers = temp_poll_answers
+
     def get_html(self):
         """Renders parameters to template."""
         params = {
@@ -107,31 +134,17 @@ class PollModule(PollFields, XModule):
         Returns:
             string - Serialize json.
         """
-        # FIXME: hack for resolving caching `default={}` during definition
-        # poll_answers field
-        if self.poll_answers is None:
-            self.poll_answers = {}
-
         answers_to_json = OrderedDict()
-
-        # FIXME: fix this, when xblock support mutable types.
-        # Now we use this hack.
-        temp_poll_answers = self.poll_answers
-
-         # Fill self.poll_answers, prepare data for template context.
         for answer in self.answers:
-            # Set default count for answer = 0.
-            if answer['id'] not in temp_poll_answers:
-                temp_poll_answers[answer['id']] = 0
             answers_to_json[answer['id']] = cgi.escape(answer['text'])
-        self.poll_answers = temp_poll_answers
+        poll_answers = self.get_poll_answers() if self.voted else {}
 
         return json.dumps({'answers': answers_to_json,
             'question': cgi.escape(self.question),
             # to show answered poll after reload:
             'poll_answer': self.poll_answer,
-            'poll_answers': self.poll_answers if self.voted else {},
-            'total': sum(self.poll_answers.values()) if self.voted else 0,
+            'poll_answers': poll_answers,
+            'total': sum(poll_answers.values()),
             'reset': str(self.descriptor.xml_attributes.get('reset', 'true')).lower()})
 
 
@@ -67,8 +67,30 @@ class SequenceModule(SequenceFields, XModule):
         if dispatch == 'goto_position':
             self.position = int(data['position'])
             return json.dumps({'success': True})
+        elif dispatch == 'render_position':
+            # the content of a tab which wasn't rendered with the sequence (see render)
+            display_items = self.get_display_items()
+            position = int(data['position'])
+            if not 1 <= position <= len(display_items):
+                raise NotFoundError('Position {0} is not in this sequence'.format(position))
+            child = display_items[position - 1]
+            progress = child.get_progress()
+            return json.dumps({
+                'success': True,
+                'html': child.get_html(),
+                'progress_status': Progress.to_js_status_str(progress),
+                'progress_detail': Progress.to_js_detail_str(progress),
+            })
         raise NotFoundError('Unexpected dispatch type')
 
+    @property
+    def lazy_rendering(self):
+        '''
+        Whether render should only render the content of the current position. The other
+        positions are fetched w/ the 'render_position' ajax dispatch when the user switches to them.
+        '''
+        return bool(self.system.get('lazy_sequence_rendering'))
+
     def render(self):
         # If we're rendering this sequence, but no position is set yet,
         # default the position to the first element
@@ -79,20 +101,23 @@ class SequenceModule(SequenceFields, XModule):
             return
         ## Returns a set of all types of all sub-children
         contents = []
-        for child in self.get_display_items():
-            progress = child.get_progress()
-            childinfo = {
-                'content': child.get_html(),
-                'title': "\n".join(
-                    grand_child.display_name
-                    for grand_child in child.get_children()
-                    if grand_child.display_name is not None
-                ),
-                'progress_status': Progress.to_js_status_str(progress),
-                'progress_detail': Progress.to_js_detail_str(progress),
-                'type': child.get_icon_class(),
-                'id': child.id,
-            }
+        for position, child in enumerate(self.get_display_items(), start=1):
+            if self.lazy_rendering and position != self.position:
+                childinfo = self._lazy_childinfo(child)
+            else:
+                progress = child.get_progress()
+                childinfo = {
+                    'content': child.get_html(),
+                    'title': "\n".join(
+                        grand_child.display_name
+                        for grand_child in child.get_children()
+                        if grand_child.display_name is not None
+                    ),
+                    'progress_status': Progress.to_js_status_str(progress),
+                    'progress_detail': Progress.to_js_detail_str(progress),
+                    'type': child.get_icon_class(),
+                    'id': child.id,
+                }
             if childinfo['title'] == '':
                 childinfo['title'] = child.display_name_with_default
             contents.append(childinfo)
@@ -107,14 +132,48 @@ class SequenceModule(SequenceFields, XModule):
         self.content = self.system.render_template('seq_module.html', params)
         self.rendered = True
 
+    def _lazy_childinfo(self, child):
+        '''
+        The tab info for a child whose content isn't rendered yet, computed from the descriptors
+        of its children and the stored scores (if the system provides them) rather than from
+        module instances of its children.
+        '''
+        grand_children = child.descriptor.get_children() if child.has_children else []
+        get_stored_progress = self.system.get('get_stored_progress')
+        progress = get_stored_progress(child.descriptor) if get_stored_progress else None
+        if grand_children:
+            icon_class = _priority_icon_class(
+                getattr(grand_child.module_class, 'icon_class', 'other') for grand_child in grand_children
+            )
+        else:
+            icon_class = child.get_icon_class()
+        return {
+            'content': None,
+            'title': "\n".join(
+                grand_child.display_name
+                for grand_child in grand_children
+                if grand_child.display_name is not None
+            ),
+            'progress_status': Progress.to_js_status_str(progress),
+            'progress_detail': Progress.to_js_detail_str(progress),
+            'type': icon_class,
+            'id': child.id,
+        }
+
     def get_icon_class(self):
-        child_classes = set(child.get_icon_class()
-                            for child in self.get_children())
-        new_class = 'other'
-        for c in class_priority:
-            if c in child_classes:
-                new_class = c
-        return new_class
+        return _priority_icon_class(child.get_icon_class() for child in self.get_children())
+
+
+def _priority_icon_class(child_classes):
+    '''
+    The icon class for a container of children w/ the given icon classes
+    '''
+    child_classes = set(child_classes)
+    new_class = 'other'
+    for c in class_priority:
+        if c in child_classes:
+            new_class = c
+    return new_class
 
 
 class SequenceDescriptor(SequenceFields, MakoModuleDescriptor, XmlDescriptor):
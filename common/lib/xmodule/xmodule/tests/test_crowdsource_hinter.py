@@ -6,7 +6,7 @@ from mock import Mock, MagicMock
 import unittest
 import copy
 
-from xmodule.crowdsource_hinter import CrowdsourceHinterModule
+from xmodule.crowdsource_hinter import CrowdsourceHinterModule, add_hint_votes, hint_vote_key
 from xmodule.vertical_module import VerticalModule, VerticalDescriptor
 
 from . import get_test_system
@@ -462,6 +462,19 @@ class CrowdsourceHinterTest(unittest.TestCase):
         self.assertTrue(['Best hint', 41] in hint_and_votes)
         self.assertTrue(len(hint_and_votes) == 1)
 
+    def test_hint_votes_for_long_answers(self):
+        """
+        Votes counted by the content counters are keyed by a hash of the answer,
+        so answers longer than a counter key can hold are still counted.
+        """
+        answer = u'x' * 1000
+        hints = {answer: {'0': ['Best hint', 40]}, '24.0': {'0': ['Another hint', 3]}}
+        key = hint_vote_key(answer, '0')
+        self.assertTrue(len(key) <= 255)
+        add_hint_votes(hints, {key: 2})
+        self.assertEqual(hints[answer]['0'][1], 42)
+        self.assertEqual(hints['24.0']['0'][1], 3)
+
     def test_submithint_nopermission(self):
         """
         A user tries to submit a hint, but he has already voted.
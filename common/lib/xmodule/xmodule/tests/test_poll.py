@@ -1,9 +1,24 @@
 # -*- coding: utf-8 -*-
 """Test for Poll Xmodule functional logic."""
+from collections import defaultdict
+
+from xmodule.modulestore import Location
 from xmodule.poll_module import PollDescriptor
 from . import LogicTest
 
 
+class FakeContentCounters(object):
+    """Keeps content counters in memory."""
+    def __init__(self):
+        self.counts = defaultdict(lambda: defaultdict(int))
+
+    def increment(self, definition_id, field_name, key, amount=1):
+        self.counts[(definition_id, field_name)][key] += amount
+
+    def get_counts(self, definition_id, field_name, fresh=False):
+        return dict(self.counts[(definition_id, field_name)])
+
+
 class PollModuleTest(LogicTest):
     """Logic tests for Poll Xmodule."""
     descriptor_class = PollDescriptor
@@ -30,3 +45,15 @@ class PollModuleTest(LogicTest):
         self.assertEqual(total, 2)
         self.assertDictEqual(callback, {'objectName': 'Conditional'})
         self.assertEqual(self.xmodule.poll_answer, 'No')
+
+    def test_vote_with_content_counters(self):
+        # Make sure that votes are added to the content counters, and counted with the stored answers.
+        counters = FakeContentCounters()
+        self.system.set('content_counters', counters)
+        self.xmodule.location = Location('i4x://MITx/999/poll_question/first_poll')
+        response = self.ajax_request('No', {})
+
+        self.assertDictEqual(response['poll_answers'], {'Yes': 1, 'Dont_know': 0, 'No': 1})
+        self.assertEqual(response['total'], 2)
+        self.assertDictEqual(self.xmodule.poll_answers, {'Yes': 1, 'Dont_know': 0, 'No': 0})
+        self.assertDictEqual(counters.get_counts(self.xmodule.location.url(), 'poll_answers'), {'No': 1})
@@ -18,6 +18,9 @@ from xblock.core import Scope, Dict, Boolean, List, Integer, String
 
 log = logging.getLogger(__name__)
 
+# Longer words are cut to this many characters, the most content_counters keep for a key.
+MAX_WORD_LENGTH = 255
+
 
 def pretty_bool(value):
     """Check value for possible `True` value.
@@ -92,10 +95,33 @@ class WordCloudModule(WordCloudFields, XModule):
     css = {'scss': [resource_string(__name__, 'css/word_cloud/display.scss')]}
     js_module_name = "WordCloud"
 
-    def get_state(self):
+    def get_all_words(self, fresh=False):
+        """Count the words of all students.
+
+        Words are counted by the content_counters of the ModuleSystem when it
+        has them, so that concurrent submissions don't overwrite each other,
+        and in the all_words field otherwise.
+
+        :param fresh: whether the counts must include the latest submissions
+        :rtype: dict
+        """
+        all_words = dict(self.all_words or {})
+        counters = self.system.get('content_counters')
+        if counters is not None:
+            counts = counters.get_counts(self.location.url(), 'all_words', fresh=fresh)
+            for word, count in counts.iteritems():
+                all_words[word] = all_words.get(word, 0) + count
+        return all_words
+
+    def get_state(self, fresh=False):
         """Return success json answer for client."""
         if self.submitted:
-            total_count = sum(self.all_words.itervalues())
+            all_words = self.get_all_words(fresh=fresh)
+            if self.system.get('content_counters') is not None:
+                top_words = self.top_dict(all_words, self.num_top_words)
+            else:
+                top_words = self.top_words
+            total_count = sum(all_words.itervalues())
             return json.dumps({
                 'status': 'success',
                 'submitted': True,
@@ -103,10 +129,10 @@ class WordCloudModule(WordCloudFields, XModule):
                     self.display_student_percents
                 ),
                 'student_words': {
-                    word: self.all_words[word] for word in self.student_words
+                    word: all_words.get(word, 0) for word in self.student_words
                 },
                 'total_count': total_count,
-                'top_words': self.prepare_words(self.top_words, total_count)
+                'top_words': self.prepare_words(top_words, total_count)
             })
         else:
             return json.dumps({
@@ -120,7 +146,7 @@ class WordCloudModule(WordCloudFields, XModule):
 
     def good_word(self, word):
         """Convert raw word to suitable word."""
-        return word.strip().lower()
+        return word.strip().lower()[:MAX_WORD_LENGTH]
 
     def prepare_words(self, top_words, total_count):
         """Convert words dictionary for client API.
@@ -198,6 +224,13 @@ class WordCloudModule(WordCloudFields, XModule):
 
             self.student_words = student_words
 
+            counters = self.system.get('content_counters')
+            if counters is not None:
+                self.submitted = True
+                for word in self.student_words:
+                    counters.increment(self.location.url(), 'all_words', word)
+                return self.get_state(fresh=True)
+
             # FIXME: fix this, when xblock will support mutable types.
             # Now we use this hack.
             # speed issues
@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -77,6 +80,28 @@ class Optout(models.Model):
         unique_together = ('user', 'course_id')
 
 
+DELIVERY_SENT = 'sent'
+DELIVERY_FAILED = 'failed'
+
+
+class CourseEmailDelivery(models.Model):
+    """
+    Records that a CourseEmail was sent to a user, or permanently rejected by the mail server,
+    so that a retried task doesn't send it to them again.
+    """
+    DELIVERY_STATUSES = (
+        (DELIVERY_SENT, 'Sent'),
+        (DELIVERY_FAILED, 'Failed'),
+    )
+    course_email = models.ForeignKey(CourseEmail, db_index=True)
+    user = models.ForeignKey(User, db_index=True)
+    status = models.CharField(max_length=16, choices=DELIVERY_STATUSES, default=DELIVERY_SENT)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:  # pylint: disable=C0111
+        unique_together = ('course_email', 'user')
+
+
 # Defines the tag that must appear in a template, to indicate
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
@@ -136,6 +161,24 @@ class CourseEmailTemplate(models.Model):
         # finally, return the result, without converting to an encoded byte array.
         return result
 
+    def compile_plaintext(self, plaintext, context, recipient_fields):
+        """
+        Create a CompiledEmailTemplate for plain text messages.
+
+        The stored plain template is rendered with the `context` values that are the
+        same for every recipient, and the plain text body (`plaintext`).
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context, recipient_fields)
+
+    def compile_htmltext(self, htmltext, context, recipient_fields):
+        """
+        Create a CompiledEmailTemplate for HTML messages.
+
+        The stored HTML template is rendered with the `context` values that are the
+        same for every recipient, and the HTML body (`htmltext`).
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context, recipient_fields)
+
     def render_plaintext(self, plaintext, context):
         """
         Create plain text message.
@@ -153,3 +196,62 @@ class CourseEmailTemplate(models.Model):
         stored HTML template and the provided `context` dict.
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
+
+
+class CompiledEmailTemplate(object):
+    """
+    A course email template with its message body inserted, split once into the text that is
+    the same for every recipient, and the fields that are different for each one.
+
+    Rendering it with a recipient's values produces the same message as
+    CourseEmailTemplate._render would with the full context, without parsing the template again.
+    """
+    def __init__(self, format_string, message_body, context, recipient_fields):
+        """
+        `context` holds the values of all fields but the `recipient_fields`, which are
+        filled in by render().
+        """
+        # Each segment is (text, is_static):  static text is output as is, the others
+        # are format strings of a single recipient field.
+        self.segments = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(format_string):
+            self._append(literal, True)
+            if field_name is None:
+                continue
+
+            field = u'{' + field_name
+            if conversion:
+                field += u'!' + conversion
+            if format_spec:
+                field += u':' + format_spec
+            field += u'}'
+            if re.split(r'[.\[]', field_name, 1)[0] in recipient_fields:
+                self._append(field, False)
+            else:
+                self._append(field.format(**context), True)
+
+        # As in CourseEmailTemplate._render, the message body is inserted after the
+        # substitutions have been performed.
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        for index, (text, is_static) in enumerate(self.segments):
+            if is_static and message_body_tag in text:
+                self.segments[index] = (text.replace(message_body_tag, message_body, 1), True)
+                break
+
+    def _append(self, text, is_static):
+        """
+        Add a segment, joining static text to the static text before it.
+        """
+        if is_static and self.segments and self.segments[-1][1]:
+            self.segments[-1] = (self.segments[-1][0] + text, True)
+        elif text or not is_static:
+            self.segments.append((text, is_static))
+
+    def render(self, recipient_context):
+        """
+        Return the message for the recipient whose field values are `recipient_context`.
+        """
+        return u''.join(
+            text if is_static else text.format(**recipient_context)
+            for text, is_static in self.segments
+        )
@@ -4,7 +4,9 @@ to a course.
 """
 import math
 import re
+import sys
 import time
+from multiprocessing.pool import ThreadPool
 
 from smtplib import SMTPServerDisconnected, SMTPDataError, SMTPConnectError
 
@@ -17,8 +19,8 @@ from celery.utils.log import get_task_logger
 from django.core.urlresolvers import reverse
 
 from bulk_email.models import (
-    CourseEmail, Optout, CourseEmailTemplate,
-    SEND_TO_MYSELF, SEND_TO_STAFF, SEND_TO_ALL,
+    CourseEmail, Optout, CourseEmailTemplate, CourseEmailDelivery,
+    SEND_TO_MYSELF, SEND_TO_STAFF, SEND_TO_ALL, DELIVERY_SENT, DELIVERY_FAILED,
 )
 from courseware.access import _course_staff_group_name, _course_instructor_group_name
 from courseware.courses import get_course_by_id, course_image_url
@@ -105,6 +107,32 @@ def delegate_email_batches(email_id, user_id):
     return num_workers
 
 
+def _send_messages(email_id, connection, messages):
+    """
+    Sends each of `messages`, a list of (recipient, EmailMessage) pairs, over the open `connection`.
+
+    Returns the lists of recipients the messages were sent to and permanently rejected for, and the
+    exc_info of the error that stopped the sending, or None if every message was attempted.
+    """
+    sent = []
+    failed = []
+    for recipient, email_msg in messages:
+        try:
+            connection.send_messages([email_msg])
+            log.info('Email with id %s sent to %s', email_id, recipient['email'])
+            sent.append(recipient)
+        except SMTPDataError as exc:
+            # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure
+            if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                return sent, failed, sys.exc_info()
+            log.warning('Email with id %s not delivered to %s due to error %s', email_id, recipient['email'],
+                        exc.smtp_error)
+            failed.append(recipient)
+        except Exception:  # pylint: disable=broad-except
+            return sent, failed, sys.exc_info()
+    return sent, failed, None
+
+
 @task(default_retry_delay=15, max_retries=5)  # pylint: disable=E1102
 def course_email(email_id, to_list, course_title, course_url, image_url, throttle=False):
     """
@@ -112,8 +140,13 @@ def course_email(email_id, to_list, course_title, course_url, image_url, throttl
     'profile__name', 'email' (address), and 'pk' (in the user table).
     course_title, course_url, and image_url are to memoize course properties and save lookups.
 
-    Sends to all addresses contained in to_list.  Emails are sent multi-part, in both plain
-    text and html.
+    Sends to all addresses contained in to_list that the email hasn't already been delivered to.
+    Emails are sent multi-part, in both plain text and html.
+
+    Messages are sent in batches of settings.BULK_EMAIL_MESSAGES_PER_BATCH, spread over
+    settings.BULK_EMAIL_CONNECTIONS SMTP connections, waiting settings.BULK_EMAIL_BATCH_DELAY
+    seconds between batches.  Each recipient is recorded in a CourseEmailDelivery once their
+    message has been sent (or permanently rejected), so that the task can be retried safely.
     """
     try:
         msg = CourseEmail.objects.get(id=email_id)
@@ -131,6 +164,12 @@ def course_email(email_id, to_list, course_title, course_url, image_url, throttl
 
     to_list = filter(lambda x: x['email'] not in optouts, to_list)
 
+    # exclude recipients this email has already been delivered to
+    delivered = set(CourseEmailDelivery.objects.filter(course_email=msg,
+                                                       user__in=[i['pk'] for i in to_list])
+                                               .values_list('user_id', flat=True))
+    to_list = filter(lambda x: x['pk'] not in delivered, to_list)
+
     subject = "[" + course_title + "] " + msg.subject
 
     course_title_no_quotes = re.sub(r'"', '', course_title)
@@ -138,69 +177,89 @@ def course_email(email_id, to_list, course_title, course_url, image_url, throttl
 
     course_email_template = CourseEmailTemplate.get_template()
 
+    connections = []
+    pool = None
     try:
-        connection = get_connection()
-        connection.open()
         num_sent = 0
         num_error = 0
 
         # Define context values to use in all course emails:
         email_context = {
-            'name': '',
-            'email': '',
             'course_title': course_title,
             'course_url': course_url,
             'course_image_url': image_url,
             'account_settings_url': 'https://{}{}'.format(settings.SITE_NAME, reverse('dashboard')),
             'platform_name': settings.PLATFORM_NAME,
         }
-
-        while to_list:
-            # Update context with user-specific values:
-            email = to_list[-1]['email']
-            email_context['email'] = email
-            email_context['name'] = to_list[-1]['profile__name']
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(msg.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(msg.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
+        # Fill in everything but the user-specific values once:
+        recipient_fields = ('name', 'email')
+        plaintext_template = course_email_template.compile_plaintext(msg.text_message, email_context,
+                                                                     recipient_fields)
+        html_template = course_email_template.compile_htmltext(msg.html_message, email_context, recipient_fields)
+
+        num_connections = max(min(settings.BULK_EMAIL_CONNECTIONS, len(to_list)), 1)
+        for _ in range(num_connections):
+            # Kept before opening, so that a connection that fails part way through is still closed
+            connections.append(get_connection())
+            connections[-1].open()
+        if num_connections > 1:
+            pool = ThreadPool(num_connections)
+
+        batch_size = settings.BULK_EMAIL_MESSAGES_PER_BATCH
+        for batch_start in range(0, len(to_list), batch_size):
+            messages = []
+            for recipient in to_list[batch_start:batch_start + batch_size]:
+                # Construct message content using templates and user-specific values:
+                recipient_context = {'email': recipient['email'], 'name': recipient['profile__name']}
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_template.render(recipient_context),
+                    from_addr,
+                    [recipient['email']],
+                )
+                email_msg.attach_alternative(html_template.render(recipient_context), 'text/html')
+                messages.append((recipient, email_msg))
 
             # Throttle if we tried a few times and got the rate limiter
             if throttle or current_task.request.retries > 0:
-                time.sleep(0.2)
+                time.sleep(0.2 * len(messages))
+            elif batch_start > 0 and settings.BULK_EMAIL_BATCH_DELAY:
+                time.sleep(settings.BULK_EMAIL_BATCH_DELAY)
+
+            # Each connection sends every num_connections-th message of the batch
+            sends = [(connections[i], messages[i::num_connections]) for i in range(num_connections)]
+            if pool is None:
+                results = [_send_messages(email_id, *sends[0])]
+            else:
+                results = pool.map(lambda send: _send_messages(email_id, *send), sends)
+
+            error_info = None
+            deliveries = []
+            for sent, failed, send_error_info in results:
+                num_sent += len(sent)
+                num_error += len(failed)
+                deliveries.extend(
+                    CourseEmailDelivery(course_email=msg, user_id=recipient['pk'], status=DELIVERY_SENT)
+                    for recipient in sent
+                )
+                deliveries.extend(
+                    CourseEmailDelivery(course_email=msg, user_id=recipient['pk'], status=DELIVERY_FAILED)
+                    for recipient in failed
+                )
+                delivered.update(recipient['pk'] for recipient in sent + failed)
+                error_info = error_info or send_error_info
+            CourseEmailDelivery.objects.bulk_create(deliveries)
+
+            if error_info is not None:
+                raise error_info[0], error_info[1], error_info[2]
 
-            try:
-                connection.send_messages([email_msg])
-                log.info('Email with id %s sent to %s', email_id, email)
-                num_sent += 1
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task
-                    raise exc
-                else:
-                    # This will fall through and not retry the message, since it will be popped
-                    log.warning('Email with id %s not delivered to %s due to error %s', email_id, email, exc.smtp_error)
-                    num_error += 1
-
-            to_list.pop()
-
-        connection.close()
         return course_email_result(num_sent, num_error, num_optout)
 
     except (SMTPDataError, SMTPConnectError, SMTPServerDisconnected) as exc:
-        # Error caught here cause the email to be retried.  The entire task is actually retried without popping the list
+        # Error caught here cause the email to be retried.  The recipients that have already been
+        # sent the email are recorded, and are skipped when the task is retried.
         # Reasoning is that all of these errors may be temporary condition.
+        to_list = filter(lambda x: x['pk'] not in delivered, to_list)
         log.warning('Email with id %d not delivered due to temporary error %s, retrying send to %d recipients',
                     email_id, exc, len(to_list))
         raise course_email.retry(
@@ -216,10 +275,19 @@ def course_email(email_id, to_list, course_title, course_url, image_url, throttl
             countdown=(2 ** current_task.request.retries) * 15
         )
     except:
+        to_list = filter(lambda x: x['pk'] not in delivered, to_list)
         log.exception('Email with id %d caused course_email task to fail with uncaught exception. To list: %s',
                       email_id,
                       [i['email'] for i in to_list])
         raise
+    finally:
+        if pool is not None:
+            pool.close()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:  # pylint: disable=broad-except
+                log.warning('Email with id %d could not close an SMTP connection', email_id, exc_info=True)
 
 
 # This string format code is wrapped in this function to allow mocking for a unit test
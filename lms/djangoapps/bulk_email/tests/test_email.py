@@ -14,7 +14,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from bulk_email.tasks import delegate_email_batches, course_email
-from bulk_email.models import CourseEmail, Optout
+from bulk_email.models import CourseEmail, CourseEmailDelivery, Optout
 
 from mock import patch
 
@@ -282,6 +282,24 @@ class TestEmailSendFromDashboard(ModuleStoreTestCase):
                                 [s.email for s in added_users if s not in optouts])
         self.assertItemsEqual(outbox_contents, should_send_contents)
 
+    @override_settings(BULK_EMAIL_MESSAGES_PER_BATCH=3)
+    def test_delivered_recipients_skipped(self):
+        """
+        Make sure a task that is run again doesn't send the email to anyone twice.
+        """
+        email = CourseEmail(course_id=self.course.id, sender=self.instructor, to_option='all',
+                            subject='test subject for all', text_message='test message for all',
+                            html_message='test message for all')
+        email.save()
+        to_list = [{'profile__name': 'Robot', 'email': s.email, 'pk': s.pk} for s in self.students]
+        course_email.delay(email.id, to_list[:4], self.course.display_name, 'course_url', 'image_url')
+        self.assertEquals(len(mail.outbox), 4)
+
+        course_email.delay(email.id, to_list, self.course.display_name, 'course_url', 'image_url')
+        self.assertEquals(len(mail.outbox), len(self.students))
+        self.assertItemsEqual([e.to[0] for e in mail.outbox], [s.email for s in self.students])
+        self.assertEquals(CourseEmailDelivery.objects.filter(course_email=email).count(), len(self.students))
+
 
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
 class TestEmailSendExceptions(ModuleStoreTestCase):
@@ -13,7 +13,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from student.tests.factories import UserFactory, AdminFactory, CourseEnrollmentFactory
 
 from bulk_email.models import CourseEmail
-from bulk_email.tasks import delegate_email_batches
+from bulk_email.tasks import delegate_email_batches, course_email
 from bulk_email.tests.smtp_server_thread import FakeSMTPServerThread
 
 from mock import patch, Mock
@@ -216,3 +216,23 @@ class TestEmailErrors(ModuleStoreTestCase):
         self.assertTrue(mock_log.error.called)
         self.assertIn('Unexpected bulk email TO_OPTION found', log_str)
         self.assertEqual("IDONTEXIST", opt_str)
+
+    @override_settings(BULK_EMAIL_CONNECTIONS=2)
+    @patch('bulk_email.tasks.course_email.retry')
+    @patch('bulk_email.tasks.get_connection')
+    def test_connections_closed_when_open_fails(self, get_connection, retry):
+        """
+        Tests that connections already opened are closed when opening another one fails
+        """
+        connections = [Mock(), Mock()]
+        connections[1].open.side_effect = SMTPConnectError(421, "Too many connections")
+        get_connection.side_effect = connections
+        email = CourseEmail(course_id=self.course.id, sender=self.instructor, to_option='all',
+                            subject='test subject for all', text_message='test message for all',
+                            html_message='test message for all')
+        email.save()
+        to_list = [{'profile__name': 'Robot', 'email': s.email, 'pk': s.pk} for s in (UserFactory(), UserFactory())]
+        course_email.delay(email.id, to_list, self.course.display_name, 'course_url', 'image_url')
+        self.assertTrue(retry.called)
+        for connection in connections:
+            self.assertTrue(connection.close.called)
@@ -6,7 +6,9 @@ from datetime import datetime, timedelta
 from functools import partial
 
 from django.conf import settings
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
 from xmodule.course_module import CourseDescriptor
 from xmodule.error_module import ErrorDescriptor
@@ -18,9 +20,13 @@ from external_auth.models import ExternalAuthMap
 from courseware.masquerade import is_masquerading_as_student
 from django.utils.timezone import UTC
 from student.models import CourseEnrollment
+from request_cache.middleware import RequestCache
 
 DEBUG_ACCESS = False
 
+# the request_cache key for the access memos (see _access_memo)
+ACCESS_MEMO_KEY = 'courseware.access'
+
 log = logging.getLogger(__name__)
 
 
@@ -494,6 +500,61 @@ course_beta_test_group_name.__test__ = False
 
 
 
+def _access_memo():
+    """
+    Returns the memos of access lookups for the current request:
+
+      'group_names': user id -> frozenset of the names of the user's groups
+      'decisions': (user id, location, access_level, course_context) -> bool,
+          the result of _has_access_to_location
+
+    Outside of a request, where nothing would clear them (e.g. in celery
+    tasks), returns empty memos which aren't kept.
+    """
+    data = getattr(RequestCache.get_request_cache(), 'data', None)
+    if data is None or RequestCache.get_current_request() is None:
+        return {'group_names': {}, 'decisions': {}}
+    return data.setdefault(ACCESS_MEMO_KEY, {'group_names': {}, 'decisions': {}})
+
+
+def _user_group_names(user):
+    """
+    Returns the set of names of the user's groups, only querying for them once per request.
+    """
+    group_names = _access_memo()['group_names']
+    if user.id not in group_names:
+        group_names[user.id] = frozenset(g.name for g in user.groups.all())
+    return group_names[user.id]
+
+
+def clear_access_memo():
+    """
+    Forget the access lookups memoized for the current request.
+    """
+    data = getattr(RequestCache.get_request_cache(), 'data', None)
+    if data is not None:
+        data.pop(ACCESS_MEMO_KEY, None)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _group_membership_changed(sender, action, **kwargs):  # pylint: disable=W0613
+    """
+    Any change to group memberships invalidates the memoized access lookups.
+    """
+    if action.startswith('post_'):
+        clear_access_memo()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def _user_or_group_changed(sender, **kwargs):  # pylint: disable=W0613
+    """
+    Saving or deleting a user, or deleting a group, invalidates the memoized access lookups.
+    """
+    clear_access_memo()
+
+
 def _has_global_staff_access(user):
     if user.is_staff:
         debug("Allow: user.is_staff")
@@ -530,7 +591,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor):
         # bail early if no beta testing is set up
         return descriptor.lms.start
 
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = _user_group_names(user)
 
     beta_group = course_beta_test_group_name(descriptor.location)
     if beta_group in user_groups:
@@ -576,8 +637,20 @@ def _has_access_to_location(user, location, access_level, course_context):
         debug("Allow: user.is_staff")
         return True
 
+    decisions = _access_memo()['decisions']
+    key = (user.id, Location(location).url(), access_level, course_context)
+    if key not in decisions:
+        decisions[key] = _has_group_access_to_location(user, location, access_level, course_context)
+    return decisions[key]
+
+
+def _has_group_access_to_location(user, location, access_level, course_context):
+    '''
+    Returns True if the given user is in a staff or instructor group giving access_level
+    access to the location. See _has_access_to_location.
+    '''
     # If not global staff, is the user in the Auth group for this class?
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = _user_group_names(user)
 
     if access_level == 'staff':
         staff_groups = group_names_for_staff(location, course_context) + \
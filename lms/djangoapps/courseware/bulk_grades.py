@@ -0,0 +1,263 @@
+"""
+Grading of many students at once, for instructor reports and offline grade calculation.
+
+courseware.grades.grade builds a ModelDataCache and XModules for each student
+it grades. For most sections that isn't necessary: if a section has no dynamic
+children and no modules that must always be recalculated, the section score can
+be computed from the student's StudentModule rows, with the problems the
+student hasn't been graded on counting as 0 out of their max score. That max
+score is only known by instantiating the module, which is done once per problem
+for the whole course rather than once per student.
+
+iterate_grades_for loads the StudentModule rows for a course in a single
+streamed query ordered by student, and only falls back to
+courseware.grades.grade for students with a section that can't be scored from
+stored grades.
+"""
+from itertools import groupby
+import logging
+
+from xmodule import graders
+from xmodule.graders import Score
+
+from .grades import grade, summarize_grades, weighted_score, yield_dynamic_descriptor_descendents
+from .model_data import ModelDataCache
+from .models import StudentModule
+from .module_render import get_module_for_descriptor
+
+log = logging.getLogger("mitx.courseware")
+
+
+class DummyRequest(object):
+    """
+    Stands in for an HttpRequest when a student has to be graded by
+    instantiating XModules outside of a web request.
+    """
+    META = {}
+
+    def __init__(self, user):
+        self.user = user
+        self.session = {}
+
+    def get_host(self):
+        return 'edx.mit.edu'
+
+    def is_secure(self):
+        return False
+
+
+class _NeedsModules(Exception):
+    """
+    Raised when a section can't be scored from stored StudentModule grades.
+    """
+    pass
+
+
+def _fail_to_create_module(descriptor):
+    """
+    module_creator for yield_dynamic_descriptor_descendents that refuses to
+    create modules, since sections with dynamic children are never walked here.
+    """
+    raise _NeedsModules()
+
+
+class BulkGrader(object):
+    """
+    Scores students in a course from their stored StudentModule grades.
+
+    The walk over each graded section is computed once, when the BulkGrader is
+    created, and shared between all the students it grades, as are the max
+    scores of the problems students haven't been graded on.
+    """
+    def __init__(self, course):
+        self.course = course
+        self.sections = []
+        self.module_state_keys = set()
+        # module_state_key -> max score of the problem, as the module reports it
+        self.max_scores = {}
+
+        for section_format, sections in course.grading_context['graded_sections'].iteritems():
+            for section in sections:
+                section_descriptor = section['section_descriptor']
+                self.module_state_keys.update(
+                    descriptor.location.url() for descriptor in section['xmoduledescriptors']
+                )
+                self.sections.append({
+                    'format': section_format,
+                    'name': section_descriptor.display_name_with_default,
+                    'location': section_descriptor.location,
+                    'scored_urls': [descriptor.location.url() for descriptor in section['xmoduledescriptors']],
+                    'always_recalculate': any(
+                        descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+                    ),
+                    'scored_descriptors': self._scored_descendents(section),
+                })
+
+    @staticmethod
+    def _scored_descendents(section):
+        """
+        Returns the scored descriptors of a section in the same order that
+        courseware.grades.grade visits them, or None if the section has to be
+        graded by instantiating XModules.
+        """
+        try:
+            return [
+                descriptor
+                for descriptor in yield_dynamic_descriptor_descendents(
+                    section['section_descriptor'], _fail_to_create_module
+                )
+                if descriptor.has_score
+            ]
+        except _NeedsModules:
+            return None
+
+    def _max_score(self, descriptor, module_creator):
+        """
+        Returns the max score of a problem the student hasn't been graded on,
+        or None if it has no score for them.
+
+        The module is only instantiated, with module_creator, the first time
+        the problem's max score is needed. That assumes, like the stored
+        max_grade of a StudentModule does, that it's the same for every student.
+        """
+        url = descriptor.location.url()
+        if url in self.max_scores:
+            return self.max_scores[url]
+        if module_creator is None:
+            raise _NeedsModules()
+
+        module = module_creator(descriptor)
+        if module is None:
+            # The student can't see the problem, which may not be true of others
+            return None
+        # The module may be an error module (if something in the problem builder
+        # failed), in which case the max score is None
+        self.max_scores[url] = module.max_score()
+        return self.max_scores[url]
+
+    def grade_from_rows(self, rows, keep_raw_scores=False, module_creator=None):
+        """
+        Grade a student from their StudentModule rows.
+
+        rows: a dict mapping module_state_key to (grade, max_grade) for every
+            StudentModule row the student has in this course
+        module_creator: a function that takes a descriptor and returns the
+            student's XModule for it, used to find the max scores of problems
+            the student hasn't been graded on. If None, students with such
+            problems aren't graded.
+
+        Returns the same grade summary as courseware.grades.grade, or None if
+        the student has to be graded by instantiating XModules.
+        """
+        totaled_scores = {}
+        raw_scores = []
+        for section in self.sections:
+            format_scores = totaled_scores.setdefault(section['format'], [])
+
+            if section['always_recalculate']:
+                return None
+
+            # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
+            if not any(url in rows for url in section['scored_urls']):
+                format_scores.append(Score(0.0, 1.0, True, section['name']))
+                continue
+
+            if section['scored_descriptors'] is None:
+                return None
+
+            scores = []
+            for descriptor in section['scored_descriptors']:
+                stored_grade, max_grade = rows.get(descriptor.location.url(), (None, None))
+                if max_grade is not None:
+                    correct = stored_grade if stored_grade is not None else 0
+                else:
+                    # Like courseware.grades.get_score, a problem that hasn't
+                    # been graded is worth 0 out of the module's max score
+                    try:
+                        max_grade = self._max_score(descriptor, module_creator)
+                    except _NeedsModules:
+                        return None
+                    if max_grade is None:
+                        continue
+                    correct = 0.0
+
+                correct, total = weighted_score(descriptor, correct, max_grade)
+                graded = descriptor.lms.graded and total > 0
+                scores.append(Score(correct, total, graded, descriptor.display_name_with_default))
+
+            _, graded_total = graders.aggregate_scores(scores, section['name'])
+            if keep_raw_scores:
+                raw_scores += scores
+
+            if graded_total.possible > 0:
+                format_scores.append(graded_total)
+            else:
+                log.exception("Unable to grade a section with a total possible score of zero. " +
+                              str(section['location']))
+
+        return summarize_grades(self.course, totaled_scores, raw_scores if keep_raw_scores else None)
+
+
+def _stream_rows(course_id, student_ids, module_state_keys):
+    """
+    Yields (student_id, rows) for every student in student_ids that has
+    StudentModule rows in the course, in order of student_id, where rows is a
+    dict mapping module_state_key to (grade, max_grade).
+
+    All rows are read with a single query. If student_ids is a contiguous
+    chunk of a course's students, only that id range is read.
+    """
+    queryset = StudentModule.objects.filter(
+        course_id=course_id,
+        student__id__gte=min(student_ids),
+        student__id__lte=max(student_ids),
+    ).order_by('student').values_list('student', 'module_state_key', 'grade', 'max_grade')
+
+    for student_id, student_rows in groupby(queryset.iterator(), lambda row: row[0]):
+        if student_id not in student_ids:
+            continue
+        yield student_id, dict(
+            (module_state_key, (stored_grade, max_grade))
+            for _, module_state_key, stored_grade, max_grade in student_rows
+            if module_state_key in module_state_keys
+        )
+
+
+def iterate_grades_for(course, students, request=None, keep_raw_scores=False):
+    """
+    Grades many students in a course, yielding (student, grade_summary)
+    tuples in order of student id. Each grade_summary is what
+    courseware.grades.grade would return for that student.
+
+    course: a CourseDescriptor
+    students: an iterable of User objects
+    request: the request to use for students that have to be graded by
+        instantiating XModules. If None, a DummyRequest for the student is used.
+    keep_raw_scores: as for courseware.grades.grade
+    """
+    students = sorted(students, key=lambda student: student.id)
+    if not students:
+        return
+
+    bulk_grader = BulkGrader(course)
+    student_ids = set(student.id for student in students)
+    rows_by_student = _stream_rows(course.id, student_ids, bulk_grader.module_state_keys)
+    next_rows = next(rows_by_student, None)
+
+    for student in students:
+        rows = {}
+        if next_rows is not None and next_rows[0] == student.id:
+            rows = next_rows[1]
+            next_rows = next(rows_by_student, None)
+
+        student_request = request or DummyRequest(student)
+
+        def create_module(descriptor, student=student, student_request=student_request):
+            """creates the student's XModule for a problem they haven't been graded on"""
+            model_data_cache = ModelDataCache([descriptor], course.id, student)
+            return get_module_for_descriptor(student, student_request, descriptor, model_data_cache, course.id)
+
+        grade_summary = bulk_grader.grade_from_rows(rows, keep_raw_scores, create_module)
+        if grade_summary is None:
+            grade_summary = grade(student, student_request, course, keep_raw_scores=keep_raw_scores)
+        yield student, grade_summary
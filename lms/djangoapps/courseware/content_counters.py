@@ -0,0 +1,91 @@
+"""
+Counters kept for the keys of Scope.content Dict fields that all students
+update, like the votes of a poll.
+
+Writing such a field means reading, changing and writing back one JSON value,
+so concurrent writes wait on the same XModuleContentField row, and some of
+them are lost. Instead, modules add to a counter for each key: the counts are
+stored as XModuleContentCounter rows, spread over COUNTER_SHARDS rows per key,
+and each increment is a single UPDATE of a random shard. The counts are summed
+when they are read, and cached for COUNTER_CACHE_TIMEOUT seconds.
+
+Modules get the counters as the 'content_counters' attribute of their
+ModuleSystem, and add the counts to the values already stored in their fields.
+"""
+import random
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from courseware.models import XModuleContentCounter
+
+# How many rows the increments of each counter are spread over
+COUNTER_SHARDS = 8
+
+# How many seconds the summed counts are cached for
+COUNTER_CACHE_TIMEOUT = 2
+
+
+def _cache_key(definition_id, field_name):
+    return u'courseware.content_counters.{0}.{1}'.format(definition_id, field_name)
+
+
+class ContentCounters(object):
+    """
+    The counters of the keys of Scope.content fields, identified by the
+    definition id of the module and the name of the field.
+    """
+    def increment(self, definition_id, field_name, key, amount=1):
+        """
+        Add `amount` to the counter of `key` in the field.
+        """
+        shard = random.randrange(COUNTER_SHARDS)
+        counter = XModuleContentCounter.objects.filter(
+            definition_id=definition_id, field_name=field_name, key=key, shard=shard
+        )
+        if counter.update(count=F('count') + amount):
+            return
+
+        # The shard doesn't exist yet.  If another request creates it first,
+        # fall back to updating it.
+        savepoint = transaction.savepoint()
+        try:
+            XModuleContentCounter.objects.create(
+                definition_id=definition_id, field_name=field_name, key=key, shard=shard, count=amount
+            )
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            transaction.savepoint_rollback(savepoint)
+            counter.update(count=F('count') + amount)
+
+    def get_counts(self, definition_id, field_name, fresh=False):
+        """
+        Returns a dict of the counts of all of the keys of the field.
+
+        The counts may be up to COUNTER_CACHE_TIMEOUT seconds old, unless
+        `fresh` is True.
+        """
+        cache_key = _cache_key(definition_id, field_name)
+        if not fresh:
+            counts = cache.get(cache_key)
+            if counts is not None:
+                return counts
+
+        counts = dict(
+            XModuleContentCounter.objects.filter(definition_id=definition_id, field_name=field_name)
+            .values('key').annotate(total=Sum('count')).values_list('key', 'total')
+        )
+        cache.set(cache_key, counts, COUNTER_CACHE_TIMEOUT)
+        return counts
+
+    def reset(self, definition_id, field_name, key):
+        """
+        Remove the counter of `key` in the field, for when the value stored in
+        the field itself is changed.
+        """
+        XModuleContentCounter.objects.filter(definition_id=definition_id, field_name=field_name, key=key).delete()
+        cache.delete(_cache_key(definition_id, field_name))
+
+
+CONTENT_COUNTERS = ContentCounters()
@@ -0,0 +1,164 @@
+"""
+Stored, versioned per-(student, course) gradesets used by courseware.grades.grade
+
+A gradeset holds the graded total (and raw scores) for every graded section
+the student has been graded on, along with a fingerprint of the StudentModule
+rows that section was computed from. Each (student, course) pair also has a
+version token which is replaced whenever one of the student's StudentModule
+rows in that course is saved or deleted.
+
+grades.grade uses these in two ways:
+
+    - If the stored gradeset carries the current version token, and was
+      computed from the same course content, nothing has changed since it
+      was computed, so the cached section totals are used
+      without building a ModelDataCache or instantiating any XModules.
+
+    - Otherwise, the section fingerprints are compared against the current
+      StudentModule rows, and only the sections whose fingerprint changed are
+      regraded. The course grader is then re-applied to the merged totals.
+
+Gradesets computed from different course content (for instance before a
+problem was added or reweighted and the course republished) are never reused.
+"""
+import hashlib
+import json
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Bump this whenever the format of the stored gradeset changes
+GRADESET_FORMAT_VERSION = 2
+
+# Gradesets are dropped after a week by default
+DEFAULT_GRADE_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def grade_cache_enabled():
+    """
+    Returns True if stored gradesets should be used by courseware.grades.grade
+    """
+    # Randomly generated profile scores must never be cached
+    if getattr(settings, 'GENERATE_PROFILE_SCORES', False):
+        return False
+    return settings.MITX_FEATURES.get('ENABLE_GRADE_CACHE', False)
+
+
+def _timeout():
+    return getattr(settings, 'GRADE_CACHE_TIMEOUT', DEFAULT_GRADE_CACHE_TIMEOUT)
+
+
+def _gradeset_key(student_id, course_id):
+    return u'courseware.grades.gradeset.{0}.{1}.{2}'.format(GRADESET_FORMAT_VERSION, student_id, course_id)
+
+
+def _version_key(student_id, course_id):
+    return u'courseware.grades.version.{0}.{1}'.format(student_id, course_id)
+
+
+def current_version(student_id, course_id):
+    """
+    Return the version token for this student's grades in this course.
+
+    If no token exists yet (or it has been evicted), a new one is created,
+    which implicitly invalidates any gradeset stored against an older token.
+    """
+    key = _version_key(student_id, course_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, _timeout())
+        version = cache.get(key)
+    return version
+
+
+def invalidate(student_id, course_id):
+    """
+    Mark the stored gradeset for this student and course as out of date.
+
+    The gradeset itself is kept, so that the sections that did not change can
+    still be reused once their fingerprints have been checked.
+    """
+    cache.set(_version_key(student_id, course_id), uuid4().hex, _timeout())
+
+
+def get_gradeset(student_id, course_id):
+    """
+    Return the stored gradeset for this student and course, or None.
+
+    A gradeset is a dict with the keys:
+
+        version: the version token that was current when it was computed
+        content_version: the content_version of the course it was computed for
+        sections: a dict mapping section location urls to dicts with the keys
+            'fingerprint', 'graded_total' and 'scores'
+    """
+    return cache.get(_gradeset_key(student_id, course_id))
+
+
+def set_gradeset(student_id, course_id, version, sections, content_version=None):
+    """
+    Store the gradeset for this student and course.
+
+    version: The version token that was read before the grades were computed
+    sections: see get_gradeset
+    content_version: The content_version of the course the grades were computed for
+    """
+    cache.set(
+        _gradeset_key(student_id, course_id),
+        {'version': version, 'content_version': content_version, 'sections': sections},
+        _timeout()
+    )
+
+
+# course descriptor -> its content_version, computed once per loaded course
+_content_versions = WeakKeyDictionary()
+
+
+def content_version(course):
+    """
+    Returns a hash of everything in the course's content that grades depend
+    on: its grading policy, graded sections, and the location, weight,
+    gradedness and definition of every scored module in them. Republishing a
+    course with a changed problem or weight changes it.
+    """
+    try:
+        return _content_versions[course]
+    except KeyError:
+        pass
+
+    content = hashlib.md5()
+    content.update(json.dumps(course.grading_policy, sort_keys=True, default=repr))
+    grading_context = course.grading_context
+    for section_format in sorted(grading_context['graded_sections']):
+        for section in grading_context['graded_sections'][section_format]:
+            section_descriptor = section['section_descriptor']
+            content.update(repr((section_format, section_descriptor.location.url(),
+                                 section_descriptor.display_name_with_default)))
+            for descriptor in section['xmoduledescriptors']:
+                data = getattr(descriptor, 'data', None)
+                if isinstance(data, unicode):
+                    data = data.encode('utf-8')
+                content.update(repr((
+                    descriptor.location.url(),
+                    getattr(descriptor, 'weight', None),
+                    descriptor.lms.graded,
+                    hashlib.md5(data).hexdigest() if isinstance(data, str) else repr(data),
+                )))
+    version = content.hexdigest()
+    _content_versions[course] = version
+    return version
+
+
+def section_fingerprint(student_modules):
+    """
+    Returns a hashable summary of the grade-relevant parts of the
+    StudentModule rows backing a section.
+
+    student_modules: an iterable of StudentModule objects
+    """
+    return tuple(sorted(
+        (module.module_state_key, module.grade, module.max_grade)
+        for module in student_modules
+    ))
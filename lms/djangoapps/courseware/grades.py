@@ -15,6 +15,7 @@ from xmodule import graders
 from xmodule.capa_module import CapaModule
 from xmodule.graders import Score
 from .models import StudentModule
+from . import grade_cache
 
 log = logging.getLogger("mitx.courseware")
 
@@ -136,13 +137,38 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores for every graded module
 
     More information on the format is in the docstring for CourseGrader.
+
+    If the grade cache is enabled, section totals are reused from the student's
+    stored gradeset (see courseware.grade_cache), and only the sections whose
+    StudentModule rows have changed since they were last graded are regraded.
     """
 
     grading_context = course.grading_context
     raw_scores = []
 
-    if model_data_cache is None:
-        model_data_cache = ModelDataCache(grading_context['all_descriptors'], course.id, student)
+    use_grade_cache = grade_cache.grade_cache_enabled() and student.is_authenticated()
+    if use_grade_cache:
+        # Read the version before grading, so that a change made while we are
+        # grading leaves the stored gradeset out of date
+        version = grade_cache.current_version(student.id, course.id)
+        content_version = grade_cache.content_version(course)
+        gradeset = grade_cache.get_gradeset(student.id, course.id)
+        if gradeset is None or gradeset.get('content_version') != content_version:
+            # Grades computed from other course content can't be reused
+            gradeset = {'version': None, 'sections': {}}
+        up_to_date = (gradeset['version'] == version)
+        cached_sections = gradeset['sections']
+        new_sections = {}
+
+    # The ModelDataCache is only built once we find a section that can't
+    # be taken straight from the stored gradeset
+    model_data_caches = [model_data_cache]
+
+    def get_model_data_cache():
+        '''returns the student's ModelDataCache, creating it on first use'''
+        if model_data_caches[0] is None:
+            model_data_caches[0] = ModelDataCache(grading_context['all_descriptors'], course.id, student)
+        return model_data_caches[0]
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -151,62 +177,40 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
         format_scores = []
         for section in sections:
             section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
-
-            should_grade_section = False
-            # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
-            for moduledescriptor in section['xmoduledescriptors']:
-                # some problems have state that is updated independently of interaction
-                # with the LMS, so they need to always be scored. (E.g. foldit.)
-                if moduledescriptor.always_recalculate_grades:
-                    should_grade_section = True
-                    break
-
-                # Create a fake key to pull out a StudentModule object from the ModelDataCache
-
-                key = LmsKeyValueStore.Key(
-                    Scope.user_state,
-                    student.id,
-                    moduledescriptor.location,
-                    None
+            section_url = section_descriptor.location.url()
+
+            # some problems have state that is updated independently of interaction
+            # with the LMS, so they need to always be scored. (E.g. foldit.)
+            always_recalculate = any(
+                moduledescriptor.always_recalculate_grades
+                for moduledescriptor in section['xmoduledescriptors']
+            )
+            cacheable = use_grade_cache and not always_recalculate
+
+            cached_section = cached_sections.get(section_url) if cacheable else None
+            if cached_section is not None and not up_to_date:
+                student_modules = _find_student_modules(student, section, get_model_data_cache())
+                if grade_cache.section_fingerprint(student_modules) != cached_section['fingerprint']:
+                    cached_section = None
+
+            if cached_section is None:
+                student_modules = _find_student_modules(student, section, get_model_data_cache())
+                graded_total, scores = _grade_section(
+                    student, request, course, section, student_modules,
+                    always_recalculate, get_model_data_cache()
                 )
-                if model_data_cache.find(key):
-                    should_grade_section = True
-                    break
-
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    return get_module_for_descriptor(student, request, descriptor, model_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(course.id, student, module_descriptor, create_module, model_data_cache)
-                    if correct is None and total is None:
-                        continue
+                cached_section = {
+                    'fingerprint': grade_cache.section_fingerprint(student_modules),
+                    'graded_total': graded_total,
+                    'scores': scores,
+                }
 
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
+            if cacheable:
+                new_sections[section_url] = cached_section
 
-                    graded = module_descriptor.lms.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
-
-                _, graded_total = graders.aggregate_scores(scores, section_name)
-                if keep_raw_scores:
-                    raw_scores += scores
-            else:
-                graded_total = Score(0.0, 1.0, True, section_name)
+            graded_total = cached_section['graded_total']
+            if keep_raw_scores:
+                raw_scores += cached_section['scores']
 
             #Add the graded total to totaled_scores
             if graded_total.possible > 0:
@@ -217,6 +221,18 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
 
         totaled_scores[section_format] = format_scores
 
+    if use_grade_cache and (not up_to_date or new_sections != cached_sections):
+        grade_cache.set_gradeset(student.id, course.id, version, new_sections, content_version)
+
+    return summarize_grades(course, totaled_scores, raw_scores if keep_raw_scores else None)
+
+
+def summarize_grades(course, totaled_scores, raw_scores=None):
+    """
+    Applies the course grader to totaled_scores (a dict mapping section formats
+    to lists of section total Scores) and returns the grade summary described
+    in grade(). If raw_scores is not None, it is included as 'raw_scores'.
+    """
     grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
 
     # We round the grade here, to make sure that the grade is an whole percentage and
@@ -226,12 +242,79 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
     letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
     grade_summary['grade'] = letter_grade
     grade_summary['totaled_scores'] = totaled_scores  	# make this available, eg for instructor download & debugging
-    if keep_raw_scores:
+    if raw_scores is not None:
         grade_summary['raw_scores'] = raw_scores        # way to get all RAW scores out to instructor
                                                         # so grader can be double-checked
     return grade_summary
 
 
+def _find_student_modules(student, section, model_data_cache):
+    """
+    Returns the StudentModules in model_data_cache for the scored
+    descriptors of a graded section from grading_context.
+    """
+    student_modules = []
+    for moduledescriptor in section['xmoduledescriptors']:
+        # Create a fake key to pull out a StudentModule object from the ModelDataCache
+        key = LmsKeyValueStore.Key(
+            Scope.user_state,
+            student.id,
+            moduledescriptor.location,
+            None
+        )
+        student_module = model_data_cache.find(key)
+        if student_module is not None:
+            student_modules.append(student_module)
+    return student_modules
+
+
+def _grade_section(student, request, course, section, student_modules, always_recalculate, model_data_cache):
+    """
+    Grades a single graded section from grading_context, and returns a
+    tuple (graded_total, scores), where scores is the list of Scores for
+    every scored module in the section.
+
+    student_modules: the StudentModules for the section, from _find_student_modules
+    always_recalculate: True if any module in the section must always be scored
+    """
+    section_descriptor = section['section_descriptor']
+    section_name = section_descriptor.display_name_with_default
+
+    # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
+    if not always_recalculate and not student_modules:
+        return Score(0.0, 1.0, True, section_name), []
+
+    scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        return get_module_for_descriptor(student, request, descriptor, model_data_cache, course.id)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(course.id, student, module_descriptor, create_module, model_data_cache)
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.lms.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+
+    _, graded_total = graders.aggregate_scores(scores, section_name)
+    return graded_total, scores
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -399,11 +482,19 @@ def get_score(course_id, user, problem_descriptor, module_creator, model_data_ca
         if total is None:
             return (None, None)
 
-    # Now we re-weight the problem, if specified
+    return weighted_score(problem_descriptor, correct, total)
+
+
+def weighted_score(problem_descriptor, correct, total):
+    """
+    Re-weights the score (correct, total) by the problem's weight, if it has
+    one, and returns the new (correct, total) tuple.
+    """
     weight = problem_descriptor.weight
     if weight is not None:
         if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
+            log.exception("Cannot reweight a problem with zero total points. Problem: " +
+                          str(problem_descriptor.location))
             return (correct, total)
         correct = correct * weight / total
         total = weight
@@ -2,6 +2,7 @@
 Classes to provide the LMS runtime data storage to XBlocks
 """
 
+import copy
 import json
 from collections import namedtuple, defaultdict
 from itertools import chain
@@ -37,6 +38,16 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def _copy_value(value):
+    """
+    Returns a copy of a JSON-compatible field value, only copying
+    values that are mutable
+    """
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
 class ModelDataCache(object):
     """
     A cache of django model objects needed to supply the data
@@ -56,6 +67,8 @@ class ModelDataCache(object):
         select_for_update: True if rows should be locked until end of transaction
         '''
         self.cache = {}
+        # Maps module_state_keys to (state, decoded state) for StudentModules in the cache
+        self.user_states = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
         self.course_id = course_id
@@ -278,6 +291,39 @@ class ModelDataCache(object):
         self.cache[cache_key] = field_object
         return field_object
 
+    def get_user_state(self, student_module):
+        """
+        Returns the decoded state dict of a StudentModule, decoding its JSON
+        only if it has changed since it was last decoded.
+
+        Changes made to the returned dict are written back to the
+        StudentModule by `save_user_state`.
+        """
+        cached = self.user_states.get(student_module.module_state_key)
+        if cached is None or cached[0] is not student_module.state:
+            cached = (student_module.state, json.loads(student_module.state))
+            self.user_states[student_module.module_state_key] = cached
+        return cached[1]
+
+    def save_user_state(self, student_module):
+        """
+        Serializes the decoded state dict of a StudentModule and saves it.
+
+        The save is skipped if the serialized state is identical to the stored
+        one, so that no StudentModuleHistory entry is written for it either.
+
+        Returns True if the StudentModule was saved.
+        """
+        state = self.get_user_state(student_module)
+        serialized_state = json.dumps(state, sort_keys=True)
+        if serialized_state == student_module.state:
+            return False
+
+        student_module.state = serialized_state
+        student_module.save()
+        self.user_states[student_module.module_state_key] = (serialized_state, state)
+        return True
+
 
 class LmsKeyValueStore(KeyValueStore):
     """
@@ -329,7 +375,9 @@ class LmsKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            return json.loads(field_object.state)[key.field_name]
+            # Copy mutable values, so that changing them in place doesn't change
+            # the decoded state without going through set
+            return _copy_value(self._model_data_cache.get_user_state(field_object)[key.field_name])
         else:
             return json.loads(field_object.value)
 
@@ -365,11 +413,10 @@ class LmsKeyValueStore(KeyValueStore):
             # Update the list of associated fields
             field_objects[field_object].append(field)
 
-            # Special case when scope is for the user state, because this scope saves fields in a single row
+            # Special case when scope is for the user state, because this scope saves fields in a single row.
+            # The decoded state is updated here, and serialized once per row when it's saved below
             if field.scope == Scope.user_state:
-                state = json.loads(field_object.state)
-                state[field.field_name] = kv_dict[field]
-                field_object.state = json.dumps(state)
+                self._model_data_cache.get_user_state(field_object)[field.field_name] = _copy_value(kv_dict[field])
             else:
             # The remaining scopes save fields on different rows, so
             # we don't have to worry about conflicts
@@ -378,7 +425,10 @@ class LmsKeyValueStore(KeyValueStore):
         for field_object in field_objects:
             try:
                 # Save the field object that we made above
-                field_object.save()
+                if isinstance(field_object, StudentModule):
+                    self._model_data_cache.save_user_state(field_object)
+                else:
+                    field_object.save()
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
                 saved_fields.extend([field.field_name for field in field_objects[field_object]])
@@ -398,10 +448,8 @@ class LmsKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            state = json.loads(field_object.state)
-            del state[key.field_name]
-            field_object.state = json.dumps(state)
-            field_object.save()
+            del self._model_data_cache.get_user_state(field_object)[key.field_name]
+            self._model_data_cache.save_user_state(field_object)
         else:
             field_object.delete()
 
@@ -420,7 +468,7 @@ class LmsKeyValueStore(KeyValueStore):
             return False
 
         if key.scope == Scope.user_state:
-            return key.field_name in json.loads(field_object.state)
+            return key.field_name in self._model_data_cache.get_user_state(field_object)
         else:
             return True
 
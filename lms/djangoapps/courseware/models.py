@@ -14,9 +14,11 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from courseware import grade_cache
+
 
 class StudentModule(models.Model):
     """
@@ -102,6 +104,17 @@ class StudentModuleHistory(models.Model):
             history_entry.save()
 
 
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+def invalidate_cached_grades(sender, instance, **kwargs):
+    """
+    Mark the student's stored gradeset for this course as out of date whenever
+    one of their StudentModule rows changes, so that the affected sections are
+    regraded the next time courseware.grades.grade is called.
+    """
+    grade_cache.invalidate(instance.student_id, instance.course_id)
+
+
 class XModuleContentField(models.Model):
     """
     Stores data set in the Scope.content scope by an xmodule field
@@ -133,6 +146,42 @@ class XModuleContentField(models.Model):
         return unicode(repr(self))
 
 
+class XModuleContentCounter(models.Model):
+    """
+    Stores one shard of a counter kept for a key of a Scope.content Dict field
+    of an xmodule.  The value of the counter is the sum of the counts of all of
+    its shards; increments are spread over the shards, so that concurrent
+    increments don't all wait on the same row.
+    """
+
+    class Meta:
+        unique_together = (('definition_id', 'field_name', 'key', 'shard'),)
+
+    # The definition id for the module
+    definition_id = models.CharField(max_length=255, db_index=True)
+
+    # The name of the field
+    field_name = models.CharField(max_length=64)
+
+    # The key of the field the counter is kept for
+    key = models.CharField(max_length=255)
+
+    shard = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return 'XModuleContentCounter<%r>' % ({
+            'definition_id': self.definition_id,
+            'field_name': self.field_name,
+            'key': self.key,
+            'shard': self.shard,
+            'count': self.count,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
 class XModuleSettingsField(models.Model):
     """
     Stores data set in the Scope.settings scope by an xmodule field
@@ -24,14 +24,16 @@ from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.progress import Progress
 from xmodule.x_module import ModuleSystem
-from xmodule_modifiers import replace_course_urls, replace_jump_to_id_urls, replace_static_urls, add_histogram, wrap_xmodule, save_module  # pylint: disable=F0401
+from xmodule_modifiers import replace_urls, add_histogram, wrap_xmodule, save_module  # pylint: disable=F0401
 
 import static_replace
 from psychometrics.psychoanalyze import make_psychometrics_data_update_handler
 from student.models import unique_id_for_user
 
 from courseware.access import has_access
+from courseware.content_counters import CONTENT_COUNTERS
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import LmsKeyValueStore, LmsUsage, ModelDataCache
 from xblock.runtime import KeyValueStore
@@ -384,6 +386,11 @@ def get_module_for_descriptor_internal(user, descriptor, model_data_cache, cours
     # pass position specified in URL to module through ModuleSystem
     system.set('position', position)
     system.set('DEBUG', settings.DEBUG)
+    # counters for the Scope.content fields that all students add to
+    system.set('content_counters', CONTENT_COUNTERS)
+    if settings.MITX_FEATURES.get('ENABLE_LAZY_SEQUENCE_RENDERING'):
+        system.set('lazy_sequence_rendering', True)
+        system.set('get_stored_progress', partial(get_stored_progress, user, model_data_cache))
     if settings.MITX_FEATURES.get('ENABLE_PSYCHOMETRICS'):
         system.set(
             'psychometrics_handler',  # set callback for updating PsychometricsData
@@ -415,28 +422,20 @@ def get_module_for_descriptor_internal(user, descriptor, model_data_cache, cours
     if wrap_xmodule_display is True:
         _get_html = wrap_xmodule(module.get_html, module, 'xmodule_display.html')
 
-    module.get_html = replace_static_urls(
-        _get_html,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.lms.static_asset_path
-    )
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    module.get_html = replace_course_urls(module.get_html, course_id)
-
-    # this will rewrite intra-courseware links
-    # that use the shorthand /jump_to_id/<id>. This is very helpful
-    # for studio authored courses (compared to the /course/... format) since it is
-    # is durable with respect to moves and the author doesn't need to
-    # know the hierarchy
+    # Rewrite /static/ urls to their served urls, allow urls of the form
+    # '/course/' to refer to the root of multicourse directory hierarchy of this
+    # course, and rewrite intra-courseware links that use the shorthand
+    # /jump_to_id/<id>. This is very helpful for studio authored courses
+    # (compared to the /course/... format) since it is durable with respect to
+    # moves and the author doesn't need to know the hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work
-    module.get_html = replace_jump_to_id_urls(
-        module.get_html,
+    module.get_html = replace_urls(
+        _get_html,
+        getattr(descriptor, 'data_dir', None),
         course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id, 'module_id': ''})
+        static_asset_path=static_asset_path or descriptor.lms.static_asset_path,
+        jump_to_id_base_url=reverse('jump_to_id', kwargs={'course_id': course_id, 'module_id': ''})
     )
 
     if settings.MITX_FEATURES.get('DISPLAY_HISTOGRAMS_TO_STAFF'):
@@ -593,6 +592,42 @@ def modx_dispatch(request, dispatch, location, course_id):
     return HttpResponse(ajax_return)
 
 
+def get_stored_progress(user, model_data_cache, descriptor):
+    """
+    Return the Progress of the user on the scored descendants of descriptor (inclusive)
+    according to their StudentModule grades in model_data_cache, without instantiating any
+    modules. Like the modules' own get_progress, scores are scaled by the problems' weights.
+
+    Returns None if nothing is scored, or if the max score of a problem which hasn't been
+    graded is only known by instantiating it (when it has no weight).
+    """
+    if not user.is_authenticated():
+        return None
+
+    progresses = []
+    descriptors = [descriptor]
+    while descriptors:
+        current = descriptors.pop()
+        if current.has_score:
+            weight = getattr(current, 'weight', None)
+            key = LmsKeyValueStore.Key(Scope.user_state, user.id, current.location, None)
+            student_module = model_data_cache.find(key)
+            if student_module is not None and student_module.max_grade:
+                grade = min(max(student_module.grade or 0, 0), student_module.max_grade)
+                total = student_module.max_grade
+                if weight is not None:
+                    grade = float(grade) * weight / total
+                    total = weight
+            elif weight is not None:
+                grade, total = 0, weight
+            else:
+                return None
+            if total > 0:
+                progresses.append(Progress(grade, total))
+        descriptors.extend(current.get_children())
+    return reduce(Progress.add_counts, progresses, None)
+
+
 def get_score_bucket(grade, max_grade):
     """
     Function to split arbitrary score ranges into 3 buckets.
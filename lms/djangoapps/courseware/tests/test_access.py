@@ -1,8 +1,9 @@
-from mock import Mock
+from mock import Mock, patch
 
 from django.test import TestCase
 
 from xmodule.modulestore import Location
+from request_cache.middleware import RequestCache
 import courseware.access as access
 from .factories import CourseEnrollmentAllowedFactory
 import datetime
@@ -58,6 +59,24 @@ class AccessTestCase(TestCase):
         self.assertFalse(access._has_access_to_location(u, location,
                                                         'instructor', None))
 
+    @patch.object(RequestCache, 'get_current_request', Mock())
+    def test__has_access_to_location_memo(self):
+        access.clear_access_memo()
+        self.addCleanup(access.clear_access_memo)
+        location = Location('i4x://edX/toy/course/2012_Fall')
+        u = Mock(is_staff=False)
+        g = Mock()
+        g.name = 'staff_edX/toy/2012_Fall'
+        u.groups.all.return_value = [g]
+        self.assertTrue(access._has_access_to_location(u, location, 'staff', None))
+        self.assertFalse(access._has_access_to_location(u, location, 'instructor', None))
+        # the user's groups are only looked up once per request
+        self.assertEqual(u.groups.all.call_count, 1)
+
+        access.clear_access_memo()
+        g.name = 'student_only'
+        self.assertFalse(access._has_access_to_location(u, location, 'staff', None))
+
     def test__has_access_string(self):
         u = Mock(is_staff=True)
         self.assertFalse(access._has_access_string(u, 'not_global', 'staff', None))
@@ -0,0 +1,97 @@
+"""
+Tests for courseware.bulk_grades
+"""
+from django.test import TestCase
+from mock import Mock
+
+from courseware.bulk_grades import BulkGrader
+from xmodule.graders import Score
+
+
+def mock_descriptor(url, has_score=True, children=(), weight=None, always_recalculate=False, dynamic=False):
+    descriptor = Mock()
+    descriptor.location.url.return_value = url
+    descriptor.has_score = has_score
+    descriptor.weight = weight
+    descriptor.always_recalculate_grades = always_recalculate
+    descriptor.has_dynamic_children.return_value = dynamic
+    descriptor.get_children.return_value = list(children)
+    descriptor.display_name_with_default = url
+    descriptor.lms.graded = True
+    return descriptor
+
+
+def mock_course(section):
+    course = Mock()
+    course.grading_context = {
+        'graded_sections': {
+            'Homework': [{
+                'section_descriptor': section,
+                'xmoduledescriptors': [child for child in section.get_children() if child.has_score],
+            }]
+        }
+    }
+    course.grader.grade.side_effect = lambda totaled_scores, **kwargs: {'percent': 0.5}
+    course.grade_cutoffs = {'Pass': 0.5}
+    return course
+
+
+class BulkGraderTest(TestCase):
+    """
+    Tests for grading students from their stored StudentModule grades
+    """
+    def setUp(self):
+        self.problem = mock_descriptor('problem_a')
+        self.weighted_problem = mock_descriptor('problem_b', weight=10)
+        self.section = mock_descriptor('hw1', has_score=False, children=[self.problem, self.weighted_problem])
+
+    def test_unseen_section(self):
+        grader = BulkGrader(mock_course(self.section))
+        summary = grader.grade_from_rows({}, keep_raw_scores=True)
+        self.assertEquals([Score(0.0, 1.0, True, 'hw1')], summary['totaled_scores']['Homework'])
+        self.assertEquals([], summary['raw_scores'])
+        self.assertEquals('Pass', summary['grade'])
+
+    def test_scores_from_rows(self):
+        grader = BulkGrader(mock_course(self.section))
+        summary = grader.grade_from_rows(
+            {'problem_a': (1.0, 2.0), 'problem_b': (None, 4.0)},
+            keep_raw_scores=True
+        )
+        self.assertEquals(
+            set([Score(1.0, 2.0, True, 'problem_a'), Score(0.0, 10, True, 'problem_b')]),
+            set(summary['raw_scores'])
+        )
+        self.assertEquals([Score(1.0, 12.0, True, 'hw1')], summary['totaled_scores']['Homework'])
+
+    def test_missing_max_grade_needs_modules(self):
+        grader = BulkGrader(mock_course(self.section))
+        self.assertIsNone(grader.grade_from_rows({'problem_a': (1.0, 2.0)}))
+
+    def test_missing_rows_use_module_max_score(self):
+        grader = BulkGrader(mock_course(self.section))
+        module_creator = Mock()
+        module_creator.return_value.max_score.return_value = 5
+        summary = grader.grade_from_rows({'problem_a': (1.0, 2.0)}, True, module_creator)
+        self.assertEquals(
+            set([Score(1.0, 2.0, True, 'problem_a'), Score(0.0, 10, True, 'problem_b')]),
+            set(summary['raw_scores'])
+        )
+
+        # The max score is only looked up once for all students
+        summary = grader.grade_from_rows({'problem_a': (2.0, 2.0)}, True, module_creator)
+        self.assertEquals([Score(2.0, 12.0, True, 'hw1')], summary['totaled_scores']['Homework'])
+        self.assertEquals(1, module_creator.call_count)
+        module_creator.assert_called_with(self.weighted_problem)
+
+    def test_dynamic_children_need_modules(self):
+        self.section.has_dynamic_children.return_value = True
+        grader = BulkGrader(mock_course(self.section))
+        self.assertIsNone(grader.grade_from_rows({'problem_a': (1.0, 2.0), 'problem_b': (1.0, 2.0)}))
+        # But unseen sections still don't need to be graded at all
+        self.assertIsNotNone(grader.grade_from_rows({}))
+
+    def test_always_recalculate_needs_modules(self):
+        self.problem.always_recalculate_grades = True
+        grader = BulkGrader(mock_course(self.section))
+        self.assertIsNone(grader.grade_from_rows({}))
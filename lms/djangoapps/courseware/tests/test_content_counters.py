@@ -0,0 +1,47 @@
+"""
+Tests for courseware.content_counters
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+
+from courseware.content_counters import ContentCounters
+from courseware.models import XModuleContentCounter
+
+DEFINITION_ID = 'i4x://MITx/999/poll_question/first_poll'
+
+
+class ContentCountersTest(TestCase):
+    """
+    Tests for incrementing and summing sharded counters
+    """
+    def setUp(self):
+        cache.clear()
+        self.counters = ContentCounters()
+
+    def test_increments_are_summed(self):
+        for shard in (0, 3, 3, 5):
+            with patch('courseware.content_counters.random.randrange', return_value=shard):
+                self.counters.increment(DEFINITION_ID, 'poll_answers', 'Yes')
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'No', 2)
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'No', -1)
+
+        self.assertEquals(3, XModuleContentCounter.objects.filter(key='Yes').count())
+        self.assertEquals({'Yes': 4, 'No': 1}, self.counters.get_counts(DEFINITION_ID, 'poll_answers'))
+        self.assertEquals({}, self.counters.get_counts(DEFINITION_ID, 'all_words'))
+
+    def test_counts_are_cached(self):
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'Yes')
+        self.assertEquals({'Yes': 1}, self.counters.get_counts(DEFINITION_ID, 'poll_answers'))
+
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'Yes')
+        self.assertEquals({'Yes': 1}, self.counters.get_counts(DEFINITION_ID, 'poll_answers'))
+        self.assertEquals({'Yes': 2}, self.counters.get_counts(DEFINITION_ID, 'poll_answers', fresh=True))
+
+    def test_reset(self):
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'Yes')
+        self.counters.increment(DEFINITION_ID, 'poll_answers', 'No')
+        self.counters.get_counts(DEFINITION_ID, 'poll_answers')
+
+        self.counters.reset(DEFINITION_ID, 'poll_answers', 'Yes')
+        self.assertEquals({'No': 1}, self.counters.get_counts(DEFINITION_ID, 'poll_answers'))
@@ -0,0 +1,98 @@
+"""
+Tests for courseware.grade_cache, the stored per-student gradesets
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock
+
+from courseware import grade_cache
+from courseware.tests.factories import StudentModuleFactory, UserFactory
+from xmodule.graders import Score
+
+COURSE_ID = "MITx/999/Robot_Super_Course"
+
+
+class GradeCacheTest(TestCase):
+    """
+    Tests for storing and invalidating gradesets
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory.create()
+
+    def test_version_is_stable(self):
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        self.assertIsNotNone(version)
+        self.assertEquals(version, grade_cache.current_version(self.user.id, COURSE_ID))
+
+    def test_invalidate_changes_version(self):
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        grade_cache.invalidate(self.user.id, COURSE_ID)
+        self.assertNotEquals(version, grade_cache.current_version(self.user.id, COURSE_ID))
+
+    def test_gradeset_roundtrip(self):
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        sections = {
+            'i4x://MITx/999/sequential/hw1': {
+                'fingerprint': (),
+                'graded_total': Score(0.0, 1.0, True, 'hw1'),
+                'scores': [],
+            }
+        }
+        grade_cache.set_gradeset(self.user.id, COURSE_ID, version, sections)
+        gradeset = grade_cache.get_gradeset(self.user.id, COURSE_ID)
+        self.assertEquals(version, gradeset['version'])
+        self.assertEquals(sections, gradeset['sections'])
+
+    def test_student_module_save_invalidates(self):
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        StudentModuleFactory.create(student=self.user, course_id=COURSE_ID, grade=1, max_grade=2)
+        self.assertNotEquals(version, grade_cache.current_version(self.user.id, COURSE_ID))
+
+    def test_student_module_delete_invalidates(self):
+        module = StudentModuleFactory.create(student=self.user, course_id=COURSE_ID)
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        module.delete()
+        self.assertNotEquals(version, grade_cache.current_version(self.user.id, COURSE_ID))
+
+    def test_other_course_not_invalidated(self):
+        version = grade_cache.current_version(self.user.id, COURSE_ID)
+        StudentModuleFactory.create(student=self.user, course_id='MITx/999/Other_Course')
+        self.assertEquals(version, grade_cache.current_version(self.user.id, COURSE_ID))
+
+    def test_fingerprint(self):
+        first = Mock(module_state_key='a', grade=1, max_grade=2)
+        second = Mock(module_state_key='b', grade=None, max_grade=None)
+        self.assertEquals(
+            grade_cache.section_fingerprint([first, second]),
+            grade_cache.section_fingerprint([second, first])
+        )
+        regraded = Mock(module_state_key='a', grade=2, max_grade=2)
+        self.assertNotEquals(
+            grade_cache.section_fingerprint([first, second]),
+            grade_cache.section_fingerprint([regraded, second])
+        )
+
+    def make_course(self, weight=1.0, data='<problem/>'):
+        problem = Mock(weight=weight, data=data)
+        problem.location.url.return_value = 'i4x://MITx/999/problem/p1'
+        problem.lms.graded = False
+        section = Mock(display_name_with_default='hw1')
+        section.location.url.return_value = 'i4x://MITx/999/sequential/hw1'
+        return Mock(
+            grading_policy={'GRADER': [], 'GRADE_CUTOFFS': {'Pass': 0.5}},
+            grading_context={'graded_sections': {
+                'Homework': [{'section_descriptor': section, 'xmoduledescriptors': [problem]}]
+            }},
+        )
+
+    def test_content_version(self):
+        version = grade_cache.content_version(self.make_course())
+        self.assertEquals(version, grade_cache.content_version(self.make_course()))
+        self.assertNotEquals(version, grade_cache.content_version(self.make_course(weight=2.0)))
+        self.assertNotEquals(version, grade_cache.content_version(self.make_course(data='<problem>2</problem>')))
+
+    @override_settings(GENERATE_PROFILE_SCORES=True)
+    def test_disabled_for_profile_scores(self):
+        self.assertFalse(grade_cache.grade_cache_enabled())
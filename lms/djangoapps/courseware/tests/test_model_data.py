@@ -7,7 +7,7 @@ from functools import partial
 
 from courseware.model_data import LmsKeyValueStore, InvalidWriteError
 from courseware.model_data import InvalidScopeError, ModelDataCache
-from courseware.models import StudentModule, XModuleContentField, XModuleSettingsField
+from courseware.models import StudentModule, StudentModuleHistory, XModuleContentField, XModuleSettingsField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -131,6 +131,30 @@ class TestStudentModuleStorage(TestCase):
         self.assertEquals(1, StudentModule.objects.all().count())
         self.assertEquals({'b_field': 'b_value', 'a_field': 'a_value', 'not_a_field': 'new_value'}, json.loads(StudentModule.objects.all()[0].state))
 
+    def test_set_unchanged_field(self):
+        "Test that setting a user_state field to its current value doesn't save the StudentModule"
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        history_count = StudentModuleHistory.objects.all().count()
+        with patch('courseware.models.StudentModule.save') as mock_save:
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            self.assertFalse(mock_save.called)
+        self.assertEquals(history_count, StudentModuleHistory.objects.all().count())
+
+    def test_state_decoded_once(self):
+        "Test that reading several fields only decodes the StudentModule state once"
+        with patch('courseware.model_data.json.loads', side_effect=json.loads) as mock_loads:
+            self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
+            self.assertEquals('b_value', self.kvs.get(user_state_key('b_field')))
+            self.assertTrue(self.kvs.has(user_state_key('a_field')))
+        self.assertEquals(1, mock_loads.call_count)
+
+    def test_get_returns_copy(self):
+        "Test that changing a value returned by get in place doesn't change the stored state"
+        self.kvs.set(user_state_key('a_field'), {'nested': ['value']})
+        value = self.kvs.get(user_state_key('a_field'))
+        value['nested'].append('other_value')
+        self.assertEquals({'nested': ['value']}, self.kvs.get(user_state_key('a_field')))
+
     def test_delete_existing_field(self):
         "Test that deleting an existing field removes it from the StudentModule"
         self.kvs.delete(user_state_key('a_field'))
@@ -182,6 +182,33 @@ class ModuleRenderTestCase(ModuleStoreTestCase, LoginEnrollmentTestCase):
         self.assertEquals(render.get_score_bucket(11, 10), 'incorrect')
         self.assertEquals(render.get_score_bucket(-1, 10), 'incorrect')
 
+    def test_get_stored_progress(self):
+        graded = Mock(has_score=True, location='i4x://edX/toy/problem/graded', weight=None)
+        graded.get_children.return_value = []
+        ungraded = Mock(has_score=True, location='i4x://edX/toy/problem/ungraded', weight=3)
+        ungraded.get_children.return_value = []
+        vertical = Mock(has_score=False)
+        vertical.get_children.return_value = [graded, ungraded]
+        model_data_cache = Mock()
+        model_data_cache.find.side_effect = lambda key: (
+            Mock(grade=2, max_grade=4) if key.block_scope_id == graded.location else None
+        )
+
+        progress = render.get_stored_progress(self.mock_user, model_data_cache, vertical)
+        self.assertEquals(progress.frac(), (2, 7))
+
+        # weights scale stored grades
+        graded.weight = 2
+        progress = render.get_stored_progress(self.mock_user, model_data_cache, vertical)
+        self.assertEquals(progress.frac(), (1, 5))
+
+        # without a weight, the max score of an ungraded problem isn't known
+        ungraded.weight = None
+        self.assertIsNone(render.get_stored_progress(self.mock_user, model_data_cache, vertical))
+        html = Mock(has_score=False)
+        html.get_children.return_value = []
+        self.assertIsNone(render.get_stored_progress(self.mock_user, model_data_cache, html))
+
     def test_anonymous_modx_dispatch(self):
         dispatch_url = reverse(
             'modx_dispatch',
@@ -332,6 +359,24 @@ class TestHtmlModifiers(ModuleStoreTestCase):
             result_fragment.content
         )
 
+    def test_static_link_rewrite_in_sequence(self):
+        # sequences escape the html of their children, so the children's
+        # links must already be rewritten
+        sequence = ItemFactory.create(category='sequential')
+        ItemFactory.create(parent_location=sequence.location, category='html', data=self.rewrite_link)
+        model_data_cache = ModelDataCache.cache_for_descriptor_descendents(self.course.id, self.user, sequence)
+        module = render.get_module(self.user, self.request, sequence.location, model_data_cache, self.course.id)
+        result_fragment = module.runtime.render(module, None, 'student_view')
+
+        self.assertIn(
+            '/c4x/{org}/{course}/asset/foo_content'.format(
+                org=self.course.location.org,
+                course=self.course.location.course,
+            ),
+            result_fragment.content
+        )
+        self.assertNotIn('/static/foo/content', result_fragment.content)
+
     def test_static_badlink_rewrite(self):
         module = render.get_module(
             self.user,
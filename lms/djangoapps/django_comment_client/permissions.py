@@ -3,6 +3,10 @@ from util.cache import cache
 from django.core import cache
 cache = cache.get_cache('default')
 
+from django_comment_common.models import FORUM_ROLE_STUDENT
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore.django import modulestore
+
 
 def cached_has_permission(user, permission, course_id=None):
     """
@@ -25,6 +29,31 @@ def has_permission(user, permission, course_id=None):
     return False
 
 
+def get_user_permissions(user, course_id=None):
+    """
+    Returns a frozenset of the names of all of the permissions the user has in
+    the course, through any of their roles, as Role.has_permission decides them.
+    Like cached_has_permission, the set is cached for CACHE_LIFESPAN seconds.
+    """
+    CACHE_LIFESPAN = 60
+    key = "permissions_%d_%s" % (user.id, str(course_id))
+    permissions = cache.get(key, None)
+    if permissions is None:
+        permissions = set()
+        course = None
+        for role in user.roles.filter(course_id=course_id).prefetch_related('permissions'):
+            names = [permission.name for permission in role.permissions.all()]
+            if role.name == FORUM_ROLE_STUDENT:
+                if course is None:
+                    course = modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+                if not course.forum_posts_allowed:
+                    names = [name for name in names if not name.startswith(('edit', 'update', 'create'))]
+            permissions.update(names)
+        permissions = frozenset(permissions)
+        cache.set(key, permissions, CACHE_LIFESPAN)
+    return permissions
+
+
 CONDITIONS = ['is_open', 'is_author']
 
 
@@ -49,18 +78,23 @@ def check_condition(user, condition, course_id, data):
     return handlers[condition](user, condition, course_id, data)
 
 
-def check_conditions_permissions(user, permissions, course_id, **kwargs):
+def check_conditions_permissions(user, permissions, course_id, user_permissions=None, **kwargs):
     """
     Accepts a list of permissions and proceed if any of the permission is valid.
     Note that ["can_view", "can_edit"] will proceed if the user has either
     "can_view" or "can_edit" permission. To use AND operator in between, wrap them in
     a list.
+
+    If user_permissions, the set returned by get_user_permissions, is given,
+    permissions are looked up in it rather than one at a time.
     """
 
     def test(user, per, operator="or"):
         if isinstance(per, basestring):
             if per in CONDITIONS:
                 return check_condition(user, per, course_id, kwargs)
+            if user_permissions is not None:
+                return per in user_permissions
             return cached_has_permission(user, per, course_id=course_id)
         elif isinstance(per, list) and operator in ["and", "or"]:
             results = [test(user, x, operator="and") for x in per]
@@ -101,9 +135,9 @@ VIEW_PERMISSIONS = {
 }
 
 
-def check_permissions_by_view(user, course_id, content, name):
+def check_permissions_by_view(user, course_id, content, name, user_permissions=None):
     try:
         p = VIEW_PERMISSIONS[name]
     except KeyError:
         logging.warning("Permission for view named %s does not exist in permissions.py" % name)
-    return check_conditions_permissions(user, p, course_id, content=content)
+    return check_conditions_permissions(user, p, course_id, user_permissions=user_permissions, content=content)
@@ -0,0 +1,33 @@
+"""
+Tests for the comments service client in lms/lib/comment_client
+"""
+import json
+
+from django.test import TestCase
+from mock import Mock, patch
+
+import comment_client as cc
+
+
+def fake_thread_response(method, url, params=None, **kwargs):
+    """Answers a GET of a thread with its id as its title."""
+    thread_id = url.rsplit('/', 1)[-1]
+    return Mock(status_code=200, text=json.dumps({'id': thread_id, 'title': 'Thread ' + thread_id}))
+
+
+@patch('comment_client.utils.requests.Session.request')
+class RetrieveAllTestCase(TestCase):
+    def test_retrieve_all(self, mock_request):
+        mock_request.side_effect = fake_thread_response
+        threads = [cc.Thread(id=str(i)) for i in range(7)]
+        self.assertIs(cc.Thread.retrieve_all(threads), threads)
+        self.assertEqual([thread.title for thread in threads], ['Thread {0}'.format(i) for i in range(7)])
+        self.assertEqual(mock_request.call_count, 7)
+
+    def test_retrieve_all_skips_retrieved(self, mock_request):
+        mock_request.side_effect = fake_thread_response
+        retrieved = cc.Thread(id='1', title='Thread 1')
+        retrieved.retrieved = True
+        threads = cc.Thread.retrieve_all([retrieved, cc.Thread(id='2'), cc.Thread(id='3')])
+        self.assertEqual([thread.title for thread in threads], ['Thread 1', 'Thread 2', 'Thread 3'])
+        self.assertEqual(mock_request.call_count, 2)
@@ -1,7 +1,9 @@
 from django.test import TestCase
+from mock import patch
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from django_comment_common.models import Role, Permission
 from factories import RoleFactory
+from django_comment_client.permissions import get_user_permissions
 import django_comment_client.utils as utils
 
 
@@ -179,3 +181,35 @@ class AccessUtilsTestCase(TestCase):
 
         ret = utils.has_forum_access('student', self.course_id, 'NotARole')
         self.assertFalse(ret)
+
+
+class MetadataForThreadsTestCase(TestCase):
+    def setUp(self):
+        self.course_id = 'edX/toy/2012_Fall'
+        self.moderator_role = RoleFactory(name='Moderator', course_id=self.course_id)
+        self.moderator_role.add_permission('vote')
+        self.moderator_role.add_permission('create_comment')
+        self.moderator = UserFactory(username='moderator', email='staff@edx.org', is_staff=True)
+        self.moderator_role.users.add(self.moderator)
+        self.user_info = {'upvoted_ids': ['2'], 'downvoted_ids': [], 'subscribed_thread_ids': ['1']}
+
+    def make_thread(self, thread_id, closed=False, children=()):
+        return {'id': thread_id, 'type': 'thread', 'closed': closed, 'user_id': '99', 'children': list(children)}
+
+    @patch('django_comment_client.utils.get_user_permissions', side_effect=get_user_permissions)
+    def test_permissions_looked_up_once(self, mock_get_user_permissions):
+        comment = {'id': '2', 'type': 'comment', 'closed': False, 'user_id': str(self.moderator.id)}
+        threads = [self.make_thread('1', children=[comment]), self.make_thread('3', closed=True)]
+        metadata = utils.get_metadata_for_threads(self.course_id, threads, self.moderator, self.user_info)
+
+        self.assertEqual(1, mock_get_user_permissions.call_count)
+        self.assertEqual(set(metadata), set(['1', '2', '3']))
+        self.assertTrue(metadata['1']['subscribed'])
+        self.assertEqual(metadata['2']['voted'], 'up')
+        self.assertTrue(metadata['1']['ability']['can_vote'])
+        self.assertTrue(metadata['1']['ability']['can_reply'])
+        self.assertFalse(metadata['1']['ability']['editable'])
+        self.assertFalse(metadata['3']['ability']['can_vote'])
+        self.assertFalse(metadata['3']['ability']['can_reply'])
+        self.assertTrue(metadata['2']['ability']['can_vote'])
+        self.assertFalse(metadata['2']['ability']['can_endorse'])
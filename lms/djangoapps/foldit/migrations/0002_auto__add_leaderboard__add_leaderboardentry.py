@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'Leaderboard'
+        db.create_table('foldit_leaderboard', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('puzzle_set', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('course_id', self.gf('django.db.models.fields.CharField')(max_length=255, blank=True)),
+        ))
+        db.send_create_signal('foldit', ['Leaderboard'])
+
+        # Adding unique constraint on 'Leaderboard', fields ['puzzle_set', 'course_id']
+        db.create_unique('foldit_leaderboard', ['puzzle_set', 'course_id'])
+
+        # Adding model 'LeaderboardEntry'
+        db.create_table('foldit_leaderboardentry', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('leaderboard', self.gf('django.db.models.fields.related.ForeignKey')(related_name='entries', to=orm['foldit.Leaderboard'])),
+            ('user', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['auth.User'])),
+            ('total_score', self.gf('django.db.models.fields.FloatField')()),
+        ))
+        db.send_create_signal('foldit', ['LeaderboardEntry'])
+
+        # Adding unique constraint on 'LeaderboardEntry', fields ['leaderboard', 'user']
+        db.create_unique('foldit_leaderboardentry', ['leaderboard_id', 'user_id'])
+
+        # Adding index on 'LeaderboardEntry', fields ['leaderboard', 'total_score']
+        db.create_index('foldit_leaderboardentry', ['leaderboard_id', 'total_score'])
+
+
+    def backwards(self, orm):
+        # Removing index on 'LeaderboardEntry', fields ['leaderboard', 'total_score']
+        db.delete_index('foldit_leaderboardentry', ['leaderboard_id', 'total_score'])
+
+        # Removing unique constraint on 'LeaderboardEntry', fields ['leaderboard', 'user']
+        db.delete_unique('foldit_leaderboardentry', ['leaderboard_id', 'user_id'])
+
+        # Removing unique constraint on 'Leaderboard', fields ['puzzle_set', 'course_id']
+        db.delete_unique('foldit_leaderboard', ['puzzle_set', 'course_id'])
+
+        # Deleting model 'LeaderboardEntry'
+        db.delete_table('foldit_leaderboardentry')
+
+        # Deleting model 'Leaderboard'
+        db.delete_table('foldit_leaderboard')
+
+
+    models = {
+        'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': "orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        'auth.permission': {
+            'Meta': {'ordering': "('content_type__app_label', 'content_type__model', 'codename')", 'unique_together': "(('content_type', 'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['contenttypes.ContentType']"}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'to': "orm['auth.Group']", 'symmetrical': 'False', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': "orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        'foldit.leaderboard': {
+            'Meta': {'unique_together': "(('puzzle_set', 'course_id'),)", 'object_name': 'Leaderboard'},
+            'course_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'puzzle_set': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        'foldit.leaderboardentry': {
+            'Meta': {'unique_together': "(('leaderboard', 'user'),)", 'object_name': 'LeaderboardEntry'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'leaderboard': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'entries'", 'to': "orm['foldit.Leaderboard']"}),
+            'total_score': ('django.db.models.fields.FloatField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['auth.User']"})
+        },
+        'foldit.puzzlecomplete': {
+            'Meta': {'ordering': "['puzzle_id']", 'unique_together': "(('user', 'puzzle_id', 'puzzle_set', 'puzzle_subset'),)", 'object_name': 'PuzzleComplete'},
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'puzzle_id': ('django.db.models.fields.IntegerField', [], {}),
+            'puzzle_set': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'puzzle_subset': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'unique_user_id': ('django.db.models.fields.CharField', [], {'max_length': '50', 'db_index': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'foldit_puzzles_complete'", 'to': "orm['auth.User']"})
+        },
+        'foldit.score': {
+            'Meta': {'object_name': 'Score'},
+            'best_score': ('django.db.models.fields.FloatField', [], {'db_index': 'True'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'current_score': ('django.db.models.fields.FloatField', [], {'db_index': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'puzzle_id': ('django.db.models.fields.IntegerField', [], {}),
+            'score_version': ('django.db.models.fields.IntegerField', [], {}),
+            'unique_user_id': ('django.db.models.fields.CharField', [], {'max_length': '50', 'db_index': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'foldit_scores'", 'to': "orm['auth.User']"})
+        }
+    }
+
+    complete_apps = ['foldit']
\ No newline at end of file
@@ -1,11 +1,21 @@
 import logging
+from collections import defaultdict
+from uuid import uuid4
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.cache import cache
+from django.db import models, IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from student.models import CourseEnrollment
 
 
 log = logging.getLogger(__name__)
 
+# How many seconds lists of top scores are cached for
+LEADERBOARD_CACHE_TIMEOUT = 5 * 60
+
 
 class Score(models.Model):
     """
@@ -56,26 +66,195 @@ class Score(models.Model):
 
         if not isinstance(puzzles, list):
             puzzles = [puzzles]
-        if course_list is None:
-            scores = Score.objects \
-                .filter(puzzle_id__in=puzzles) \
-                .annotate(total_score=models.Sum('best_score')) \
-                .order_by('total_score')[:n]
-        else:
-            scores = Score.objects \
-                .filter(puzzle_id__in=puzzles) \
-                .filter(user__courseenrollment__course_id__in=course_list) \
-                .annotate(total_score=models.Sum('best_score')) \
-                .order_by('total_score')[:n]
         num = len(puzzles)
 
+        if course_list is None:
+            course_list = [Leaderboard.ALL_COURSES]
+        leaders = {}
+        for course_id in course_list:
+            for username, total_score in Leaderboard.get(puzzles, course_id).top_n(n):
+                leaders[username] = total_score
+        # Students enrolled in several of the courses have the same total in each
+        top = sorted(leaders.items(), key=lambda leader: (leader[1], leader[0]))[:n]
+
         return [
-            {'username': score.user.username,
-             'score': Score.display_score(score.total_score, num)}
-            for score in scores
+            {'username': username,
+             'score': Score.display_score(total_score, num)}
+            for username, total_score in top
         ]
 
 
+class Leaderboard(models.Model):
+    """
+    The totals of the best scores of students on a set of puzzles, among the
+    students enrolled in a course (or all students), kept up to date as scores
+    are saved so that the top scores can be read without adding them all up.
+
+    A leaderboard is created, from all the scores saved so far, when its top
+    scores are first asked for.
+    """
+    class Meta:
+        unique_together = ('puzzle_set', 'course_id')
+
+    # The course_id of the leaderboard of students in all courses
+    ALL_COURSES = ''
+
+    # The sorted, comma separated ids of the puzzles
+    puzzle_set = models.CharField(max_length=255)
+    course_id = models.CharField(max_length=255, blank=True)
+
+    @staticmethod
+    def puzzle_set_key(puzzles):
+        """
+        Returns the puzzle_set of the leaderboard of `puzzles`.
+        """
+        return ','.join(str(puzzle_id) for puzzle_id in sorted(set(int(puzzle_id) for puzzle_id in puzzles)))
+
+    @property
+    def puzzle_ids(self):
+        return [int(puzzle_id) for puzzle_id in self.puzzle_set.split(',')]
+
+    @staticmethod
+    def get(puzzles, course_id):
+        """
+        Returns the Leaderboard of the `puzzles` among the students of the course
+        `course_id`, creating it if needed.
+        """
+        leaderboard, created = Leaderboard.objects.get_or_create(
+            puzzle_set=Leaderboard.puzzle_set_key(puzzles), course_id=course_id
+        )
+        if created:
+            leaderboard.rebuild()
+        return leaderboard
+
+    def _scores(self):
+        """
+        The scores of the puzzles of the leaderboard, of the students it includes.
+        """
+        scores = Score.objects.filter(puzzle_id__in=self.puzzle_ids)
+        if self.course_id != Leaderboard.ALL_COURSES:
+            scores = scores.filter(user__courseenrollment__course_id=self.course_id)
+        return scores
+
+    @staticmethod
+    def _totals(scores):
+        """
+        Returns a dict of the total of each user's best scores on each puzzle
+        among `scores`.
+        """
+        totals = defaultdict(float)
+        for best in scores.values('user', 'puzzle_id').annotate(best=models.Min('best_score')):
+            totals[best['user']] += best['best']
+        return totals
+
+    def rebuild(self):
+        """
+        Replace the totals of all users with ones computed from their scores.
+        """
+        for attempt in range(2):
+            savepoint = transaction.savepoint()
+            try:
+                self.entries.all().delete()
+                LeaderboardEntry.objects.bulk_create(
+                    LeaderboardEntry(leaderboard=self, user_id=user_id, total_score=total_score)
+                    for user_id, total_score in Leaderboard._totals(self._scores()).iteritems()
+                )
+                transaction.savepoint_commit(savepoint)
+                break
+            except IntegrityError:
+                # A score was saved while the leaderboard was being built:
+                # try again, including it.
+                transaction.savepoint_rollback(savepoint)
+                if attempt:
+                    raise
+        self.invalidate()
+
+    def update_user(self, user):
+        """
+        Recompute the total of `user`, whose scores have changed.
+        """
+        totals = Leaderboard._totals(self._scores().filter(user=user))
+        if user.id not in totals:
+            return
+        entry, created = LeaderboardEntry.objects.get_or_create(
+            leaderboard=self, user=user, defaults={'total_score': totals[user.id]}
+        )
+        if not created and entry.total_score != totals[user.id]:
+            entry.total_score = totals[user.id]
+            entry.save()
+        self.invalidate()
+
+    @staticmethod
+    def update_scores(user, puzzle_ids, course_ids=None):
+        """
+        Update the leaderboards of any of `puzzle_ids` that include `user`,
+        whose scores on those puzzles have changed.  If `course_ids` is not
+        None, only the leaderboards of those courses (or of all courses) are
+        updated.
+        """
+        puzzle_ids = set(int(puzzle_id) for puzzle_id in puzzle_ids)
+        if course_ids is None:
+            course_ids = CourseEnrollment.objects.filter(user=user).values_list('course_id', flat=True)
+        course_ids = set(course_ids)
+        course_ids.add(Leaderboard.ALL_COURSES)
+        for leaderboard in Leaderboard.objects.filter(course_id__in=course_ids):
+            if puzzle_ids.intersection(leaderboard.puzzle_ids):
+                leaderboard.update_user(user)
+
+    def _version_key(self):
+        return u'foldit.leaderboard.version.{0}'.format(self.id)
+
+    def invalidate(self):
+        """
+        Mark the cached top scores of the leaderboard as out of date.
+        """
+        cache.set(self._version_key(), uuid4().hex, None)
+
+    def top_n(self, n):
+        """
+        Returns the usernames and total scores of the `n` users with the best
+        (lowest) totals, best first.
+        """
+        version = cache.get(self._version_key())
+        if version is None:
+            version = uuid4().hex
+            cache.set(self._version_key(), version, None)
+        cache_key = u'foldit.leaderboard.top.{0}.{1}.{2}'.format(self.id, version, n)
+        top = cache.get(cache_key)
+        if top is None:
+            top = list(self.entries.order_by('total_score', 'user__username')
+                       .values_list('user__username', 'total_score')[:n])
+            cache.set(cache_key, top, LEADERBOARD_CACHE_TIMEOUT)
+        return top
+
+
+class LeaderboardEntry(models.Model):
+    """
+    The total of the best scores of a user on the puzzles of a Leaderboard.
+
+    The table is indexed on (leaderboard, total_score) by its migration, for
+    reading the top scores in order.
+    """
+    class Meta:
+        unique_together = ('leaderboard', 'user')
+
+    leaderboard = models.ForeignKey(Leaderboard, related_name='entries')
+    user = models.ForeignKey(User)
+    total_score = models.FloatField()
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def add_enrolled_user_to_leaderboards(sender, instance, created, **kwargs):
+    """
+    Add the scores of a user who enrolls in a course to its leaderboards.
+    """
+    if not created:
+        return
+    puzzle_ids = Score.objects.filter(user=instance.user_id).values_list('puzzle_id', flat=True).distinct()
+    if puzzle_ids:
+        Leaderboard.update_scores(instance.user, puzzle_ids, course_ids=[instance.course_id])
+
+
 class PuzzleComplete(models.Model):
     """
     This keeps track of the sets of puzzles completed by each user.
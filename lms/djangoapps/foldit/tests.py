@@ -7,7 +7,7 @@ from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
 
 from foldit.views import foldit_ops, verify_code
-from foldit.models import PuzzleComplete, Score
+from foldit.models import Leaderboard, LeaderboardEntry, PuzzleComplete, Score
 from student.models import unique_id_for_user
 from student.tests.factories import CourseEnrollmentFactory, UserFactory, UserProfileFactory
 
@@ -231,6 +231,39 @@ class FolditTestCase(TestCase):
         # Top score user should be self.user2.username
         self.assertEqual(top_10[0]['username'], self.user2.username)
 
+    def test_SetPlayerPuzzleScores_leaderboard(self):
+        """
+        Check that saving scores updates the leaderboards already built,
+        rather than rebuilding them, and that new enrollments are added.
+        """
+        puzzle_ids = [1, 2]
+        self.make_puzzle_score_request(puzzle_ids, [0.05, 0.03], self.user)
+        top_10 = Score.get_tops_n(10, puzzle_ids, [self.course_id])
+        self.assertEqual([leader['username'] for leader in top_10], [self.user.username])
+        self.assertEqual(top_10[0]['score'], Score.display_score(0.08, 2))
+
+        leaderboard = Leaderboard.get(puzzle_ids, self.course_id)
+        self.assertEqual(leaderboard.puzzle_set, '1,2')
+        self.assertEqual(LeaderboardEntry.objects.filter(leaderboard=leaderboard).count(), 1)
+
+        # A better score replaces the cached top scores
+        self.make_puzzle_score_request([2], [0.01], self.user)
+        top_10 = Score.get_tops_n(10, [2, 1], [self.course_id])
+        self.assertAlmostEqual(top_10[0]['score'], Score.display_score(0.06, 2), delta=0.5)
+        self.assertAlmostEqual(LeaderboardEntry.objects.get(leaderboard=leaderboard).total_score, 0.06)
+
+        # Scores of students in other courses are left out, until they enroll
+        self.make_puzzle_score_request(puzzle_ids, [0.01, 0.02], self.user2)
+        top_10 = Score.get_tops_n(10, puzzle_ids, [self.course_id])
+        self.assertEqual([leader['username'] for leader in top_10], [self.user.username])
+
+        CourseEnrollmentFactory.create(user=self.user2, course_id=self.course_id)
+        top_10 = Score.get_tops_n(10, puzzle_ids, [self.course_id])
+        self.assertEqual(
+            [leader['username'] for leader in top_10],
+            [self.user2.username, self.user.username]
+        )
+
     def test_SetPlayerPuzzleScores_error(self):
 
         scores = [{"PuzzleID": 994391,
@@ -7,7 +7,7 @@ from django.http import HttpResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 
-from foldit.models import Score, PuzzleComplete
+from foldit.models import Leaderboard, Score, PuzzleComplete
 from student.models import unique_id_for_user
 
 import re
@@ -143,6 +143,8 @@ def save_scores(user, puzzle_scores):
         score_responses.append({'PuzzleID': puzzle_id,
                                 'Status': 'Success'})
 
+    Leaderboard.update_scores(user, [score['PuzzleID'] for score in puzzle_scores])
+
     return {"OperationID": "SetPlayerPuzzleScores", "Value": score_responses}
 
 
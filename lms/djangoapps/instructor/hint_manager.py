@@ -15,10 +15,12 @@ from django_future.csrf import ensure_csrf_cookie
 
 from mitxmako.shortcuts import render_to_response, render_to_string
 
+from courseware.content_counters import CONTENT_COUNTERS
 from courseware.courses import get_course_with_access
 from courseware.models import XModuleContentField
 import courseware.module_render as module_render
 import courseware.model_data as model_data
+from xmodule.crowdsource_hinter import add_hint_votes, hint_vote_key
 from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 
@@ -118,8 +120,12 @@ def get_hints(request, course_id, field):
                 # Put all non-numerical answers first.
                 return float('-inf')
 
+        hints = json.loads(hints_by_problem.value)
+        if field == 'hints':
+            # Votes on approved hints are kept by content counters.
+            add_hint_votes(hints, CONTENT_COUNTERS.get_counts(hints_by_problem.definition_id, 'hints', fresh=True))
         # Answer list contains [answer, dict_of_hints] pairs.
-        answer_list = sorted(json.loads(hints_by_problem.value).items(), key=answer_sorter)
+        answer_list = sorted(hints.items(), key=answer_sorter)
         big_out_dict[hints_by_problem.definition_id] = answer_list
 
     render_dict = {'field': field,
@@ -170,6 +176,8 @@ def delete_hints(request, course_id, field):
         del problem_dict[answer][pk]
         this_problem.value = json.dumps(problem_dict)
         this_problem.save()
+        if field == 'hints':
+            CONTENT_COUNTERS.reset(problem_id, 'hints', hint_vote_key(answer, pk))
 
 
 def change_votes(request, course_id, field):
@@ -196,6 +204,9 @@ def change_votes(request, course_id, field):
         problem_dict[answer][pk][1] = int(new_votes)
         this_problem.value = json.dumps(problem_dict)
         this_problem.save()
+        if field == 'hints':
+            # The new number of votes replaces the votes counted so far.
+            CONTENT_COUNTERS.reset(problem_id, 'hints', hint_vote_key(answer, pk))
 
 
 def add_hint(request, course_id, field):
@@ -8,6 +8,7 @@ from courseware.courses import get_course_by_id
 from xmodule.modulestore.django import modulestore
 
 from django.core.management.base import BaseCommand
+from optparse import make_option
 
 
 class Command(BaseCommand):
@@ -16,6 +17,15 @@ class Command(BaseCommand):
     help += "   course_id_or_dir: either course_id or course_dir\n"
     help += 'Example course_id: MITx/8.01rq_MW/Classical_Mechanics_Reading_Questions_Fall_2012_MW_Section'
 
+    option_list = BaseCommand.option_list + (
+        make_option('--processes',
+                    action='store',
+                    type='int',
+                    dest='processes',
+                    default=None,
+                    help='Number of worker processes to grade students with'),
+    )
+
     def handle(self, *args, **options):
 
         print "args = ", args
@@ -40,4 +50,4 @@ class Command(BaseCommand):
         print "-----------------------------------------------------------------------------"
         print "Computing grades for %s" % (course.id)
 
-        offline_grade_calculation(course.id)
+        offline_grade_calculation(course.id, processes=options.get('processes'))
@@ -9,9 +9,15 @@ import json
 import time
 
 from json import JSONEncoder
+from multiprocessing import Pool
 from courseware import grades, models
+from courseware.bulk_grades import iterate_grades_for
 from courseware.courses import get_course_by_id
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+# Number of students graded, and written to the DB, at a time
+OFFLINE_GRADE_CHUNK_SIZE = 500
 
 
 class MyEncoder(JSONEncoder):
@@ -25,47 +31,90 @@ class MyEncoder(JSONEncoder):
             yield chunk
 
 
-def offline_grade_calculation(course_id):
+def _save_gradesets(course_id, gradesets):
+    """
+    Replace the OfflineComputedGrades for the given students with new ones,
+    using a single delete and a single bulk insert.
+
+    gradesets: a list of (user_id, gradeset) tuples
+    """
+    enc = MyEncoder()
+    with transaction.commit_on_success():
+        models.OfflineComputedGrade.objects.filter(
+            course_id=course_id,
+            user__in=[user_id for user_id, _ in gradesets]
+        ).delete()
+        models.OfflineComputedGrade.objects.bulk_create([
+            models.OfflineComputedGrade(user_id=user_id, course_id=course_id, gradeset=enc.encode(gradeset))
+            for user_id, gradeset in gradesets
+        ])
+
+
+def _close_db_connection():
+    """
+    Pool initializer: forked workers must not share the parent's database connection.
+    """
+    connection.close()
+
+
+def _grade_chunk(args):
+    """
+    Grade a chunk of students and store their OfflineComputedGrades.
+    Runs in a worker process.
+
+    args: a tuple (course_id, student_ids)
+
+    Returns the number of students graded.
+    """
+    course_id, student_ids = args
+    course = get_course_by_id(course_id)
+    students = User.objects.filter(id__in=student_ids).prefetch_related("groups")
+
+    gradesets = []
+    for student, gradeset in iterate_grades_for(course, students, keep_raw_scores=True):
+        gradesets.append((student.id, gradeset))
+    _save_gradesets(course_id, gradesets)
+    return len(gradesets)
+
+
+def offline_grade_calculation(course_id, processes=None, chunk_size=OFFLINE_GRADE_CHUNK_SIZE):
     '''
     Compute grades for all students for a specified course, and save results to the DB.
+
+    Students are split into chunks of consecutive ids. Each chunk is graded by
+    courseware.bulk_grades.iterate_grades_for and its results are written in
+    bulk. If processes is greater than 1, the chunks are graded in a pool of
+    that many worker processes.
     '''
 
     tstart = time.time()
-    enrolled_students = User.objects.filter(
+    student_ids = list(User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1
-    ).prefetch_related("groups").order_by('username')
-
-    enc = MyEncoder()
-
-    class DummyRequest(object):
-        META = {}
-        def __init__(self):
-            return
-        def get_host(self):
-            return 'edx.mit.edu'
-        def is_secure(self):
-            return False
-
-    print "%d enrolled students" % len(enrolled_students)
-    course = get_course_by_id(course_id)
-
-    for student in enrolled_students:
-        request = DummyRequest()
-        request.user = student
-        request.session = {}
-
-        gradeset = grades.grade(student, request, course, keep_raw_scores=True)
-        gs = enc.encode(gradeset)
-        ocg, created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_id)
-        ocg.gradeset = gs
-        ocg.save()
-        print "%s done" % student  	# print statement used because this is run by a management command
+    ).order_by('id').values_list('id', flat=True))
+
+    print "%d enrolled students" % len(student_ids)
+    chunks = [(course_id, student_ids[i:i + chunk_size]) for i in range(0, len(student_ids), chunk_size)]
+
+    if processes is not None and processes > 1:
+        # Close the connection before forking, so the workers don't inherit it
+        connection.close()
+        pool = Pool(processes=processes, initializer=_close_db_connection)
+        try:
+            results = pool.imap_unordered(_grade_chunk, chunks)
+            for ngraded in results:
+                print "%d students done" % ngraded  	# print statement used because this is run by a management command
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for chunk in chunks:
+            print "%d students done" % _grade_chunk(chunk)
 
     tend = time.time()
     dt = tend - tstart
 
-    ocgl = models.OfflineComputedGradeLog(course_id=course_id, seconds=dt, nstudents=len(enrolled_students))
+    ocgl = models.OfflineComputedGradeLog(course_id=course_id, seconds=dt, nstudents=len(student_ids))
     ocgl.save()
     print ocgl
     print "All Done!"
@@ -31,6 +31,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.html_module import HtmlDescriptor
 
 from courseware import grades
+from courseware.bulk_grades import iterate_grades_for
 from courseware.access import (has_access, get_access_group_name,
                                course_beta_test_group_name)
 from courseware.courses import get_course_with_access
@@ -1072,9 +1073,23 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
 
     header = ['ID', 'Username', 'Full Name', 'edX email', 'External email']
     assignments = []
+
+    gradesets = {}
+    if get_grades and not use_offline:
+        # grade everyone in a single pass over the course's StudentModules
+        gradesets = dict(
+            (student.id, gradeset) for student, gradeset
+            in iterate_grades_for(course, enrolled_students, request, keep_raw_scores=get_raw_scores)
+        )
+
+    def get_gradeset(student):
+        if student.id in gradesets:
+            return gradesets[student.id]
+        return student_grades(student, request, course, keep_raw_scores=get_raw_scores, use_offline=use_offline)
+
     if get_grades and enrolled_students.count() > 0:
         # just to construct the header
-        gradeset = student_grades(enrolled_students[0], request, course, keep_raw_scores=get_raw_scores, use_offline=use_offline)
+        gradeset = get_gradeset(enrolled_students[0])
         # log.debug('student {0} gradeset {1}'.format(enrolled_students[0], gradeset))
         if get_raw_scores:
             assignments += [score.section for score in gradeset['raw_scores']]
@@ -1093,7 +1108,7 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
             datarow.append('')
 
         if get_grades:
-            gradeset = student_grades(student, request, course, keep_raw_scores=get_raw_scores, use_offline=use_offline)
+            gradeset = get_gradeset(student)
             log.debug('student={0}, gradeset={1}'.format(student, gradeset))
             if get_raw_scores:
                 # TODO (ichuang) encode Score as dict instead of as list, so score[0] -> score['earned']
@@ -175,3 +175,37 @@ class InstructorTask(models.Model):
     def create_output_for_revoked():
         """Creates standard message to store in output format for revoked tasks."""
         return json.dumps({'message': 'Task revoked before running'})
+
+
+class InstructorTaskChunk(models.Model):
+    """
+    A range of the StudentModule ids visited by an InstructorTask, which is
+    updated as a unit, possibly by a subtask of its own.
+
+    `first_id` and `last_id` bound the range of StudentModule ids (inclusive).
+    `checkpoint_id` is the id of the last StudentModule in the range known to
+        have been processed: a chunk that is retried resumes after it.
+    `num_attempted` and `num_updated` count the StudentModules processed up to
+        the checkpoint.
+    `state` is PENDING until a task claims the chunk, STARTED while a task works
+        on it, and SUCCESS or FAILURE once it is done.  A chunk that fails goes
+        back to PENDING until it has been tried `MAX_ATTEMPTS` times.
+    `attempts` counts how many times the chunk has been claimed.
+    `error` is the message of the exception that made the chunk fail.
+    `modified` is when a task last claimed or checkpointed the chunk.
+    """
+    MAX_ATTEMPTS = 3
+
+    instructor_task = models.ForeignKey(InstructorTask, db_index=True)
+    first_id = models.IntegerField()
+    last_id = models.IntegerField()
+    checkpoint_id = models.IntegerField(null=True)
+    num_attempted = models.IntegerField(default=0)
+    num_updated = models.IntegerField(default=0)
+    state = models.CharField(max_length=50, db_index=True)
+    attempts = models.IntegerField(default=0)
+    error = models.CharField(max_length=1024, null=True)
+    modified = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('instructor_task', 'first_id'),)
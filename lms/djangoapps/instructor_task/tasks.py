@@ -18,14 +18,32 @@ object contains a 'task_input' row which is a JSON-encoded dict containing
 a problem URL and optionally a student.  These are used to set up the initial value
 of the query for traversing StudentModule objects.
 
+When a task visits many StudentModule objects, they are split into chunks that are
+updated in parallel by update_problem_module_state_chunk subtasks.
+
 """
 from celery import task
+from instructor_task.models import InstructorTask
 from instructor_task.tasks_helper import (update_problem_module_state,
+                                          update_module_state_chunk,
                                           rescore_problem_module_state,
                                           reset_attempts_module_state,
                                           delete_problem_module_state)
 
 
+def _filter_done_problems(modules_to_update):
+    """Limits a query for StudentModule objects to problems that have been answered."""
+    return modules_to_update.filter(state__contains='"done": true')
+
+
+# the (update_fcn, action_name, filter_fcn) performed by each task_type
+MODULE_STATE_UPDATES = {
+    'rescore_problem': (rescore_problem_module_state, 'rescored', _filter_done_problems),
+    'reset_problem_attempts': (reset_attempts_module_state, 'reset', None),
+    'delete_problem_state': (delete_problem_module_state, 'deleted', None),
+}
+
+
 @task
 def rescore_problem(entry_id, xmodule_instance_args):
     """Rescores a problem in a course, for all students or one specific student.
@@ -45,12 +63,11 @@ def rescore_problem(entry_id, xmodule_instance_args):
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
     """
-    action_name = 'rescored'
-    update_fcn = rescore_problem_module_state
-    filter_fcn = lambda(modules_to_update): modules_to_update.filter(state__contains='"done": true')
+    update_fcn, action_name, filter_fcn = MODULE_STATE_UPDATES['rescore_problem']
     return update_problem_module_state(entry_id,
                                        update_fcn, action_name, filter_fcn=filter_fcn,
-                                       xmodule_instance_args=xmodule_instance_args)
+                                       xmodule_instance_args=xmodule_instance_args,
+                                       chunk_task=update_problem_module_state_chunk)
 
 
 @task
@@ -68,11 +85,11 @@ def reset_problem_attempts(entry_id, xmodule_instance_args):
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
     """
-    action_name = 'reset'
-    update_fcn = reset_attempts_module_state
+    update_fcn, action_name, filter_fcn = MODULE_STATE_UPDATES['reset_problem_attempts']
     return update_problem_module_state(entry_id,
-                                       update_fcn, action_name, filter_fcn=None,
-                                       xmodule_instance_args=xmodule_instance_args)
+                                       update_fcn, action_name, filter_fcn=filter_fcn,
+                                       xmodule_instance_args=xmodule_instance_args,
+                                       chunk_task=update_problem_module_state_chunk)
 
 
 @task
@@ -90,8 +107,24 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
     """
-    action_name = 'deleted'
-    update_fcn = delete_problem_module_state
+    update_fcn, action_name, filter_fcn = MODULE_STATE_UPDATES['delete_problem_state']
     return update_problem_module_state(entry_id,
-                                       update_fcn, action_name, filter_fcn=None,
-                                       xmodule_instance_args=xmodule_instance_args)
+                                       update_fcn, action_name, filter_fcn=filter_fcn,
+                                       xmodule_instance_args=xmodule_instance_args,
+                                       chunk_task=update_problem_module_state_chunk)
+
+
+@task
+def update_problem_module_state_chunk(entry_id, chunk_id, xmodule_instance_args):
+    """Updates one chunk of the StudentModules of a task started by one of the tasks above.
+
+    `entry_id` is the id value of the InstructorTask entry that corresponds to the parent task,
+    whose `task_type` determines the update that is performed.  `chunk_id` is the id value of
+    the InstructorTaskChunk to update.
+
+    Returns whether this task updated the chunk, rather than finding it already being updated
+    by another task.
+    """
+    task_type = InstructorTask.objects.get(id=entry_id).task_type
+    update_fcn, action_name, filter_fcn = MODULE_STATE_UPDATES[task_type]
+    return update_module_state_chunk(chunk_id, update_fcn, action_name, filter_fcn, xmodule_instance_args)
@@ -5,17 +5,20 @@ running state of a course.
 """
 
 import json
-from time import time
+from datetime import timedelta
+from time import time, sleep
 from sys import exc_info
 from traceback import format_exc
 
 from celery import current_task
 from celery.utils.log import get_task_logger
 from celery.signals import worker_process_init
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, PENDING, STARTED
 
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
 from dogapi import dog_stats_api
 
 from xmodule.modulestore.django import modulestore
@@ -26,7 +29,7 @@ from track.views import task_track
 from courseware.models import StudentModule
 from courseware.model_data import ModelDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_task.models import InstructorTask, PROGRESS
+from instructor_task.models import InstructorTask, InstructorTaskChunk, PROGRESS
 
 # define different loggers for use within tasks and on client side
 TASK_LOG = get_task_logger(__name__)
@@ -34,6 +37,22 @@ TASK_LOG = get_task_logger(__name__)
 # define value to use when no task_id is provided:
 UNKNOWN_TASK_ID = 'unknown-task_id'
 
+# tasks visiting more StudentModules than this split them into chunks of this many,
+# which are updated in parallel by subtasks
+MODULES_PER_CHUNK = 1000
+
+# report progress (and checkpoint chunks) after this many seconds, or this many
+# StudentModules, whichever comes first
+PROGRESS_INTERVAL_SECONDS = 5
+PROGRESS_INTERVAL_MODULES = 100
+
+# a chunk that hasn't been checkpointed for this many seconds is assumed to
+# have been abandoned by its task, and may be taken over by another
+CHUNK_TIMEOUT_SECONDS = 300
+
+# how many seconds to wait before checking on chunks being updated by subtasks
+CHUNK_POLL_SECONDS = 2
+
 
 def initialize_mako(sender=None, conf=None, **kwargs):
     """
@@ -70,8 +89,174 @@ def _get_current_task():
     return current_task
 
 
+def _get_modules_to_update(course_id, module_state_key, student_identifier, filter_fcn):
+    """
+    Returns the query for the StudentModule instances matching the specified `course_id` and
+    `module_state_key`, the student identified by `student_identifier` (if not None), and `filter_fcn`
+    (if not None), and whether it was limited to a single student.
+    """
+    # find the module in question
+    modules_to_update = StudentModule.objects.filter(course_id=course_id,
+                                                     module_state_key=module_state_key)
+
+    # give the option of rescoring an individual student. If not specified,
+    # then rescores all students who have responded to a problem so far
+    student = None
+    if student_identifier is not None:
+        # if an identifier is supplied, then look for the student,
+        # and let it throw an exception if none is found.
+        if "@" in student_identifier:
+            student = User.objects.get(email=student_identifier)
+        elif student_identifier is not None:
+            student = User.objects.get(username=student_identifier)
+
+    if student is not None:
+        modules_to_update = modules_to_update.filter(student_id=student.id)
+
+    if filter_fcn is not None:
+        modules_to_update = filter_fcn(modules_to_update)
+
+    return modules_to_update, student is not None
+
+
+def _update_modules(module_descriptor, modules_to_update, update_fcn, action_name, xmodule_instance_args,
+                    report_progress):
+    """
+    Calls `update_fcn` on each of `modules_to_update`, in order of id.
+
+    `report_progress` is called with the number of modules attempted and updated so far, and the id of the
+    last module attempted, every PROGRESS_INTERVAL_SECONDS or PROGRESS_INTERVAL_MODULES modules, and once
+    all of the modules have been visited.
+
+    Returns the number of modules attempted and updated.
+    """
+    num_updated = 0
+    num_attempted = 0
+    last_id = None
+    last_report_time = time()
+    last_report_attempted = 0
+    for module_to_update in modules_to_update.order_by('id'):
+        num_attempted += 1
+        last_id = module_to_update.id
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=['action:{name}'.format(name=action_name)]):
+            if update_fcn(module_descriptor, module_to_update, xmodule_instance_args):
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                num_updated += 1
+
+        # update task status, but not for every module:
+        if (num_attempted - last_report_attempted >= PROGRESS_INTERVAL_MODULES or
+                time() - last_report_time >= PROGRESS_INTERVAL_SECONDS):
+            report_progress(num_attempted, num_updated, last_id)
+            last_report_time = time()
+            last_report_attempted = num_attempted
+
+    report_progress(num_attempted, num_updated, last_id)
+    return num_attempted, num_updated
+
+
+def _get_or_create_chunks(entry_id, modules_to_update):
+    """
+    Returns the InstructorTaskChunks of the InstructorTask `entry_id`, first splitting the ids of
+    `modules_to_update` into chunks of MODULES_PER_CHUNK if that hasn't been done yet.  A task that
+    is run again resumes with the chunks of its last run, retrying those that failed.
+    """
+    chunks = InstructorTaskChunk.objects.filter(instructor_task_id=entry_id)
+    if chunks.exists():
+        chunks.filter(state=FAILURE).update(state=PENDING, attempts=0, error=None)
+        return list(chunks.order_by('first_id'))
+
+    module_ids = modules_to_update.order_by('id').values_list('id', flat=True)
+    bounds = []
+    for index, module_id in enumerate(module_ids.iterator()):
+        if index % MODULES_PER_CHUNK == 0:
+            bounds.append([module_id, module_id])
+        else:
+            bounds[-1][1] = module_id
+
+    now = timezone.now()
+    for first_id, last_id in bounds:
+        InstructorTaskChunk.objects.create(instructor_task_id=entry_id, first_id=first_id, last_id=last_id,
+                                           state=PENDING, modified=now)
+    return list(InstructorTaskChunk.objects.filter(instructor_task_id=entry_id).order_by('first_id'))
+
+
+def _claim_chunk(chunk):
+    """
+    Marks `chunk` as STARTED by the caller, if no other task is working on it.
+
+    Returns whether the chunk was claimed.
+    """
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=CHUNK_TIMEOUT_SECONDS)
+    claimed = InstructorTaskChunk.objects.filter(id=chunk.id).filter(
+        Q(state=PENDING) | Q(state=STARTED, modified__lt=abandoned)
+    ).update(state=STARTED, attempts=F('attempts') + 1, modified=now)
+    return claimed == 1
+
+
+def update_module_state_chunk(chunk_id, update_fcn, action_name, filter_fcn, xmodule_instance_args):
+    """
+    Calls `update_fcn` on the StudentModules in the InstructorTaskChunk `chunk_id` that haven't been
+    updated yet, if no other task is working on the chunk, saving checkpoints as it goes.
+
+    If `update_fcn` raises an exception, the chunk is left to be retried from its last checkpoint, or
+    marked as failed if it has been tried InstructorTaskChunk.MAX_ATTEMPTS times, and the exception is
+    raised again.
+
+    Returns whether the chunk was updated. Subtasks can still be queued for chunks that the parent task
+    has already finished and deleted, so a chunk that no longer exists isn't updated.
+    """
+    try:
+        chunk = InstructorTaskChunk.objects.select_related('instructor_task').get(id=chunk_id)
+        if not _claim_chunk(chunk):
+            return False
+        chunk = InstructorTaskChunk.objects.get(id=chunk_id)
+    except InstructorTaskChunk.DoesNotExist:
+        TASK_LOG.info("chunk %s no longer exists, skipping it", chunk_id)
+        return False
+
+    entry = chunk.instructor_task
+    task_input = json.loads(entry.task_input)
+    modules_to_update, _ = _get_modules_to_update(entry.course_id, task_input.get('problem_url'),
+                                                  task_input.get('student'), filter_fcn)
+    modules_to_update = modules_to_update.filter(id__gte=chunk.first_id, id__lte=chunk.last_id)
+    if chunk.checkpoint_id is not None:
+        modules_to_update = modules_to_update.filter(id__gt=chunk.checkpoint_id)
+
+    def checkpoint(num_attempted, num_updated, last_id):
+        """Save the progress made on the chunk"""
+        if last_id is None:
+            return
+        InstructorTaskChunk.objects.filter(id=chunk.id).update(
+            num_attempted=chunk.num_attempted + num_attempted,
+            num_updated=chunk.num_updated + num_updated,
+            checkpoint_id=last_id,
+            modified=timezone.now(),
+        )
+
+    try:
+        module_descriptor = modulestore().get_instance(entry.course_id, task_input.get('problem_url'))
+        _update_modules(module_descriptor, modules_to_update, update_fcn, action_name, xmodule_instance_args,
+                        checkpoint)
+    except Exception as exception:
+        state = FAILURE if chunk.attempts >= InstructorTaskChunk.MAX_ATTEMPTS else PENDING
+        TASK_LOG.warning("chunk %s of task (%s) failed on attempt %s: %s",
+                         chunk.id, entry.task_id, chunk.attempts, exception)
+        InstructorTaskChunk.objects.filter(id=chunk.id).update(
+            state=state, error=u"{0}: {1}".format(type(exception).__name__, exception)[:1024],
+            modified=timezone.now(),
+        )
+        raise
+
+    InstructorTaskChunk.objects.filter(id=chunk.id).update(state=SUCCESS, modified=timezone.now())
+    return True
+
+
 def _perform_module_state_update(course_id, module_state_key, student_identifier, update_fcn, action_name, filter_fcn,
-                                 xmodule_instance_args):
+                                 xmodule_instance_args, entry_id=None, chunk_task=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -89,6 +274,13 @@ def _perform_module_state_update(course_id, module_state_key, student_identifier
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `chunk_task` is not None, and there are more than MODULES_PER_CHUNK modules to update for all students,
+    the modules are split into InstructorTaskChunks of the InstructorTask `entry_id`.  `chunk_task` is a celery
+    task taking the arguments (entry_id, chunk_id, xmodule_instance_args) that calls update_module_state_chunk,
+    and is started for each chunk.  This task also updates chunks itself while no other task is working on them,
+    and aggregates the progress of all of the chunks.  A chunk that raises an exception is retried from its last
+    checkpoint, up to InstructorTaskChunk.MAX_ATTEMPTS times.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -109,33 +301,13 @@ def _perform_module_state_update(course_id, module_state_key, student_identifier
     # find the problem descriptor:
     module_descriptor = modulestore().get_instance(course_id, module_state_key)
 
-    # find the module in question
-    modules_to_update = StudentModule.objects.filter(course_id=course_id,
-                                                     module_state_key=module_state_key)
-
-    # give the option of rescoring an individual student. If not specified,
-    # then rescores all students who have responded to a problem so far
-    student = None
-    if student_identifier is not None:
-        # if an identifier is supplied, then look for the student,
-        # and let it throw an exception if none is found.
-        if "@" in student_identifier:
-            student = User.objects.get(email=student_identifier)
-        elif student_identifier is not None:
-            student = User.objects.get(username=student_identifier)
-
-    if student is not None:
-        modules_to_update = modules_to_update.filter(student_id=student.id)
-
-    if filter_fcn is not None:
-        modules_to_update = filter_fcn(modules_to_update)
+    modules_to_update, single_student = _get_modules_to_update(course_id, module_state_key, student_identifier,
+                                                               filter_fcn)
 
     # perform the main loop
-    num_updated = 0
-    num_attempted = 0
     num_total = modules_to_update.count()
 
-    def get_task_progress():
+    def get_task_progress(num_attempted, num_updated):
         """Return a dict containing info about current task"""
         current_time = time()
         progress = {'action_name': action_name,
@@ -146,27 +318,66 @@ def _perform_module_state_update(course_id, module_state_key, student_identifier
                     }
         return progress
 
-    task_progress = get_task_progress()
-    _get_current_task().update_state(state=PROGRESS, meta=task_progress)
-    for module_to_update in modules_to_update:
-        num_attempted += 1
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=['action:{name}'.format(name=action_name)]):
-            if update_fcn(module_descriptor, module_to_update, xmodule_instance_args):
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                num_updated += 1
-
-        # update task status:
-        task_progress = get_task_progress()
-        _get_current_task().update_state(state=PROGRESS, meta=task_progress)
-
-    return task_progress
+    def report_progress(num_attempted, num_updated, _last_id=None):
+        """Update task status"""
+        _get_current_task().update_state(state=PROGRESS, meta=get_task_progress(num_attempted, num_updated))
+
+    report_progress(0, 0)
+    if chunk_task is None or single_student or num_total <= MODULES_PER_CHUNK:
+        num_attempted, num_updated = _update_modules(module_descriptor, modules_to_update, update_fcn, action_name,
+                                                     xmodule_instance_args, report_progress)
+        return get_task_progress(num_attempted, num_updated)
+
+    chunks = _get_or_create_chunks(entry_id, modules_to_update)
+    for chunk in chunks:
+        if chunk.state not in (SUCCESS, FAILURE):
+            chunk_task.apply_async(args=[entry_id, chunk.id, xmodule_instance_args])
+
+    last_report_time = time()
+    while True:
+        chunks = list(InstructorTaskChunk.objects.filter(instructor_task_id=entry_id))
+        for chunk in chunks:
+            if chunk.state == FAILURE:
+                raise UpdateProblemModuleStateError(
+                    "Updating modules {first} to {last} failed: {error}".format(
+                        first=chunk.first_id, last=chunk.last_id, error=chunk.error
+                    )
+                )
+        if all(chunk.state == SUCCESS for chunk in chunks):
+            break
+
+        # work on a chunk that no other task is working on, or else wait for them
+        updated_a_chunk = False
+        for chunk in chunks:
+            if chunk.state in (PENDING, STARTED):
+                try:
+                    updated_a_chunk = update_module_state_chunk(chunk.id, update_fcn, action_name, filter_fcn,
+                                                                xmodule_instance_args)
+                except Exception:  # pylint: disable=broad-except
+                    # the chunk is retried, or fails the task the next time around
+                    updated_a_chunk = True
+                if updated_a_chunk:
+                    break
+        if not updated_a_chunk:
+            sleep(CHUNK_POLL_SECONDS)
+
+        if time() - last_report_time >= PROGRESS_INTERVAL_SECONDS:
+            totals = InstructorTaskChunk.objects.filter(instructor_task_id=entry_id).aggregate(
+                attempted=Sum('num_attempted'), updated=Sum('num_updated')
+            )
+            report_progress(totals['attempted'] or 0, totals['updated'] or 0)
+            last_report_time = time()
+
+    totals = InstructorTaskChunk.objects.filter(instructor_task_id=entry_id).aggregate(
+        attempted=Sum('num_attempted'), updated=Sum('num_updated')
+    )
+    # the checkpoints are only needed until all of the chunks are done
+    InstructorTaskChunk.objects.filter(instructor_task_id=entry_id).delete()
+    return get_task_progress(totals['attempted'] or 0, totals['updated'] or 0)
 
 
 def update_problem_module_state(entry_id, update_fcn, action_name, filter_fcn,
-                                xmodule_instance_args):
+                                xmodule_instance_args, chunk_task=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -175,6 +386,7 @@ def update_problem_module_state(entry_id, update_fcn, action_name, filter_fcn,
     wraps.  It is setting the entry's value for task_state based on what Celery would set it to once
     the task returns to Celery:  FAILURE if an exception is encountered, and SUCCESS if it returns normally.
     Other arguments are pass-throughs to _perform_module_state_update, and documented there.
+    If `chunk_task` is not None, the modules of tasks for all students may be updated in parallel by it.
 
     If no exceptions are raised, a dict containing the task's result is returned, with the following keys:
 
@@ -233,7 +445,8 @@ def update_problem_module_state(entry_id, update_fcn, action_name, filter_fcn,
         # Now do the work:
         with dog_stats_api.timer('instructor_tasks.module.time.overall', tags=['action:{name}'.format(name=action_name)]):
             task_progress = _perform_module_state_update(course_id, module_state_key, student_ident, update_fcn,
-                                                         action_name, filter_fcn, xmodule_instance_args)
+                                                         action_name, filter_fcn, xmodule_instance_args,
+                                                         entry_id=entry_id, chunk_task=chunk_task)
         # If we get here, we assume we've succeeded, so update the InstructorTask entry in anticipation.
         # But we do this within the try, in case creating the task_output causes an exception to be
         # raised.
@@ -19,11 +19,12 @@ from courseware.model_data import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
 
-from instructor_task.models import InstructorTask
+from instructor_task.models import InstructorTask, InstructorTaskChunk
 from instructor_task.tests.test_base import InstructorTaskModuleTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state
-from instructor_task.tasks_helper import UpdateProblemModuleStateError, update_problem_module_state
+from instructor_task.tasks_helper import (UpdateProblemModuleStateError, update_problem_module_state,
+                                          update_module_state_chunk)
 
 
 PROBLEM_URL_NAME = "test_urlname"
@@ -40,7 +41,7 @@ class TestInstructorTasks(InstructorTaskModuleTestCase):
         self.instructor = self.create_instructor('instructor')
         self.problem_url = InstructorTaskModuleTestCase.problem_location(PROBLEM_URL_NAME)
 
-    def _create_input_entry(self, student_ident=None):
+    def _create_input_entry(self, student_ident=None, task_type='rescore_problem'):
         """Creates a InstructorTask entry for testing."""
         task_id = str(uuid4())
         task_input = {'problem_url': self.problem_url}
@@ -48,6 +49,7 @@ class TestInstructorTasks(InstructorTaskModuleTestCase):
             task_input['student'] = student_ident
 
         instructor_task = InstructorTaskFactory.create(course_id=self.course.id,
+                                                       task_type=task_type,
                                                        requester=self.instructor,
                                                        task_input=json.dumps(task_input),
                                                        task_key='dummy value',
@@ -186,6 +188,27 @@ class TestInstructorTasks(InstructorTaskModuleTestCase):
                                           student=student,
                                           module_state_key=self.problem_url)
 
+    @patch('instructor_task.tasks_helper.MODULES_PER_CHUNK', 3)
+    def test_reset_in_chunks(self):
+        initial_attempts = 3
+        input_state = json.dumps({'attempts': initial_attempts})
+        num_students = 10
+        students = self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry(task_type='reset_problem_attempts')
+        status = self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+        self.assertEquals(status.get('attempted'), num_students)
+        self.assertEquals(status.get('updated'), num_students)
+        self.assertEquals(status.get('total'), num_students)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        self._assert_num_attempts(students, 0)
+        # the chunks are removed once they have all been updated
+        self.assertFalse(InstructorTaskChunk.objects.filter(instructor_task=entry).exists())
+
+    def test_deleted_chunk_is_skipped(self):
+        # subtasks can still be queued after the parent task has removed the chunks
+        self.assertFalse(update_module_state_chunk(1234567, Mock(), 'reset', None, None))
+
     def _test_reset_with_student(self, use_email):
         """Run a reset task for one student, with several StudentModules for the problem defined."""
         num_students = 10
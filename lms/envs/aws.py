@@ -107,6 +107,9 @@ EMAIL_PORT = ENV_TOKENS.get('EMAIL_PORT', 25)  # django default is 25
 EMAIL_USE_TLS = ENV_TOKENS.get('EMAIL_USE_TLS', False)  # django default is False
 EMAILS_PER_TASK = ENV_TOKENS.get('EMAILS_PER_TASK', 100)
 EMAILS_PER_QUERY = ENV_TOKENS.get('EMAILS_PER_QUERY', 1000)
+BULK_EMAIL_CONNECTIONS = ENV_TOKENS.get('BULK_EMAIL_CONNECTIONS', BULK_EMAIL_CONNECTIONS)
+BULK_EMAIL_MESSAGES_PER_BATCH = ENV_TOKENS.get('BULK_EMAIL_MESSAGES_PER_BATCH', BULK_EMAIL_MESSAGES_PER_BATCH)
+BULK_EMAIL_BATCH_DELAY = ENV_TOKENS.get('BULK_EMAIL_BATCH_DELAY', BULK_EMAIL_BATCH_DELAY)
 SITE_NAME = ENV_TOKENS['SITE_NAME']
 SESSION_ENGINE = ENV_TOKENS.get('SESSION_ENGINE', SESSION_ENGINE)
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
@@ -123,6 +126,7 @@ MEDIA_URL = ENV_TOKENS['MEDIA_URL']
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 
 CACHES = ENV_TOKENS['CACHES']
+STATIC_CONTENT_DISK_CACHE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE', STATIC_CONTENT_DISK_CACHE)
 
 #Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -161,7 +161,15 @@ MITX_FEATURES = {
     'ENABLE_SHOPPING_CART': False,
 
     # Toggle storing detailed billing information
-    'STORE_BILLING_INFO': False
+    'STORE_BILLING_INFO': False,
+
+    # Reuse stored per-student gradesets in courseware.grades.grade, only
+    # regrading the sections whose student state has changed
+    'ENABLE_GRADE_CACHE': False,
+
+    # Only render the current tab of a sequence with the page, fetching the
+    # others when the student goes to them
+    'ENABLE_LAZY_SEQUENCE_RENDERING': False,
 }
 
 # Used for A/B testing
@@ -170,6 +178,9 @@ DEFAULT_GROUPS = []
 # If this is true, random scores will be generated for the purpose of debugging the profile graphs
 GENERATE_PROFILE_SCORES = False
 
+# How long stored per-student gradesets are kept, in seconds (see courseware.grade_cache)
+GRADE_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
 # Used with XQueue
 XQUEUE_WAITTIME_BETWEEN_REQUESTS = 5  # seconds
 
@@ -331,6 +342,14 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Warm sandboxed pythons to run jailed code in, per process.
+    'worker_pool': {
+        # How many workers?  Zero starts a new sandbox for every execution.
+        'size': 0,
+        # How many pieces of code does a worker run before it is replaced?
+        'max_executions': 100,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -384,6 +403,12 @@ DEFAULT_FROM_EMAIL = 'sfinney@austincc.edu'
 DEFAULT_BULK_FROM_EMAIL = 'sfinney@austincc.edu'
 EMAILS_PER_TASK = 100
 EMAILS_PER_QUERY = 1000
+# Each bulk email task sends its messages in batches of BULK_EMAIL_MESSAGES_PER_BATCH,
+# over BULK_EMAIL_CONNECTIONS SMTP connections, waiting BULK_EMAIL_BATCH_DELAY seconds
+# between batches
+BULK_EMAIL_CONNECTIONS = 2
+BULK_EMAIL_MESSAGES_PER_BATCH = 20
+BULK_EMAIL_BATCH_DELAY = 0
 DEFAULT_FEEDBACK_EMAIL = 'sfinney@austincc.edu'
 SERVER_EMAIL = 'sfinney@austincc.edu'
 TECH_SUPPORT_EMAIL = 'sfinney@austincc.edu'
@@ -545,6 +570,11 @@ MIDDLEWARE_CLASSES = (
     'ratelimitbackend.middleware.RateLimitMiddleware',
 )
 
+# A local disk cache for c4x static content too large for memcached, e.g.
+# {'DIRECTORY': '/tmp/static_content', 'MAX_SIZE': 1024 * 1024 * 1024}
+# (see contentserver.middleware.get_disk_cache). Disabled if None.
+STATIC_CONTENT_DISK_CACHE = None
+
 ############################### Pipeline #######################################
 
 STATICFILES_STORAGE = 'pipeline.storage.PipelineCachedStorage'
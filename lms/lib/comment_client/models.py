@@ -62,9 +62,21 @@ class Model(object):
 
     def _retrieve(self, *args, **kwargs):
         url = self.url(action='get', params=self.attributes)
-        response = perform_request('get', url, self.default_retrieve_params)
+        response = perform_request('get', url, dict(self.default_retrieve_params))
         self.update_attributes(**response)
 
+    @classmethod
+    def retrieve_all(cls, instances, *args, **kwargs):
+        """
+        Retrieves each of instances, with several requests in flight at once.
+        Takes the same arguments as retrieve, and returns instances.
+        """
+        map_concurrently(
+            lambda instance: instance.retrieve(*args, **kwargs),
+            [instance for instance in instances if not instance.retrieved]
+        )
+        return instances
+
     @classmethod
     def find(cls, id):
         return cls(id=id)
@@ -11,3 +11,16 @@ if hasattr(settings, "COMMENTS_SERVICE_KEY"):
     API_KEY = settings.COMMENTS_SERVICE_KEY
 else:
     API_KEY = "PUT_YOUR_API_KEY_HERE"
+
+# The number of keep-alive connections to the comments service that each
+# process keeps open
+if hasattr(settings, "COMMENTS_SERVICE_POOL_SIZE"):
+    POOL_SIZE = settings.COMMENTS_SERVICE_POOL_SIZE
+else:
+    POOL_SIZE = 10
+
+# The number of requests made at once when retrieving many threads or users
+if hasattr(settings, "COMMENTS_SERVICE_CONCURRENCY"):
+    CONCURRENCY = settings.COMMENTS_SERVICE_CONCURRENCY
+else:
+    CONCURRENCY = 5
@@ -1,11 +1,26 @@
 from dogapi import dog_stats_api
+import copy
 import json
 import logging
+import os
 import requests
 import settings
+import threading
+from multiprocessing.pool import ThreadPool
+
+# We may not always have the request_cache module available
+try:
+    from request_cache.middleware import RequestCache
+    HAS_REQUEST_CACHE = True
+except ImportError:
+    HAS_REQUEST_CACHE = False
 
 log = logging.getLogger(__name__)
 
+_session_lock = threading.Lock()
+_session = None
+_session_pid = None
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -28,16 +43,92 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+def get_session():
+    """
+    Returns the requests session shared by this process, which keeps a pool
+    of keep-alive connections to the comments service. A forked process
+    gets a session of its own, rather than sharing its parent's sockets.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = requests.session(config={
+                'keep_alive': True,
+                'pool_connections': settings.POOL_SIZE,
+                'pool_maxsize': settings.POOL_SIZE,
+            })
+            _session_pid = os.getpid()
+        return _session
+
+
+def map_concurrently(function, items):
+    """
+    Returns [function(item) for item in items], calling function for up to
+    settings.CONCURRENCY items at once, each on its own connection. The
+    calls share the calling thread's request cache, so their GETs are
+    coalesced with the rest of the request's.
+    """
+    items = list(items)
+    if len(items) < 2:
+        return [function(item) for item in items]
+
+    request_cache_data = request = None
+    if HAS_REQUEST_CACHE:
+        request_cache_data = getattr(RequestCache.get_request_cache(), 'data', None)
+        request = RequestCache.get_current_request()
+
+    def call(item):
+        if request is not None:
+            request_cache = RequestCache.get_request_cache()
+            request_cache.data = request_cache_data
+            request_cache.request = request
+        return function(item)
+
+    pool = ThreadPool(min(settings.CONCURRENCY, len(items)))
+    try:
+        return pool.map(call, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _get_request_memo():
+    """
+    Returns the dict in which the responses to GETs are kept for the rest of
+    the current request, or None if this thread isn't handling a request, since
+    nothing would ever forget them
+    """
+    if not HAS_REQUEST_CACHE or RequestCache.get_current_request() is None:
+        return None
+    data = getattr(RequestCache.get_request_cache(), 'data', None)
+    if data is None:
+        return None
+    return data.setdefault('comment_client', {})
+
+
 def perform_request(method, url, data_or_params=None, *args, **kwargs):
     if data_or_params is None:
         data_or_params = {}
+
+    # Identical GETs during a request are only sent once. Any other request
+    # may change what they would return, so it forgets them all.
+    memo = _get_request_memo()
+    memo_key = None
+    if memo is not None:
+        if method == 'get':
+            memo_key = (url, json.dumps(data_or_params, sort_keys=True), kwargs.get("raw", False))
+            if memo_key in memo:
+                return copy.deepcopy(memo[memo_key])
+        else:
+            memo.clear()
+
     data_or_params['api_key'] = settings.API_KEY
     try:
         with dog_stats_api.timer('comment_client.request.time'):
             if method in ['post', 'put', 'patch']:
-                response = requests.request(method, url, data=data_or_params, timeout=5)
+                response = get_session().request(method, url, data=data_or_params, timeout=5)
             else:
-                response = requests.request(method, url, params=data_or_params, timeout=5)
+                response = get_session().request(method, url, params=data_or_params, timeout=5)
     except Exception as err:
         # remove API key if it is in the params
         if 'api_key' in data_or_params:
@@ -57,9 +148,12 @@ def perform_request(method, url, data_or_params=None, *args, **kwargs):
         raise CommentClientUnknownError(response.text)
     else:
         if kwargs.get("raw", False):
-            return response.text
+            result = response.text
         else:
-            return json.loads(response.text)
+            result = json.loads(response.text)
+        if memo_key is not None:
+            memo[memo_key] = copy.deepcopy(result)
+        return result
 
 
 class CommentClientError(Exception):
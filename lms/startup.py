@@ -8,9 +8,12 @@ settings.INSTALLED_APPS  # pylint: disable=W0104
 
 from django_startup import autostartup
 
+from capa.safe_exec import configure_worker_pool
+
 
 def run():
     """
     Executed during django startup
     """
     autostartup()
+    configure_worker_pool(**settings.CODE_JAIL.get('worker_pool', {}))